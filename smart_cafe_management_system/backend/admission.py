@@ -0,0 +1,275 @@
+"""
+Smart Cafe Management System - Admission Control
+Per-endpoint concurrency limits, per-client token buckets and a bounded
+priority wait queue that sheds excess requests with 429/503 up front
+"""
+
+import asyncio
+import itertools
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from db import POOL_SIZE
+
+# Admission configuration (overridable from the environment)
+ADMISSION_ENABLED = os.environ.get('SMART_CAFE_ADMISSION', '1') != '0'
+# Requests handled at once; past this they queue. The default matches the
+# connection pool, so admitted requests never wait for a connection.
+ADMISSION_CAPACITY = int(os.environ.get('SMART_CAFE_ADMISSION_CAPACITY', POOL_SIZE))
+ADMISSION_QUEUE = int(os.environ.get('SMART_CAFE_ADMISSION_QUEUE', ADMISSION_CAPACITY * 4))
+ADMISSION_WAIT = float(os.environ.get('SMART_CAFE_ADMISSION_WAIT_MS', 2000)) / 1000
+# Per-client token buckets are opt-in (SMART_CAFE_RATE_LIMIT=1)
+RATE_LIMITS = os.environ.get('SMART_CAFE_RATE_LIMIT') == '1'
+
+# Token buckets kept at once; the least recently seen clients are dropped first
+MAX_CLIENTS = 10000
+
+# Seconds a client is told to wait when the queue turns it away
+RETRY_AFTER = 1
+
+# Lower numbers are served first
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+
+class Shed(Exception):
+    """Raised when a request is turned away before running"""
+
+    status = 503
+
+    def __init__(self, message, retry_after=RETRY_AFTER):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RateLimited(Shed):
+    """Raised when a client has used up its token bucket"""
+
+    status = 429
+
+
+class Overloaded(Shed):
+    """Raised when the wait queue is full or a request's deadline passes"""
+
+
+class Lane:
+    """A class of endpoints sharing a priority, a concurrency limit and a per-client rate"""
+
+    __slots__ = ('name', 'priority', 'max_concurrent', 'rate', 'burst', 'max_wait')
+
+    def __init__(self, name, priority, max_concurrent=None, rate=None, burst=None, max_wait=ADMISSION_WAIT):
+        self.name = name
+        self.priority = priority
+        self.max_concurrent = max_concurrent
+        self.rate = rate
+        self.burst = burst if burst is not None else rate
+        self.max_wait = max_wait
+
+
+def default_lanes(capacity=ADMISSION_CAPACITY, rate_limits=RATE_LIMITS):
+    """Orders and staff may use every slot; logins half of them, reports a quarter.
+
+    Per-client rates apply only with ``rate_limits``: clients without a
+    session share their IP's bucket, so kiosks and NATed campuses would
+    otherwise throttle each other.
+    """
+    def rate(per_second, burst):
+        return {'rate': per_second, 'burst': burst} if rate_limits else {}
+
+    return {
+        'orders': Lane('orders', PRIORITY_HIGH, **rate(20, 100)),
+        'staff': Lane('staff', PRIORITY_HIGH),
+        'auth': Lane('auth', PRIORITY_NORMAL, max(1, capacity // 2), **rate(10, 50)),
+        'default': Lane('default', PRIORITY_NORMAL),
+        'reports': Lane('reports', PRIORITY_LOW, max(1, capacity // 4), max_wait=ADMISSION_WAIT / 2,
+                        **rate(5, 20)),
+    }
+
+
+class TokenBucket:
+    """``rate`` tokens per second, holding at most ``burst``"""
+
+    __slots__ = ('tokens', 'updated')
+
+    def __init__(self, burst, now):
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, rate, burst, now):
+        """Spend one token; returns 0, or the seconds until one is available"""
+        self.tokens = min(burst, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / rate
+
+
+class Ticket:
+    """One admitted or waiting request; pass it back to ``release()``"""
+
+    __slots__ = ('lane', 'seq', 'wake', 'outcome')
+
+    def __init__(self, lane, seq, wake):
+        self.lane = lane
+        self.seq = seq
+        self.wake = wake
+        # None while waiting, then 'granted', 'evicted' or 'expired'
+        self.outcome = None
+
+
+class AdmissionController:
+    """Decides whether each request runs now, waits, or is shed.
+
+    A request first spends a token from its client's bucket for its lane
+    (429 when empty). It then runs at once if fewer than ``capacity``
+    requests are running and its lane is under its own limit. Otherwise it
+    waits in a queue of at most ``max_waiting`` requests, ordered by lane
+    priority then arrival, until a slot frees or its lane's ``max_wait``
+    passes (503). When the queue is full, a new request evicts the newest
+    waiter of a lower priority, or is itself turned away with 503.
+
+    ``admit()`` blocks the calling thread; ``admit_async()`` waits on the
+    event loop so queued requests don't hold a handler thread.
+    """
+
+    def __init__(self, capacity=ADMISSION_CAPACITY, max_waiting=ADMISSION_QUEUE, lanes=None,
+                 max_clients=MAX_CLIENTS):
+        self.capacity = capacity
+        self.max_waiting = max_waiting
+        self.lanes = lanes if lanes is not None else default_lanes(capacity)
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()
+        self._waiting = []
+        self._running = {name: 0 for name in self.lanes}
+        self._in_flight = 0
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._stats = {'admitted': 0, 'queued': 0, 'rate_limited': 0, 'queue_full': 0, 'evicted': 0,
+                       'expired': 0}
+        self._lane_stats = {name: {'admitted': 0, 'shed': 0} for name in self.lanes}
+
+    def _check_rate(self, lane, client, now):
+        if lane.rate is None or client is None:
+            return
+        key = (lane.name, client)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(lane.burst, now)
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        wait = bucket.take(lane.rate, lane.burst, now)
+        if wait:
+            self._shed(lane, 'rate_limited')
+            raise RateLimited('Too many requests, please slow down', max(1, math.ceil(wait)))
+
+    def _has_room(self, lane):
+        limit = lane.max_concurrent
+        return self._in_flight < self.capacity and (limit is None or self._running[lane.name] < limit)
+
+    def _grant(self, ticket):
+        ticket.outcome = 'granted'
+        self._in_flight += 1
+        self._running[ticket.lane.name] += 1
+        self._stats['admitted'] += 1
+        self._lane_stats[ticket.lane.name]['admitted'] += 1
+
+    def _shed(self, lane, reason):
+        self._stats[reason] += 1
+        self._lane_stats[lane.name]['shed'] += 1
+
+    def _enqueue(self, name, client, wake):
+        """Admit at once (returns a granted Ticket) or queue a waiting one woken by ``wake()``"""
+        lane = self.lanes[name]
+        with self._lock:
+            self._check_rate(lane, client, time.monotonic())
+            ticket = Ticket(lane, next(self._seq), wake)
+            # Queued waiters can't run yet (release() hands slots out), so
+            # room now means nobody eligible is ahead of this request
+            if self._has_room(lane):
+                self._grant(ticket)
+                return ticket
+            if len(self._waiting) >= self.max_waiting:
+                victim = max(self._waiting, key=lambda waiter: (waiter.lane.priority, waiter.seq), default=None)
+                if victim is None or victim.lane.priority <= lane.priority:
+                    self._shed(lane, 'queue_full')
+                    raise Overloaded('Server busy, please retry')
+                self._waiting.remove(victim)
+                victim.outcome = 'evicted'
+                self._shed(victim.lane, 'evicted')
+                victim.wake()
+            self._waiting.append(ticket)
+            self._stats['queued'] += 1
+            return ticket
+
+    def _settle(self, ticket):
+        """After a wait: the granted ticket, or Overloaded if it was evicted or timed out"""
+        with self._lock:
+            if ticket.outcome is None:
+                self._waiting.remove(ticket)
+                ticket.outcome = 'expired'
+                self._shed(ticket.lane, 'expired')
+        if ticket.outcome != 'granted':
+            raise Overloaded('Server busy, please retry')
+        return ticket
+
+    def admit(self, name, client=None):
+        """Admit a request of lane ``name`` from ``client``, blocking while it waits"""
+        event = threading.Event()
+        ticket = self._enqueue(name, client, event.set)
+        if ticket.outcome is None:
+            event.wait(ticket.lane.max_wait)
+        return self._settle(ticket)
+
+    async def admit_async(self, name, client=None):
+        """Admit a request of lane ``name`` from ``client``, waiting on the event loop"""
+        loop = asyncio.get_running_loop()
+        woken = loop.create_future()
+
+        def wake():
+            # Called from whichever thread released the slot
+            loop.call_soon_threadsafe(lambda: woken.done() or woken.set_result(None))
+
+        ticket = self._enqueue(name, client, wake)
+        if ticket.outcome is None:
+            try:
+                await asyncio.wait_for(woken, ticket.lane.max_wait)
+            except asyncio.TimeoutError:
+                pass
+        return self._settle(ticket)
+
+    def release(self, ticket):
+        """Free an admitted request's slot and hand it to the best waiter that fits"""
+        woken = []
+        with self._lock:
+            self._in_flight -= 1
+            self._running[ticket.lane.name] -= 1
+            while self._waiting and self._in_flight < self.capacity:
+                eligible = [waiter for waiter in self._waiting if self._has_room(waiter.lane)]
+                if not eligible:
+                    break
+                waiter = min(eligible, key=lambda waiter: (waiter.lane.priority, waiter.seq))
+                self._waiting.remove(waiter)
+                self._grant(waiter)
+                woken.append(waiter)
+        for waiter in woken:
+            waiter.wake()
+
+    def stats(self):
+        """Snapshot of admission counters, overall and per lane"""
+        with self._lock:
+            snapshot = dict(self._stats, in_flight=self._in_flight, waiting=len(self._waiting),
+                            capacity=self.capacity, clients=len(self._buckets))
+            snapshot['shed'] = (self._stats['rate_limited'] + self._stats['queue_full']
+                                + self._stats['evicted'] + self._stats['expired'])
+            for name, counts in self._lane_stats.items():
+                snapshot[f'{name}_admitted'] = counts['admitted']
+                snapshot[f'{name}_shed'] = counts['shed']
+                snapshot[f'{name}_in_flight'] = self._running[name]
+            return snapshot
@@ -3,130 +3,130 @@ Smart Cafe Management System - Backend API
 Flask Application
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, g, has_app_context, stream_with_context
 from flask_cors import CORS
-from datetime import datetime
+from werkzeug.datastructures import EnvironHeaders
 import sqlite3
-import hashlib
 import os
 import json
+import time
+from concurrent.futures import TimeoutError as FutureTimeout
+from contextlib import contextmanager
+
+from admission import ADMISSION_ENABLED, AdmissionController, Shed
+from assets import ASSET_CACHE_CONTROL, AssetStore
+from db import ConnectionPool, PoolTimeout
+from events import EventHub, StreamLimitReached
+from exports import FORMATS, OrderExport, export_filename, parse_filters
+from menu_cache import MenuCache, Uncached
+from metrics import InstrumentedConnection, metrics
+from migrations import migrate
+from notifications import (DEFAULT_INBOX_SIZE, MAX_FANOUT_CAFES, MAX_INBOX_SIZE, count_unread, load_inbox,
+                           mark_read, send_notifications)
+from order_writer import OrderWriter
+from orders import (DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, STATUS_TIMESTAMPS, InvalidTransition, advance_order,
+                    insert_orders, load_cafe_queue, load_order_history, parse_cursor, prepare_order)
+from passwords import HasherBusy, PasswordHasher
+from price_index import PriceIndex
+from recommendations import RecommendationEngine
+from responses import compress_response, encode_rows, json_response
+from rollups import DEFAULT_TOP_ITEMS, MAX_TOP_ITEMS, load_analytics, parse_range, refresh_rollups
+from search import DEFAULT_SEARCH_LIMIT, MAX_SEARCH_LIMIT, search_menu
+from sessions import InvalidToken, NotPermitted, SessionMismatch, SessionStore, bearer_token
+from stats import read_counters, reconcile
 
 app = Flask(__name__)
-CORS(app)  # Enable CORS for frontend
+# Enable CORS for frontend; asgi.py builds its event-loop responses' headers from these too
+CORS_OPTIONS = {}
+CORS(app, **CORS_OPTIONS)
+metrics.init_app(app)  # Per-route latency and SQL profiling
 
 # Database configuration
-DB_NAME = 'smart_cafe.db'
+DB_NAME = os.environ.get('SMART_CAFE_DB', 'smart_cafe.db')
+pool = ConnectionPool(DB_NAME, factory=InstrumentedConnection)
+
+# In-memory recommendation model, built on first use
+recommender = RecommendationEngine()
+
+# Server-side menu prices used to price every order
+price_index = PriceIndex()
+
+# Pre-serialized menu responses, invalidated on any cafe/menu write
+menu_cache = MenuCache()
+MENU_CACHE_CONTROL = 'public, max-age=60, must-revalidate'
+
+# Menu images served from memory under content-hashed URLs, with resized variants
+assets = AssetStore()
+
+# Order writes: optional group commit (SMART_CAFE_GROUP_COMMIT=1) coalesces
+# orders arriving within SMART_CAFE_GROUP_COMMIT_MS into one transaction
+MAX_BATCH_ORDERS = 500
+GROUP_COMMIT_TIMEOUT = 10
+order_writer = None
+if os.environ.get('SMART_CAFE_GROUP_COMMIT') == '1':
+    order_writer = OrderWriter(
+        pool,
+        window=float(os.environ.get('SMART_CAFE_GROUP_COMMIT_MS', 5)) / 1000,
+        on_commit=lambda conn: refresh_recommendations(conn)
+    )
+    metrics.add_gauge_source('order_writer', lambda: order_writer.stats())
+
+# Pub/sub hub behind the /api/stream Server-Sent Events endpoint
+event_hub = EventHub()
+# Roles that run cafes: they move orders along and read the cafe queues
+STAFF_ROLES = ('admin',)
+# Roles that may stream a cafe's order events
+CAFE_STREAM_ROLES = STAFF_ROLES + ('food_authority',)
+# Longest a cafe queue long-poll is held waiting for a change
+MAX_QUEUE_WAIT = float(os.environ.get('SMART_CAFE_QUEUE_WAIT', 25))
+
+# Bounded pool for password hashing, so login surges can't pin every request thread
+password_hasher = PasswordHasher()
+
+# Signed session tokens with an in-memory cache of each session's user; set
+# SMART_CAFE_SECRET_KEY so tokens stay valid across restarts and workers
+sessions = SessionStore(os.environ.get('SMART_CAFE_SECRET_KEY'))
+# Clients without a token may act for the user_id they send only with
+# SMART_CAFE_ALLOW_CLAIMED_USER=1, a stopgap while old clients move to tokens
+ALLOW_CLAIMED_USER = os.environ.get('SMART_CAFE_ALLOW_CLAIMED_USER') == '1'
+
+# Admission control: per-endpoint concurrency limits, per-client token buckets
+# and a priority wait queue that sheds surges with 429/503 before they run
+# (SMART_CAFE_ADMISSION=0 turns it off)
+admission = AdmissionController() if ADMISSION_ENABLED else None
+ADMISSION_LANES = {
+    'place_order': 'orders',
+    'place_orders_batch': 'orders',
+    'update_order_status': 'staff',
+    'login': 'auth',
+    'signup': 'auth',
+    'admin_dashboard': 'reports',
+    'admin_analytics': 'reports',
+    'reconcile_stats': 'reports',
+    'admin_export_orders': 'reports',
+    'food_authority_dashboard': 'reports',
+    'food_authority_export_orders': 'reports'
+}
+# Served from memory or limited on their own
+ADMISSION_EXEMPT = {'prometheus_metrics', 'get_image', 'event_stream', 'static'}
+if admission is not None:
+    metrics.add_gauge_source('admission', lambda: admission.stats())
+
+# Shared-memory channel telling forked workers about menu invalidations; set
+# by the production launcher (launcher.py), None in a single process
+cache_channel = None
+
+metrics.add_gauge_source('db_pool', lambda: pool.stats())
+metrics.add_gauge_source('event_hub', lambda: event_hub.stats())
+metrics.add_gauge_source('menu_cache', lambda: menu_cache.stats())
+metrics.add_gauge_source('sessions', lambda: sessions.stats())
+metrics.add_gauge_source('password_hasher', lambda: password_hasher.stats())
+metrics.add_gauge_source('assets', lambda: assets.stats())
 
 # Initialize database
 def init_db():
-    """Initialize database with required tables"""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    
-    # Users table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            email TEXT UNIQUE NOT NULL,
-            password TEXT NOT NULL,
-            student_id TEXT,
-            phone TEXT,
-            address TEXT,
-            role TEXT NOT NULL DEFAULT 'user',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Cafes table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS cafes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            description TEXT,
-            location TEXT,
-            status TEXT DEFAULT 'active',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Menu items table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS menu_items (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            cafe_id INTEGER NOT NULL,
-            name TEXT NOT NULL,
-            description TEXT,
-            price REAL NOT NULL,
-            image_url TEXT,
-            category TEXT,
-            available INTEGER DEFAULT 1,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (cafe_id) REFERENCES cafes(id)
-        )
-    ''')
-    
-    # Orders table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS orders (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            cafe_id INTEGER NOT NULL,
-            total_amount REAL NOT NULL,
-            status TEXT DEFAULT 'pending',
-            delivery_address TEXT,
-            contact_number TEXT,
-            payment_method TEXT DEFAULT 'cash',
-            jazzcash_tid TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users(id),
-            FOREIGN KEY (cafe_id) REFERENCES cafes(id)
-        )
-    ''')
-    
-    # Order items table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS order_items (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            order_id INTEGER NOT NULL,
-            menu_item_id INTEGER NOT NULL,
-            quantity INTEGER NOT NULL,
-            price REAL NOT NULL,
-            FOREIGN KEY (order_id) REFERENCES orders(id),
-            FOREIGN KEY (menu_item_id) REFERENCES menu_items(id)
-        )
-    ''')
-    
-    # Notifications table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS notifications (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            from_role TEXT NOT NULL,
-            to_role TEXT NOT NULL,
-            cafe_id INTEGER,
-            subject TEXT NOT NULL,
-            message TEXT NOT NULL,
-            read INTEGER DEFAULT 0,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (cafe_id) REFERENCES cafes(id)
-        )
-    ''')
-    
-    # User preferences for recommendations
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS user_preferences (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            menu_item_id INTEGER NOT NULL,
-            rating INTEGER DEFAULT 0,
-            order_count INTEGER DEFAULT 0,
-            FOREIGN KEY (user_id) REFERENCES users(id),
-            FOREIGN KEY (menu_item_id) REFERENCES menu_items(id)
-        )
-    ''')
-    
-    conn.commit()
-    conn.close()
+    """Bring the database schema up to date"""
+    migrate(DB_NAME)
     
     # Insert default admin user if not exists
     create_default_admin()
@@ -138,7 +138,7 @@ def create_default_admin():
     
     cursor.execute('SELECT * FROM users WHERE email = ?', ('admin@cafe.com',))
     if not cursor.fetchone():
-        password_hash = hashlib.sha256('admin123'.encode()).hexdigest()
+        password_hash = hash_password('admin123')
         cursor.execute('''
             INSERT INTO users (name, email, password, role)
             VALUES (?, ?, ?, ?)
@@ -149,14 +149,373 @@ def create_default_admin():
 
 # Database helper functions
 def get_db():
-    """Get database connection"""
-    conn = sqlite3.connect(DB_NAME)
-    conn.row_factory = sqlite3.Row
-    return conn
+    """Get the pooled database connection for the current app context"""
+    if 'db' not in g:
+        g.db = pool.acquire()
+    return g.db
+
+@contextmanager
+def borrow_db():
+    """The app context's connection if it has one, else a pooled one returned on exit.
+
+    For reads that may run before ``place_order`` blocks on the group-commit
+    writer: they must not pin a pooled connection for the rest of the request.
+    """
+    if has_app_context() and 'db' in g:
+        yield g.db
+        return
+    conn = pool.acquire()
+    try:
+        yield conn
+    finally:
+        pool.release(conn)
+
+@app.teardown_appcontext
+def release_db(exception):
+    """Return the app context's connection to the pool"""
+    conn = g.pop('db', None)
+    if conn is not None:
+        pool.release(conn)
+
+@app.errorhandler(PoolTimeout)
+def pool_timeout(error):
+    """Fail fast when every pooled connection is busy"""
+    return jsonify({'success': False, 'message': 'Server busy, please retry'}), 503
+
+@app.errorhandler(HasherBusy)
+def hasher_busy(error):
+    """Fail fast when the password hashing pool is saturated"""
+    response = jsonify({'success': False, 'message': str(error)})
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response, 503
+
+@app.errorhandler(InvalidToken)
+def invalid_token(error):
+    """Reject requests carrying a bad, expired or revoked session token"""
+    return jsonify({'success': False, 'message': str(error)}), 401
+
+@app.errorhandler(SessionMismatch)
+def session_mismatch(error):
+    """Reject requests acting for a different user than their session"""
+    return jsonify({'success': False, 'message': str(error)}), 403
+
+@app.errorhandler(NotPermitted)
+def not_permitted(error):
+    """Reject requests whose session role may not use the route"""
+    return jsonify({'success': False, 'message': str(error)}), 403
+
+@app.errorhandler(Shed)
+def request_shed(error):
+    """Turn away requests that admission control rate-limited or could not queue"""
+    response = jsonify({'success': False, 'message': str(error)})
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response, error.status
+
+def load_session_user(session_id, user_id):
+    """Session store loader: the user row, or None if the session was revoked"""
+    with borrow_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT 1 FROM revoked_sessions WHERE session_id = ?', (session_id,))
+        if cursor.fetchone():
+            return None
+        cursor.execute('SELECT * FROM users WHERE id = ?', (user_id,))
+        return cursor.fetchone()
+
+def resolve_session(token):
+    """The session for ``token``, or None without one (raises InvalidToken)"""
+    return sessions.resolve(token, load_session_user) if token else None
+
+def current_session():
+    """The session for the request's bearer token, or None if it sent none"""
+    if '_session' not in g:
+        g._session = resolve_session(bearer_token(request.headers))
+    return g._session
+
+def acting_user_id(claimed, allow_admin=False):
+    """The user a request acts for: its session's user.
+
+    A different ``user_id`` is refused unless ``allow_admin`` and the session
+    belongs to an admin. Without a token the request gets InvalidToken, or
+    acts for ``claimed`` when ALLOW_CLAIMED_USER is set.
+    """
+    session = current_session()
+    if session is None:
+        if ALLOW_CLAIMED_USER:
+            return claimed
+        raise InvalidToken('Sign in required')
+    if claimed in (None, '') or str(claimed) == str(session.user_id):
+        return session.user_id
+    if allow_admin and session.role == 'admin':
+        return claimed
+    raise SessionMismatch('Session token belongs to another user')
+
+def check_role(session, roles):
+    """Raise InvalidToken without a session, or NotPermitted unless its role is in ``roles``"""
+    if session is None:
+        raise InvalidToken('Sign in required')
+    if session.role not in roles:
+        raise NotPermitted('Your account may not use this route')
+
+def require_role(*roles):
+    """The request's session if its role is one of ``roles`` (raises InvalidToken or NotPermitted)"""
+    session = current_session()
+    check_role(session, roles)
+    return session
+
+def refresh_recommendations(conn):
+    """Fold newly committed orders into the recommendation model"""
+    if recommender.ready:
+        recommender.refresh(conn)
+
+def publish_order(order_id, order):
+    """Push a new or changed order to its user's and cafe's streams"""
+    event_hub.publish('order', [f"user:{order['user_id']}", f"cafe:{order['cafe_id']}"], {
+        'id': order_id,
+        'user_id': order['user_id'],
+        'cafe_id': order['cafe_id'],
+        'status': order.get('status', 'pending'),
+        'total_amount': order['total_amount']
+    })
+
+def drop_menu_caches():
+    """Drop this process's caches derived from cafe and menu rows"""
+    menu_cache.invalidate()
+    price_index.invalidate()
+    recommender.invalidate()
+    # A menu edit may point an item at an image added since it was missing
+    assets.forget_missing()
+
+def invalidate_menu():
+    """Invalidate everything derived from cafe and menu rows, in every worker"""
+    drop_menu_caches()
+    if cache_channel is not None:
+        cache_channel.publish()
+
+@app.before_request
+def sync_caches():
+    """Drop caches that another worker invalidated since the last request"""
+    if cache_channel is not None and cache_channel.poll():
+        drop_menu_caches()
+
+def admission_lane(endpoint, environ):
+    """The (lane, client) a request is admitted under, or None if it skips admission.
+
+    Clients are keyed by their session's user when they send a valid token
+    and by IP otherwise; logins are always keyed by IP.
+    """
+    if endpoint is None or endpoint in ADMISSION_EXEMPT or environ['REQUEST_METHOD'] == 'OPTIONS':
+        return None
+    lane = ADMISSION_LANES.get(endpoint, 'default')
+    token = None if lane == 'auth' else bearer_token(EnvironHeaders(environ))
+    if token:
+        try:
+            return lane, f'user:{sessions.parse(token)[0]}'
+        except InvalidToken:
+            pass
+    return lane, f"ip:{environ.get('REMOTE_ADDR')}"
+
+@app.before_request
+def hold_queue_poll():
+    """Hold a long-polling cafe queue request until the queue changes, before it takes an admission slot"""
+    if request.endpoint != 'get_cafe_queue' or 'smart_cafe.waited' in request.environ:
+        return
+    # Refuse before holding anything open
+    require_role(*STAFF_ROLES)
+    try:
+        wait, after = parse_queue_poll(request.args)
+    except ValueError:
+        # The view answers 400
+        return
+    if wait:
+        try:
+            event_hub.wait([f"cafe:{request.view_args['cafe_id']}"], after, wait)
+        except StreamLimitReached:
+            return jsonify({'success': False, 'message': 'Too many open streams'}), 503, {'Retry-After': '5'}
+
+@app.before_request
+def admit_request():
+    """Wait for an admission slot, or shed the request (the ASGI server admits before this)"""
+    if admission is None or 'smart_cafe.admission' in request.environ:
+        return
+    lane = admission_lane(request.endpoint, request.environ)
+    if lane is not None:
+        g._admission = admission.admit(*lane)
+
+@app.teardown_request
+def release_admission(exception):
+    """Hand the request's admission slot to the next waiter"""
+    ticket = g.pop('_admission', None)
+    if ticket is not None:
+        admission.release(ticket)
+
+@app.after_request
+def compress_body(response):
+    """Gzip or brotli-compress JSON and text responses the client accepts"""
+    return compress_response(response, request.headers.get('Accept-Encoding'))
+
+def warm_caches(preload_menus=False):
+    """Preload in-memory indexes so the first requests don't pay for it"""
+    conn = pool.acquire()
+    try:
+        price_index.load(conn)
+        recommender.build(conn)
+        assets.load()
+        if preload_menus:
+            cafes = menu_cache.get('cafes', lambda: load_menu_cafes(conn))
+            for cafe in json.loads(cafes.body)['cafes']:
+                menu_cache.get(('items', cafe['id']), lambda: load_menu_items(conn, cafe['id']))
+    finally:
+        pool.release(conn)
+
+def load_menu_cafes(conn):
+    """Payload of GET /api/menu/cafes"""
+    cursor = conn.cursor()
+    cursor.execute('SELECT * FROM cafes WHERE status = "active"')
+    return {'success': True, 'cafes': encode_rows(cursor)}
+
+def load_menu_items(conn, cafe_id):
+    """Payload of GET /api/menu/cafes/<cafe_id>/items"""
+    cursor = conn.cursor()
+    cursor.execute('SELECT * FROM menu_items WHERE cafe_id = ? AND available = 1', (cafe_id,))
+    items = encode_rows(cursor, extra=lambda item: {'image_variants': assets.urls_for(item['image_url'])})
+    payload = {'success': True, 'items': items}
+    if items.text == '[]':
+        # Don't let requests for made-up cafe ids fill the cache
+        cursor.execute('SELECT 1 FROM cafes WHERE id = ?', (cafe_id,))
+        if cursor.fetchone() is None:
+            return Uncached(payload)
+    return payload
+
+def price_order(payload):
+    """Validate an order payload and price it from the menu (raises ValueError)"""
+    order = prepare_order(payload)
+    if price_index.stale:
+        with borrow_db() as conn:
+            price_index.load(conn)
+    return price_index.price_order(order)
+
+def cached_menu_response(key, loader):
+    """Serve a menu payload from the cache, answering 304 on an ETag match"""
+    entry = menu_cache.get(key, loader)
+    encoding, body = entry.select(request.headers.get('Accept-Encoding'))
+    headers = {'ETag': f'"{entry.etag_for(encoding)}"', 'Cache-Control': MENU_CACHE_CONTROL,
+               'Vary': 'Accept-Encoding'}
+    if entry.matches(request.if_none_match):
+        menu_cache.record_not_modified()
+        return Response(status=304, headers=headers)
+    if encoding:
+        headers['Content-Encoding'] = encoding
+    return Response(body, mimetype='application/json', headers=headers)
+
+def order_export_response(*roles):
+    """Stream orders joined with their items, menu items and cafes as CSV or NDJSON to ``roles``"""
+    # Checked before the export takes a pooled connection
+    require_role(*roles)
+    try:
+        export_format, start, end, cafe_id = parse_filters(request.args)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    export = OrderExport(pool, export_format, start, end, cafe_id)
+    filename = export_filename(export_format, start, end, cafe_id)
+    # The request context stays open while streaming so SQL metrics keep the route label
+    response = Response(stream_with_context(iter(export)), mimetype=FORMATS[export_format], headers={
+        'Content-Disposition': f'attachment; filename="{filename}"',
+        'Cache-Control': 'no-store'
+    })
+    # Covers clients that disconnect before the generator starts
+    response.call_on_close(export.close)
+    return response
+
+def notification_inbox_response(to_role):
+    """One keyset page of ``to_role``'s inbox with its unread count (?cafe_id=&limit=&before=)"""
+    try:
+        cafe_id = int(request.args['cafe_id']) if request.args.get('cafe_id') else None
+        before = int(request.args['before']) if request.args.get('before') else None
+        limit = int(request.args.get('limit', DEFAULT_INBOX_SIZE))
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Invalid pagination parameters'}), 400
+    limit = max(1, min(limit, MAX_INBOX_SIZE))
+    
+    conn = get_db()
+    notifications, next_cursor = load_inbox(conn, to_role, cafe_id, before, limit)
+    return json_response({'success': True, 'notifications': notifications,
+                          'unread': count_unread(conn, to_role, cafe_id), 'next_cursor': next_cursor})
+
+def mark_inbox_read(to_role):
+    """Mark ``to_role``'s unread notifications read, optionally only one cafe's and up to an id"""
+    data = request.json or {}
+    try:
+        cafe_id = int(data['cafe_id']) if data.get('cafe_id') is not None else None
+        up_to = int(data['up_to']) if data.get('up_to') is not None else None
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'message': 'cafe_id and up_to must be integers'}), 400
+    
+    conn = get_db()
+    marked = mark_read(conn, to_role, cafe_id, up_to)
+    return jsonify({'success': True, 'marked': marked, 'unread': count_unread(conn, to_role, cafe_id)})
+
+def stream_session(args, headers):
+    """The session of a stream request, or None if it sent no token (raises InvalidToken).
+
+    Browsers' EventSource can't set headers, so the token may also come as
+    the ``token`` query parameter.
+    """
+    return resolve_session(bearer_token(headers) or args.get('token'))
+
+def parse_stream_request(args, headers, session):
+    """Return ``(topics, last_event_id)`` for a stream request (raises ValueError).
+
+    Every stream needs a session (else InvalidToken). ``user_id`` and
+    ``role`` streams need that user's or role's session (else
+    SessionMismatch), and ``cafe_id`` streams, which carry every order at
+    the cafe, a role in CAFE_STREAM_ROLES (else NotPermitted). Admins may
+    stream anything.
+    """
+    topics = []
+    if args.get('user_id'):
+        topics.append(f"user:{args['user_id']}")
+    if args.get('role'):
+        topics.append(f"role:{args['role']}")
+    if args.get('cafe_id'):
+        topics.append(f"cafe:{args['cafe_id']}")
+    if not topics:
+        raise ValueError('user_id, role or cafe_id required')
+    
+    if session is None:
+        raise InvalidToken('Sign in to stream events')
+    if session.role != 'admin':
+        if (args.get('user_id') not in (None, '', str(session.user_id))
+                or args.get('role') not in (None, '', session.role)):
+            raise SessionMismatch('Session may not stream these events')
+        if args.get('cafe_id'):
+            check_role(session, CAFE_STREAM_ROLES)
+    
+    last_event_id = headers.get('Last-Event-ID') or args.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        raise ValueError('Invalid Last-Event-ID')
+    return topics, last_event_id
+
+def parse_queue_poll(args):
+    """Return ``(wait_seconds, after)`` for a cafe queue request (raises ValueError).
+
+    ``wait_seconds`` is 0, meaning answer at once, unless the client sent
+    both ``wait`` and the ``after`` cursor of its previous response.
+    """
+    try:
+        wait = min(float(args.get('wait') or 0), MAX_QUEUE_WAIT)
+        after = int(args['after']) if args.get('after') else None
+    except ValueError:
+        raise ValueError('wait must be a number of seconds and after a queue cursor')
+    if after is None or not wait > 0:
+        return 0, after
+    return wait, after
 
 def hash_password(password):
-    """Hash password using SHA256"""
-    return hashlib.sha256(password.encode()).hexdigest()
+    """Hash password with salted scrypt on the hashing pool"""
+    return password_hasher.hash(password)
 
 # API Routes - Authentication
 @app.route('/api/auth/login', methods=['POST'])
@@ -172,23 +531,26 @@ def login():
     conn = get_db()
     cursor = conn.cursor()
     
-    password_hash = hash_password(password)
-    cursor.execute('SELECT * FROM users WHERE email = ? AND password = ?', (email, password_hash))
+    cursor.execute('SELECT * FROM users WHERE email = ?', (email,))
     user = cursor.fetchone()
+    valid, needs_rehash = password_hasher.verify(password, user['password'] if user else None)
     
-    if user:
+    if valid:
+        if needs_rehash:
+            # Upgrade legacy SHA-256 (or outdated scrypt) hashes while we know the password
+            cursor.execute('UPDATE users SET password = ? WHERE id = ?', (hash_password(password), user['id']))
+            conn.commit()
         user_dict = {
             'id': user['id'],
             'name': user['name'],
             'email': user['email'],
             'role': user['role'],
             'student_id': user['student_id'],
-            'phone': user['phone']
+            'phone': user['phone'],
+            'token': sessions.issue(user)
         }
-        conn.close()
         return jsonify({'success': True, 'user': user_dict})
     else:
-        conn.close()
         return jsonify({'success': False, 'message': 'Invalid email or password'}), 401
 
 @app.route('/api/auth/signup', methods=['POST'])
@@ -210,7 +572,6 @@ def signup():
     # Check if email already exists
     cursor.execute('SELECT * FROM users WHERE email = ?', (email,))
     if cursor.fetchone():
-        conn.close()
         return jsonify({'success': False, 'message': 'Email already exists'}), 400
     
     # Insert new user
@@ -221,20 +582,42 @@ def signup():
     ''', (name, email, password_hash, student_id, phone, 'user'))
     
     conn.commit()
-    conn.close()
     
     return jsonify({'success': True, 'message': 'Account created successfully'})
 
 @app.route('/api/auth/logout', methods=['POST'])
 def logout():
     """User logout"""
+    token = bearer_token(request.headers)
+    if token:
+        try:
+            user_id, expires_at, session_id = sessions.parse(token)
+        except InvalidToken:
+            # Already unusable; nothing to revoke
+            return jsonify({'success': True, 'message': 'Logged out successfully'})
+        
+        # Other workers consult revoked_sessions when they next re-check the token
+        conn = get_db()
+        cursor = conn.cursor()
+        cursor.execute('DELETE FROM revoked_sessions WHERE expires_at <= ?', (int(time.time()),))
+        cursor.execute('INSERT OR IGNORE INTO revoked_sessions (session_id, user_id, expires_at) VALUES (?, ?, ?)',
+                       (session_id, user_id, expires_at))
+        conn.commit()
+        sessions.revoke(session_id)
+    
     return jsonify({'success': True, 'message': 'Logged out successfully'})
 
 # API Routes - User
 @app.route('/api/user/profile', methods=['GET'])
 def get_profile():
     """Get user profile"""
-    user_id = request.args.get('user_id')
+    session = current_session()
+    if session is not None:
+        # Served from the session cache, no database read
+        acting_user_id(request.args.get('user_id'))
+        return jsonify({'success': True, 'user': session.profile})
+    
+    user_id = acting_user_id(request.args.get('user_id'))
     if not user_id:
         return jsonify({'success': False, 'message': 'User ID required'}), 400
     
@@ -242,7 +625,6 @@ def get_profile():
     cursor = conn.cursor()
     cursor.execute('SELECT * FROM users WHERE id = ?', (user_id,))
     user = cursor.fetchone()
-    conn.close()
     
     if user:
         user_dict = {
@@ -261,7 +643,7 @@ def get_profile():
 def update_profile():
     """Update user profile"""
     data = request.json
-    user_id = data.get('user_id')
+    user_id = acting_user_id(data.get('user_id'))
     email = data.get('email')
     phone = data.get('phone')
     address = data.get('address')
@@ -295,155 +677,151 @@ def update_profile():
         query = f"UPDATE users SET {', '.join(update_fields)} WHERE id = ?"
         cursor.execute(query, update_values)
         conn.commit()
+        if cursor.rowcount:
+            # Cached sessions hold the old profile
+            sessions.invalidate_user(int(user_id))
     
-    conn.close()
     return jsonify({'success': True, 'message': 'Profile updated successfully'})
 
 @app.route('/api/user/orders', methods=['GET'])
 def get_user_orders():
-    """Get user order history"""
-    user_id = request.args.get('user_id')
+    """Get user order history, one keyset page at a time"""
+    user_id = acting_user_id(request.args.get('user_id'))
     if not user_id:
         return jsonify({'success': False, 'message': 'User ID required'}), 400
     
-    conn = get_db()
-    cursor = conn.cursor()
+    try:
+        after = parse_cursor(request.args.get('after'))
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Invalid pagination parameters'}), 400
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
     
-    # Use LEFT JOIN in case cafe doesn't exist (for new installations)
-    cursor.execute('''
-        SELECT o.*, COALESCE(c.name, 'Unknown Cafe') as cafe_name
-        FROM orders o
-        LEFT JOIN cafes c ON o.cafe_id = c.id
-        WHERE o.user_id = ?
-        ORDER BY o.created_at DESC
-    ''', (user_id,))
-    
-    orders = cursor.fetchall()
-    order_list = []
-    
-    for order in orders:
-        # Get order items
-        cursor.execute('''
-            SELECT oi.*, mi.name as item_name
-            FROM order_items oi
-            JOIN menu_items mi ON oi.menu_item_id = mi.id
-            WHERE oi.order_id = ?
-        ''', (order['id'],))
-        
-        items = cursor.fetchall()
-        order_dict = {
-            'id': order['id'],
-            'cafe_name': order['cafe_name'],
-            'total_amount': order['total_amount'],
-            'status': order['status'],
-            'created_at': order['created_at'],
-            'delivery_address': order.get('delivery_address', ''),
-            'contact_number': order.get('contact_number', ''),
-            'payment_method': order.get('payment_method', 'cash'),
-            'jazzcash_tid': order.get('jazzcash_tid', ''),
-            'items': [{'name': item['item_name'], 'quantity': item['quantity'], 'price': item['price']} for item in items]
-        }
-        order_list.append(order_dict)
+    conn = get_db()
+    order_list, next_cursor = load_order_history(conn, user_id, after, limit)
     
-    conn.close()
-    return jsonify({'success': True, 'orders': order_list})
+    return jsonify({'success': True, 'orders': order_list, 'next_cursor': next_cursor})
 
 @app.route('/api/user/orders', methods=['POST'])
 def place_order():
     """Place a new order"""
-    data = request.json
-    user_id = data.get('user_id')
-    cafe_id = data.get('cafe_id')
-    items = data.get('items')
-    total_amount = data.get('total_amount', 0)
-    delivery_address = data.get('delivery_address')
-    contact_number = data.get('contact_number')
-    payment_method = data.get('payment_method', 'cash')
-    jazzcash_tid = data.get('jazzcash_tid')
+    payload = request.json
+    if isinstance(payload, dict):
+        payload = dict(payload, user_id=acting_user_id(payload.get('user_id')))
+    try:
+        order = price_order(payload)
+    except ValueError as error:
+        return jsonify({'success': False, 'message': str(error)}), 400
+    
+    if order_writer is not None:
+        # Group commit: the writer thread batches this with concurrent orders
+        future = order_writer.submit(order)
+        try:
+            order_id = future.result(timeout=GROUP_COMMIT_TIMEOUT)
+        except FutureTimeout:
+            # Only a still-queued order can be withdrawn; one already being
+            # written must be answered, or a retry would place it twice
+            if future.cancel():
+                return jsonify({'success': False, 'message': 'Server busy, please retry'}), 503, {'Retry-After': '1'}
+            order_id = future.result()
+    else:
+        conn = get_db()
+        order_id = insert_orders(conn.cursor(), [order])[0]
+        conn.commit()
+        refresh_recommendations(conn)
+    publish_order(order_id, order)
     
-    if not all([user_id, cafe_id, items]):
-        return jsonify({'success': False, 'message': 'Missing required fields'}), 400
+    return jsonify({'success': True, 'message': 'Order placed successfully', 'order_id': order_id,
+                    'total_amount': order['total_amount']})
+
+@app.route('/api/user/orders/batch', methods=['POST'])
+def place_orders_batch():
+    """Place many orders in one transaction (kiosks)"""
+    data = request.json or {}
+    payloads = data.get('orders')
+    if not isinstance(payloads, list) or not payloads:
+        return jsonify({'success': False, 'message': 'Orders list required'}), 400
+    if len(payloads) > MAX_BATCH_ORDERS:
+        return jsonify({'success': False, 'message': f'At most {MAX_BATCH_ORDERS} orders per batch'}), 400
+    
+    orders = []
+    for index, payload in enumerate(payloads):
+        try:
+            if isinstance(payload, dict):
+                # Admin kiosks may place orders for other users
+                payload = dict(payload, user_id=acting_user_id(payload.get('user_id'), allow_admin=True))
+            orders.append(price_order(payload))
+        except ValueError as error:
+            return jsonify({'success': False, 'message': f'Order {index}: {error}'}), 400
     
     conn = get_db()
-    cursor = conn.cursor()
-    
-    # Calculate total if not provided
-    if not total_amount:
-        total = 0
-        for item in items:
-            menu_item_id = item.get('menu_item_id')
-            quantity = item.get('quantity', 1)
-            price = item.get('price', 0)
-            total += float(price) * int(quantity)
-        total_amount = total
-    
-    # Create order with payment info
-    cursor.execute('''
-        INSERT INTO orders (user_id, cafe_id, total_amount, status, delivery_address, contact_number, payment_method, jazzcash_tid)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    ''', (user_id, cafe_id, total_amount, 'pending', delivery_address, contact_number, payment_method, jazzcash_tid))
-    
-    order_id = cursor.lastrowid
-    
-    # Create order items
-    for item in items:
-        menu_item_id = item.get('menu_item_id')
-        quantity = item.get('quantity', 1)
-        price = item.get('price', 0)
-        
-        cursor.execute('''
-            INSERT INTO order_items (order_id, menu_item_id, quantity, price)
-            VALUES (?, ?, ?, ?)
-        ''', (order_id, menu_item_id, quantity, price))
-    
+    order_ids = insert_orders(conn.cursor(), orders)
     conn.commit()
-    conn.close()
+    refresh_recommendations(conn)
+    for order_id, order in zip(order_ids, orders):
+        publish_order(order_id, order)
     
-    return jsonify({'success': True, 'message': 'Order placed successfully', 'order_id': order_id})
+    return jsonify({'success': True, 'message': f'{len(order_ids)} orders placed successfully', 'order_ids': order_ids})
+
+@app.route('/api/user/orders/writer-stats', methods=['GET'])
+def order_writer_stats():
+    """Get group-commit writer statistics"""
+    if order_writer is None:
+        return jsonify({'success': True, 'enabled': False})
+    return jsonify({'success': True, 'enabled': True, 'writer': order_writer.stats()})
 
 # API Routes - Admin
 @app.route('/api/admin/dashboard', methods=['GET'])
 def admin_dashboard():
     """Get admin dashboard data"""
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    # Get statistics
-    cursor.execute('SELECT COUNT(*) as count FROM users WHERE role = "user"')
-    user_count = cursor.fetchone()['count']
-    
-    cursor.execute('SELECT COUNT(*) as count FROM cafes')
-    cafe_count = cursor.fetchone()['count']
-    
-    cursor.execute('SELECT COUNT(*) as count FROM orders')
-    order_count = cursor.fetchone()['count']
-    
-    cursor.execute('SELECT COUNT(*) as count FROM orders WHERE status = "pending"')
-    pending_orders = cursor.fetchone()['count']
-    
-    conn.close()
+    # Counters are maintained by triggers (see stats.py), so no COUNT(*) scans
+    counters = read_counters(get_db(), ['users:role:user', 'cafes', 'orders', 'orders:status:pending'])
     
     return jsonify({
         'success': True,
         'stats': {
-            'users': user_count,
-            'cafes': cafe_count,
-            'orders': order_count,
-            'pending_orders': pending_orders
+            'users': counters['users:role:user'],
+            'cafes': counters['cafes'],
+            'orders': counters['orders'],
+            'pending_orders': counters['orders:status:pending']
         }
     })
 
+@app.route('/api/admin/stats/reconcile', methods=['POST'])
+def reconcile_stats():
+    """Check dashboard counters against real counts, fixing drift if asked"""
+    data = request.get_json(silent=True) or {}
+    drift = reconcile(get_db(), fix=bool(data.get('fix')))
+    return jsonify({
+        'success': True,
+        'fixed': bool(data.get('fix')),
+        'drift': [{'name': name, 'counter': actual, 'actual': expected} for name, actual, expected in drift]
+    })
+
+@app.route('/api/admin/analytics', methods=['GET'])
+def admin_analytics():
+    """Get daily revenue per cafe, top items and the order status funnel"""
+    try:
+        start, end = parse_range(request.args)
+        cafe_id = int(request.args['cafe_id']) if request.args.get('cafe_id') else None
+        top = max(1, min(int(request.args.get('top', DEFAULT_TOP_ITEMS)), MAX_TOP_ITEMS))
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    conn = get_db()
+    # Fold orders placed since the last call; only rows above the high-water mark are read
+    refresh_rollups(conn)
+    analytics = load_analytics(conn, start, end, cafe_id, top)
+    
+    return jsonify({'success': True, 'analytics': analytics})
+
 @app.route('/api/admin/cafes', methods=['GET'])
 def get_cafes():
     """Get all cafes"""
     conn = get_db()
     cursor = conn.cursor()
     cursor.execute('SELECT * FROM cafes ORDER BY created_at DESC')
-    cafes = cursor.fetchall()
-    conn.close()
-    
-    cafe_list = [dict(cafe) for cafe in cafes]
-    return jsonify({'success': True, 'cafes': cafe_list})
+    return json_response({'success': True, 'cafes': encode_rows(cursor)})
 
 @app.route('/api/admin/cafes', methods=['POST'])
 def create_cafe():
@@ -465,10 +843,68 @@ def create_cafe():
     ''', (name, description, location))
     
     conn.commit()
-    conn.close()
+    invalidate_menu()
     
     return jsonify({'success': True, 'message': 'Cafe created successfully'})
 
+@app.route('/api/_metrics', methods=['GET'])
+def prometheus_metrics():
+    """Export request and SQL metrics in Prometheus text format"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/admin/db-pool', methods=['GET'])
+def db_pool_stats():
+    """Get database connection pool statistics"""
+    return jsonify({'success': True, 'pool': pool.stats()})
+
+@app.route('/api/admin/orders/<int:order_id>', methods=['PUT'])
+def update_order_status(order_id):
+    """Move an order along pending -> preparing -> ready -> delivered, or cancel it"""
+    require_role(*STAFF_ROLES)
+    data = request.json or {}
+    status = data.get('status')
+    if status not in STATUS_TIMESTAMPS:
+        return jsonify({'success': False, 'message': f"Status must be one of: {', '.join(STATUS_TIMESTAMPS)}"}), 400
+    
+    try:
+        order = advance_order(get_db(), order_id, status)
+    except InvalidTransition as e:
+        return jsonify({'success': False, 'message': str(e)}), 409
+    if order is None:
+        return jsonify({'success': False, 'message': 'Order not found'}), 404
+    publish_order(order['id'], dict(order))
+    
+    return jsonify({'success': True, 'message': f'Order marked {status}', 'order': dict(order)})
+
+@app.route('/api/admin/cafes/<int:cafe_id>/queue', methods=['GET'])
+def get_cafe_queue(cafe_id):
+    """Get a cafe's active orders, oldest first (?wait=<seconds>&after=<cursor> long-polls for a change)"""
+    require_role(*STAFF_ROLES)
+    try:
+        parse_queue_poll(request.args)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    # Read the cursor first: a change racing with the query then wakes the next poll
+    cursor = event_hub.last_event_id()
+    orders = load_cafe_queue(get_db(), cafe_id)
+    return jsonify({'success': True, 'orders': orders, 'cursor': cursor})
+
+@app.route('/api/admin/notifications', methods=['GET'])
+def get_admin_notifications():
+    """Get the admin inbox (?cafe_id=&limit=&before=<cursor>)"""
+    return notification_inbox_response('admin')
+
+@app.route('/api/admin/notifications/read', methods=['POST'])
+def mark_admin_notifications_read():
+    """Mark admin notifications read (``{"cafe_id": , "up_to": <id>}``, both optional)"""
+    return mark_inbox_read('admin')
+
+@app.route('/api/admin/exports/orders', methods=['GET'])
+def admin_export_orders():
+    """Export orders for admins (?format=csv|ndjson&from=&to=&cafe_id=)"""
+    return order_export_response('admin')
+
 # API Routes - Food Authority
 @app.route('/api/food-authority/dashboard', methods=['GET'])
 def food_authority_dashboard():
@@ -477,97 +913,169 @@ def food_authority_dashboard():
     cursor = conn.cursor()
     
     cursor.execute('''
-        SELECT c.*, 
-               (SELECT COUNT(*) FROM menu_items WHERE cafe_id = c.id) as menu_count
+        SELECT c.*, COALESCE(s.value, 0) as menu_count
         FROM cafes c
+        LEFT JOIN stats_counters s ON s.name = 'menu_items:cafe:' || c.id
     ''')
-    cafes = cursor.fetchall()
-    conn.close()
-    
-    cafe_list = [dict(cafe) for cafe in cafes]
-    return jsonify({'success': True, 'cafes': cafe_list})
+    return json_response({'success': True, 'cafes': encode_rows(cursor)})
 
 @app.route('/api/food-authority/notifications', methods=['POST'])
 def send_notification():
-    """Send notification from food authority"""
+    """Send notification from food authority (to one cafe, or ``cafe_ids``: a list or "all")"""
     data = request.json
     cafe_id = data.get('cafe_id')
+    cafe_ids = data.get('cafe_ids')
     subject = data.get('subject')
     message = data.get('message')
     
     if not all([subject, message]):
         return jsonify({'success': False, 'message': 'Subject and message are required'}), 400
+    if cafe_ids is not None and cafe_ids != 'all':
+        if (not isinstance(cafe_ids, list) or not cafe_ids or len(cafe_ids) > MAX_FANOUT_CAFES
+                or not all(isinstance(target, int) for target in cafe_ids)):
+            return jsonify({'success': False,
+                            'message': f'cafe_ids must be "all" or a list of at most {MAX_FANOUT_CAFES} cafe ids'}), 400
     
     conn = get_db()
     cursor = conn.cursor()
     
-    cursor.execute('''
-        INSERT INTO notifications (from_role, to_role, cafe_id, subject, message)
-        VALUES (?, ?, ?, ?, ?)
-    ''', ('food_authority', 'admin', cafe_id, subject, message))
+    if cafe_ids is None:
+        cursor.execute('''
+            INSERT INTO notifications (from_role, to_role, cafe_id, subject, message)
+            VALUES (?, ?, ?, ?, ?)
+        ''', ('food_authority', 'admin', cafe_id, subject, message))
+        sent = [(cursor.lastrowid, cafe_id)]
+    else:
+        # Fan-out: one INSERT ... SELECT for every targeted cafe
+        sent = send_notifications(cursor, 'food_authority', 'admin', cafe_ids, subject, message)
     
     conn.commit()
-    conn.close()
     
-    return jsonify({'success': True, 'message': 'Notification sent successfully'})
+    for notification_id, target in sent:
+        topics = ['role:admin'] + ([f'cafe:{target}'] if target else [])
+        event_hub.publish('notification', topics, {
+            'id': notification_id,
+            'from_role': 'food_authority',
+            'to_role': 'admin',
+            'cafe_id': target,
+            'subject': subject,
+            'message': message,
+            'read': 0
+        })
+    
+    message = 'Notification sent successfully' if cafe_ids is None else f'Notification sent to {len(sent)} cafes'
+    return jsonify({'success': True, 'message': message,
+                    'notification_ids': [notification_id for notification_id, _ in sent]})
+
+@app.route('/api/food-authority/notifications', methods=['GET'])
+def get_food_authority_notifications():
+    """Get the food authority's inbox (?cafe_id=&limit=&before=<cursor>)"""
+    return notification_inbox_response('food_authority')
+
+@app.route('/api/food-authority/notifications/read', methods=['POST'])
+def mark_food_authority_notifications_read():
+    """Mark the food authority's notifications read (``{"cafe_id": , "up_to": <id>}``, both optional)"""
+    return mark_inbox_read('food_authority')
+
+@app.route('/api/food-authority/exports/orders', methods=['GET'])
+def food_authority_export_orders():
+    """Export orders for the food authority (?format=csv|ndjson&from=&to=&cafe_id=)"""
+    return order_export_response('food_authority', 'admin')
 
 # API Routes - Menu & Recommendations
 @app.route('/api/menu/cafes', methods=['GET'])
 def get_menu_cafes():
     """Get cafes with menu"""
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    cursor.execute('SELECT * FROM cafes WHERE status = "active"')
-    cafes = cursor.fetchall()
-    conn.close()
-    
-    cafe_list = [dict(cafe) for cafe in cafes]
-    return jsonify({'success': True, 'cafes': cafe_list})
+    return cached_menu_response('cafes', lambda: load_menu_cafes(get_db()))
 
 @app.route('/api/menu/cafes/<int:cafe_id>/items', methods=['GET'])
 def get_menu_items(cafe_id):
     """Get menu items for a cafe"""
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    cursor.execute('SELECT * FROM menu_items WHERE cafe_id = ? AND available = 1', (cafe_id,))
-    items = cursor.fetchall()
-    conn.close()
+    return cached_menu_response(('items', cafe_id), lambda: load_menu_items(get_db(), cafe_id))
+
+@app.route('/api/menu/search', methods=['GET'])
+def search_menu_items():
+    """Search menu items by text with category, cafe and price filters"""
+    args = request.args
+    try:
+        cafe_id = int(args['cafe_id']) if args.get('cafe_id') else None
+        min_price = float(args['min_price']) if args.get('min_price') else None
+        max_price = float(args['max_price']) if args.get('max_price') else None
+        page = max(1, int(args.get('page', 1)))
+        limit = max(1, min(int(args.get('limit', DEFAULT_SEARCH_LIMIT)), MAX_SEARCH_LIMIT))
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Invalid search parameters'}), 400
+    
+    try:
+        items, has_more = search_menu(get_db(), args.get('q'), args.get('category') or None, cafe_id,
+                                      min_price, max_price, args.get('sort'), page, limit)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
     
-    item_list = [dict(item) for item in items]
-    return jsonify({'success': True, 'items': item_list})
+    for item in items:
+        item['image_variants'] = assets.urls_for(item['image_url'])
+    return jsonify({'success': True, 'items': items, 'page': page, 'limit': limit, 'has_more': has_more})
+
+@app.route('/api/menu/cache-stats', methods=['GET'])
+def menu_cache_stats():
+    """Get menu cache hit/miss counters"""
+    return jsonify({'success': True, 'cache': menu_cache.stats()})
+
+@app.route('/api/images/<file_name>', methods=['GET'])
+def get_image(file_name):
+    """Serve a menu image or resized variant by its content-hashed name"""
+    asset = assets.get(file_name)
+    if asset is None:
+        return jsonify({'success': False, 'message': 'Image not found'}), 404
+    
+    response = Response(asset.data, mimetype=asset.content_type)
+    response.set_etag(asset.etag)
+    response.last_modified = asset.mtime
+    response.headers['Cache-Control'] = ASSET_CACHE_CONTROL
+    response.headers['Accept-Ranges'] = 'bytes'
+    # Answers If-None-Match / If-Modified-Since with 304 and Range with 206
+    return response.make_conditional(request, accept_ranges=True, complete_length=len(asset.data))
+
+@app.route('/api/images/stats', methods=['GET'])
+def image_stats():
+    """Get image store counters"""
+    return jsonify({'success': True, 'images': assets.stats()})
 
 @app.route('/api/menu/recommendations/<int:user_id>', methods=['GET'])
 def get_recommendations(user_id):
     """Get AI-based recommendations for user"""
-    conn = get_db()
-    cursor = conn.cursor()
+    if not recommender.ready:
+        recommender.build(get_db())
     
-    # Simple recommendation: get most popular items
-    cursor.execute('''
-        SELECT mi.*, 
-               COUNT(oi.id) as order_count,
-               AVG(up.rating) as avg_rating
-        FROM menu_items mi
-        LEFT JOIN order_items oi ON mi.id = oi.menu_item_id
-        LEFT JOIN user_preferences up ON mi.id = up.menu_item_id AND up.user_id = ?
-        WHERE mi.available = 1
-        GROUP BY mi.id
-        ORDER BY order_count DESC, avg_rating DESC
-        LIMIT 5
-    ''', (user_id,))
-    
-    items = cursor.fetchall()
-    conn.close()
-    
-    item_list = [dict(item) for item in items]
+    item_list = recommender.recommend(user_id)
     return jsonify({'success': True, 'recommendations': item_list})
 
+# API Routes - Live updates
+@app.route('/api/stream', methods=['GET'])
+def event_stream():
+    """Stream order and notification changes as Server-Sent Events"""
+    try:
+        topics, last_event_id = parse_stream_request(request.args, request.headers,
+                                                     stream_session(request.args, request.headers))
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    try:
+        subscription, replay = event_hub.subscribe(topics, last_event_id)
+    except StreamLimitReached:
+        return jsonify({'success': False, 'message': 'Too many open streams'}), 503, {'Retry-After': '5'}
+    
+    response = Response(event_hub.stream(subscription, replay), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    # Unsubscribe even if the client goes away before the stream starts
+    response.call_on_close(subscription.close)
+    return response
+
 # Add sample data if tables are empty
 def add_sample_data():
     """Add sample cafes and menu items for testing"""
-    conn = get_db()
+    conn = sqlite3.connect(DB_NAME)
+    conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
     
     # Check if cafes exist
@@ -606,6 +1114,7 @@ def add_sample_data():
 if __name__ == '__main__':
     init_db()
     add_sample_data()  # Add sample data for testing
+    warm_caches()
     print("=" * 50)
     print("Smart Cafe Management System - Backend Server")
     print("=" * 50)
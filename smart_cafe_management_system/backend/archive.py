@@ -0,0 +1,101 @@
+"""
+Smart Cafe Management System - Order Archive
+Moves old delivered and cancelled orders, with their items, out of the live
+tables into archived_orders / archived_order_items in small batches.
+
+Usage:
+    python archive.py [--days 90]
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+
+from rollups import refresh_rollups, rollup_mark
+
+# Archival configuration (overridable from the environment)
+ARCHIVE_AFTER_DAYS = int(os.environ.get('SMART_CAFE_ARCHIVE_DAYS', 90))
+ARCHIVE_BATCH_SIZE = int(os.environ.get('SMART_CAFE_ARCHIVE_BATCH', 500))
+
+# Pause between batches so queued writers get the lock
+ARCHIVE_PAUSE = 0.05
+
+# Orders in these states never change again
+TERMINAL_STATUSES = ('delivered', 'cancelled')
+
+
+def shared_columns(conn, table, archive_table):
+    """Columns present in both a live table and its archive, as a SQL list"""
+    archived = {row[1] for row in conn.execute(f'PRAGMA table_info({archive_table})')}
+    return ', '.join(row[1] for row in conn.execute(f'PRAGMA table_info({table})') if row[1] in archived)
+
+
+def archive_orders(conn, days=ARCHIVE_AFTER_DAYS, batch_size=ARCHIVE_BATCH_SIZE, pause=ARCHIVE_PAUSE):
+    """Move finished orders older than ``days`` into the archive tables.
+
+    Each batch copies up to ``batch_size`` orders and their items and deletes
+    them from the live tables in one short transaction, then pauses so order
+    writes aren't starved. Only orders already folded into the sales rollups
+    are moved, so the rollups never need to read the archive. Returns the
+    number of orders archived.
+    """
+    refresh_rollups(conn)
+    mark = rollup_mark(conn)
+    order_columns = shared_columns(conn, 'orders', 'archived_orders')
+    item_columns = shared_columns(conn, 'order_items', 'archived_order_items')
+    statuses = ', '.join('?' * len(TERMINAL_STATUSES))
+
+    archived = 0
+    while True:
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            order_ids = [row[0] for row in conn.execute(f'''
+                SELECT id FROM orders
+                WHERE status IN ({statuses}) AND created_at < datetime('now', ?) AND id <= ?
+                LIMIT ?
+            ''', (*TERMINAL_STATUSES, f'-{int(days)} days', mark, batch_size))]
+            if not order_ids:
+                conn.rollback()
+                return archived
+            placeholders = ', '.join('?' * len(order_ids))
+            conn.execute(f'''
+                INSERT INTO archived_orders ({order_columns})
+                SELECT {order_columns} FROM orders WHERE id IN ({placeholders})
+            ''', order_ids)
+            conn.execute(f'''
+                INSERT INTO archived_order_items ({item_columns})
+                SELECT {item_columns} FROM order_items WHERE order_id IN ({placeholders})
+            ''', order_ids)
+            conn.execute(f'DELETE FROM order_items WHERE order_id IN ({placeholders})', order_ids)
+            conn.execute(f'DELETE FROM orders WHERE id IN ({placeholders})', order_ids)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        archived += len(order_ids)
+        time.sleep(pause)
+
+
+def main(argv):
+    from app import DB_NAME
+    from migrations import migrate
+
+    parser = argparse.ArgumentParser(description='Archive old delivered and cancelled orders')
+    parser.add_argument('--days', type=int, default=ARCHIVE_AFTER_DAYS, help='archive orders older than this')
+    parser.add_argument('--batch', type=int, default=ARCHIVE_BATCH_SIZE, help='orders moved per transaction')
+    args = parser.parse_args(argv)
+
+    migrate(DB_NAME)
+    conn = sqlite3.connect(DB_NAME)
+    try:
+        archived = archive_orders(conn, args.days, args.batch)
+        print(f'Archived {archived} orders older than {args.days} days')
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,464 @@
+"""
+Smart Cafe Management System - ASGI Entry Point
+Serves the Flask app under an ASGI server. Flask handlers (and the SQLite
+calls inside them) run on a bounded thread pool; cached menu reads and event
+streams are answered on the event loop without taking a thread.
+
+Usage:
+    python asgi.py                  # same as python launcher.py
+    uvicorn asgi:application
+"""
+
+import asyncio
+import contextvars
+import io
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, unquote_plus
+
+from flask_cors.core import get_cors_headers, get_cors_options, parse_resources, try_match
+from werkzeug.datastructures import Headers, MultiDict
+from werkzeug.exceptions import HTTPException
+from werkzeug.http import parse_etags
+
+import app as backend
+from admission import Shed
+from events import StreamLimitReached
+from metrics import metrics
+from responses import compact_json
+from sessions import InvalidToken, bearer_token
+
+# Threads running Flask handlers; more than the pooled connections would only
+# queue on the pool, so the default matches SMART_CAFE_POOL_SIZE
+DB_THREADS = int(os.environ.get('SMART_CAFE_DB_THREADS', backend.pool.max_size))
+MAX_BODY_BYTES = int(os.environ.get('SMART_CAFE_MAX_BODY', 1024 * 1024))
+# Response bytes collected per thread hop before handing them to the event loop
+CHUNK_BYTES = 64 * 1024
+
+MENU_ITEMS_PATH = re.compile(r'^/api/menu/cafes/(\d+)/items$')
+CAFE_QUEUE_PATH = re.compile(r'^/api/admin/cafes/(\d+)/queue$')
+
+
+def build_environ(scope, body):
+    """Translate an ASGI HTTP scope into a WSGI environ (PEP 3333)"""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for raw_name, raw_value in scope['headers']:
+        name = raw_name.decode('latin-1').upper().replace('-', '_')
+        value = raw_value.decode('latin-1')
+        if name == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value
+            continue
+        if name == 'CONTENT_LENGTH':
+            continue
+        key = f'HTTP_{name}'
+        environ[key] = f'{environ[key]},{value}' if key in environ else value
+    return environ
+
+
+def request_headers(scope):
+    """The request headers of an ASGI scope as a Werkzeug ``Headers``"""
+    return Headers([(name.decode('latin-1'), value.decode('latin-1')) for name, value in scope['headers']])
+
+
+def cors_resources(flask_app, options):
+    """Flask-CORS's ``(path pattern, options)`` list, built as ``CORS(flask_app, **options)`` builds it"""
+    options = get_cors_options(flask_app, options)
+    return [(pattern, get_cors_options(flask_app, options, resource_options))
+            for pattern, resource_options in parse_resources(options.get('resources'))]
+
+
+# The app's CORS configuration, so responses sent from the event loop get
+# exactly the headers Flask-CORS gives the ones Flask sends
+CORS_RESOURCES = cors_resources(backend.app, backend.CORS_OPTIONS)
+
+
+def cors_headers(scope, headers=None):
+    """The CORS headers Flask-CORS would add to the response to ``scope``"""
+    headers = headers if headers is not None else request_headers(scope)
+    path = unquote_plus(scope['path'])
+    for pattern, options in CORS_RESOURCES:
+        if try_match(path, pattern):
+            return list(get_cors_headers(options, headers, scope['method']).items(multi=True))
+    return []
+
+
+async def start_response(send, status, headers):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers],
+    })
+
+
+class ASGIApp:
+    """ASGI application wrapping the Flask WSGI app.
+
+    Every Flask request runs on a ``ThreadPoolExecutor`` of ``threads``
+    workers. Requests waiting for a thread wait on the event loop rather than
+    holding one, and response bodies are sent from the loop, so slow clients
+    do not pin threads. Cached menu payloads and ``/api/stream`` never touch
+    the pool at all.
+    """
+
+    def __init__(self, flask_app, threads=DB_THREADS, max_body=MAX_BODY_BYTES):
+        self.wsgi_app = flask_app
+        self.threads = threads
+        self.max_body = max_body
+        # Set by launcher.py when the schema and caches were prepared before forking
+        self.preloaded = False
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='smart-cafe')
+        self._lock = threading.Lock()
+        self._stats = {'offloaded': 0, 'fast_path': 0, 'streams': 0, 'long_polls': 0, 'in_flight': 0, 'waiting': 0}
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif scope['type'] == 'http':
+            if scope['method'] in ('GET', 'HEAD') and await self.try_fast_path(scope, send):
+                return
+            if scope['method'] == 'GET' and scope['path'] == '/api/stream':
+                await self.serve_stream(scope, receive, send)
+                return
+            await self.call_flask(scope, receive, send)
+        else:
+            raise ValueError(f"Unsupported ASGI scope type {scope['type']!r}")
+
+    async def lifespan(self, receive, send):
+        """Migrate and warm caches on startup unless preloaded; stop the pool on shutdown"""
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                try:
+                    if not self.preloaded:
+                        await self.run_blocking(startup)
+                except Exception as error:
+                    await send({'type': 'lifespan.startup.failed', 'message': str(error)})
+                    return
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                # Wait for in-flight handlers off the loop, so streams and
+                # held long-polls keep being served while they drain
+                await asyncio.get_running_loop().run_in_executor(None, lambda: self.executor.shutdown(wait=True))
+                backend.pool.close_all()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def run_blocking(self, function, *args, context=None):
+        """Run ``function`` on the bounded pool, in ``context`` if given"""
+        loop = asyncio.get_running_loop()
+        context = context or contextvars.copy_context()
+        with self._lock:
+            self._stats['waiting'] += 1
+
+        def call():
+            with self._lock:
+                self._stats['waiting'] -= 1
+                self._stats['in_flight'] += 1
+            try:
+                return context.run(function, *args)
+            finally:
+                with self._lock:
+                    self._stats['in_flight'] -= 1
+
+        return await loop.run_in_executor(self.executor, call)
+
+    async def try_fast_path(self, scope, send):
+        """Answer a cached menu request on the event loop; False if not cached"""
+        path = scope['path']
+        if path == '/api/menu/cafes':
+            key = 'cafes'
+        else:
+            match = MENU_ITEMS_PATH.match(path)
+            if not match:
+                return False
+            key = ('items', int(match.group(1)))
+        backend.sync_caches()
+        entry = backend.menu_cache.peek(key)
+        if entry is None:
+            return False
+
+        started = time.perf_counter()
+        headers = request_headers(scope)
+        encoding, body = entry.select(headers.get('Accept-Encoding'))
+        response_headers = [('ETag', f'"{entry.etag_for(encoding)}"'), ('Cache-Control', backend.MENU_CACHE_CONTROL),
+                            ('Vary', 'Accept-Encoding')]
+        response_headers += cors_headers(scope, headers)
+        if entry.matches(parse_etags(headers.get('If-None-Match'))):
+            backend.menu_cache.record_not_modified()
+            status, body = 304, b''
+        else:
+            status = 200
+            response_headers += [('Content-Type', 'application/json'), ('Content-Length', str(len(body)))]
+            if encoding:
+                response_headers.append(('Content-Encoding', encoding))
+        await start_response(send, status, response_headers)
+        await send({'type': 'http.response.body', 'body': body if scope['method'] == 'GET' else b''})
+
+        route = '/api/menu/cafes' if key == 'cafes' else '/api/menu/cafes/<int:cafe_id>/items'
+        metrics.observe_request(scope['method'], route, status, time.perf_counter() - started)
+        with self._lock:
+            self._stats['fast_path'] += 1
+        return True
+
+    async def serve_stream(self, scope, receive, send):
+        """Serve ``/api/stream`` as an async generator instead of a blocked thread"""
+        headers = request_headers(scope)
+        args = MultiDict(parse_qsl(scope['query_string'].decode('latin-1')))
+        try:
+            # Resolving the session may read the database on a cache miss
+            session = await self.run_blocking(backend.stream_session, args, headers)
+            topics, last_event_id = backend.parse_stream_request(args, headers, session)
+            subscription, replay = backend.event_hub.subscribe(topics, last_event_id)
+        except ValueError as error:
+            await self.send_json(send, scope, 400, {'success': False, 'message': str(error)})
+            return
+        except InvalidToken as error:
+            await self.send_json(send, scope, error.status, {'success': False, 'message': str(error)})
+            return
+        except StreamLimitReached:
+            await self.send_json(send, scope, 503, {'success': False, 'message': 'Too many open streams'},
+                                 [('Retry-After', '5')])
+            return
+
+        with self._lock:
+            self._stats['streams'] += 1
+        await start_response(send, 200, [('Content-Type', 'text/event-stream; charset=utf-8'),
+                                         ('Cache-Control', 'no-cache'), ('X-Accel-Buffering', 'no')]
+                             + cors_headers(scope, headers))
+        stream = backend.event_hub.astream(subscription, replay)
+        disconnected = asyncio.ensure_future(self.wait_for_disconnect(receive))
+        try:
+            while True:
+                next_chunk = asyncio.ensure_future(stream.__anext__())
+                await asyncio.wait([next_chunk, disconnected], return_when=asyncio.FIRST_COMPLETED)
+                if disconnected.done():
+                    next_chunk.cancel()
+                    # Let the generator unwind (and unsubscribe) before closing it
+                    await asyncio.gather(next_chunk, return_exceptions=True)
+                    break
+                try:
+                    chunk = next_chunk.result()
+                except StopAsyncIteration:
+                    break
+                await send({'type': 'http.response.body', 'body': chunk.encode('utf-8'), 'more_body': True})
+            if not disconnected.done():
+                await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            disconnected.cancel()
+            await stream.aclose()
+
+    async def wait_for_disconnect(self, receive):
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    async def send_json(self, send, scope, status, payload, extra_headers=()):
+        body = compact_json(payload)
+        await start_response(send, status, [('Content-Type', 'application/json'),
+                                            ('Content-Length', str(len(body)))]
+                             + list(extra_headers) + cors_headers(scope))
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def call_flask(self, scope, receive, send):
+        """Run the request through Flask on the thread pool and send its response"""
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+            body += message.get('body', b'')
+            if len(body) > self.max_body:
+                await self.send_json(send, scope, 413,
+                                     {'success': False, 'message': 'Request body too large'})
+                return
+            if not message.get('more_body'):
+                break
+
+        # One context for every hop, so streamed responses that keep the Flask
+        # request context open resume in the context they pushed it in
+        context = contextvars.copy_context()
+        environ = build_environ(scope, bytes(body))
+        if not await self.hold_long_poll(scope, send, environ):
+            return
+        ticket = await self.admit(scope, send, environ)
+        if ticket is False:
+            return
+        try:
+            with self._lock:
+                self._stats['offloaded'] += 1
+            status, headers, chunks, iterator = await self.run_blocking(self.begin_response, environ,
+                                                                        context=context)
+            try:
+                await start_response(send, status, headers)
+                while True:
+                    more = iterator is not None
+                    await send({'type': 'http.response.body', 'body': b''.join(chunks), 'more_body': more})
+                    if not more:
+                        break
+                    chunks, done = await self.run_blocking(self.read_chunks, iterator, context=context)
+                    if done:
+                        iterator = None
+            finally:
+                if iterator is not None:
+                    await self.run_blocking(iterator.close, context=context)
+        finally:
+            if ticket is not None:
+                backend.admission.release(ticket)
+
+    async def hold_long_poll(self, scope, send, environ):
+        """Hold a long-polling cafe queue request on the event loop until the queue changes.
+
+        Returns False after answering the request itself.
+        """
+        match = CAFE_QUEUE_PATH.match(scope['path'])
+        if scope['method'] != 'GET' or not match:
+            return True
+        try:
+            wait, after = backend.parse_queue_poll(MultiDict(parse_qsl(scope['query_string'].decode('latin-1'))))
+        except ValueError:
+            # Flask answers 400
+            return True
+        if wait:
+            try:
+                session = await self.run_blocking(backend.resolve_session, bearer_token(request_headers(scope)))
+                backend.check_role(session, backend.STAFF_ROLES)
+            except InvalidToken:
+                # Flask answers 401/403 without waiting
+                return True
+            try:
+                await backend.event_hub.await_event([f'cafe:{int(match.group(1))}'], after, wait)
+            except StreamLimitReached:
+                await self.send_json(send, scope, 503,
+                                     {'success': False, 'message': 'Too many open streams'}, [('Retry-After', '5')])
+                return False
+            with self._lock:
+                self._stats['long_polls'] += 1
+        # Tells the Flask hook not to wait again
+        environ['smart_cafe.waited'] = True
+        return True
+
+    async def admit(self, scope, send, environ):
+        """Wait on the event loop for an admission slot before taking a thread.
+
+        Returns the ticket to release (None when the request skips admission),
+        or False after answering a shed request with 429/503 itself.
+        """
+        if backend.admission is None:
+            return None
+        try:
+            rule, _ = backend.app.url_map.bind_to_environ(environ).match(return_rule=True)
+        except HTTPException:
+            # Let Flask answer 404/405
+            return None
+        lane = backend.admission_lane(rule.endpoint, environ)
+        if lane is None:
+            return None
+        started = time.perf_counter()
+        try:
+            ticket = await backend.admission.admit_async(*lane)
+        except Shed as error:
+            await self.send_json(send, scope, error.status,
+                                 {'success': False, 'message': str(error)},
+                                 [('Retry-After', str(error.retry_after))])
+            metrics.observe_request(scope['method'], rule.rule, error.status, time.perf_counter() - started)
+            return False
+        # Tells the Flask hook this request is already admitted
+        environ['smart_cafe.admission'] = ticket
+        return ticket
+
+    def begin_response(self, environ):
+        """Call Flask and read the start of the body (runs on the pool)"""
+        response = {}
+
+        def wsgi_start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = headers
+            return lambda data: response.setdefault('written', []).append(data)
+
+        iterator = WSGIBody(self.wsgi_app(environ, wsgi_start_response))
+        try:
+            chunks, done = self.read_chunks(iterator)
+        except Exception:
+            iterator.close()
+            raise
+        if 'status' not in response:
+            raise RuntimeError('WSGI app returned without calling start_response')
+        chunks = response.get('written', []) + chunks
+        return response['status'], response['headers'], chunks, None if done else iterator
+
+    def read_chunks(self, iterator):
+        """Pull up to CHUNK_BYTES of body; returns (chunks, finished)"""
+        chunks = []
+        size = 0
+        while size < CHUNK_BYTES:
+            try:
+                chunk = next(iterator.iterator)
+            except StopIteration:
+                iterator.close()
+                return chunks, True
+            if chunk:
+                chunks.append(chunk)
+                size += len(chunk)
+        return chunks, False
+
+    def stats(self):
+        """Thread pool and fast-path counters"""
+        with self._lock:
+            return dict(self._stats, threads=self.threads)
+
+
+class WSGIBody:
+    """A WSGI response iterable being read, closed exactly once"""
+
+    def __init__(self, app_iter):
+        self.app_iter = app_iter
+        self.iterator = iter(app_iter)
+        self.closed = False
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            if hasattr(self.app_iter, 'close'):
+                self.app_iter.close()
+
+
+def startup():
+    """Bring the schema up to date and preload in-memory indexes"""
+    backend.init_db()
+    backend.warm_caches()
+
+
+application = ASGIApp(backend.app)
+metrics.add_gauge_source('asgi', application.stats)
+
+
+def main():
+    # Multi-worker serving with one-time startup lives in the launcher
+    from launcher import main as launch
+    launch()
+
+
+if __name__ == '__main__':
+    main()
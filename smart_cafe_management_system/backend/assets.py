@@ -0,0 +1,189 @@
+"""
+Smart Cafe Management System - Image Assets
+In-memory store of the menu images with content-hashed URLs and resized
+variants generated once and cached on disk
+"""
+
+import hashlib
+import io
+import mimetypes
+import os
+import re
+import tempfile
+import threading
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional; without it only originals are served
+    Image = None
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Asset configuration (overridable from the environment)
+IMAGE_DIR = os.environ.get('SMART_CAFE_IMAGE_DIR',
+                           os.path.join(BACKEND_DIR, '..', 'frontend', 'public', 'images'))
+IMAGE_CACHE_DIR = os.environ.get('SMART_CAFE_IMAGE_CACHE', os.path.join(BACKEND_DIR, 'image_cache'))
+# Prefix for asset URLs, e.g. http://localhost:5000 when pages come from another origin
+ASSET_BASE_URL = os.environ.get('SMART_CAFE_ASSET_BASE', '').rstrip('/')
+
+VARIANT_WIDTHS = (160, 320, 640)
+JPEG_QUALITY = 82
+
+# Hashed URLs never change content, so browsers may keep them for a year
+ASSET_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+ASSET_NAME_PATTERN = re.compile(r'^(?P<stem>[\w-]+)\.(?P<digest>[0-9a-f]{12})(?:\.w(?P<width>\d+))?(?P<ext>\.\w+)$')
+
+
+class Asset:
+    """One servable image: bytes, content type, ETag and source mtime"""
+
+    __slots__ = ('data', 'content_type', 'etag', 'mtime')
+
+    def __init__(self, data, content_type, mtime):
+        self.data = data
+        self.content_type = content_type
+        self.etag = hashlib.sha1(data).hexdigest()
+        self.mtime = mtime
+
+
+class AssetStore:
+    """Holds every image and its variants in memory, keyed by URL file name.
+
+    ``load()`` reads the image directory once (the launcher does it before
+    forking, so workers share the bytes). An original is served as
+    ``<stem>.<digest>.<ext>`` where ``digest`` is a hash of its content, and
+    each variant narrower than the original as ``<stem>.<digest>.w<width>.<ext>``.
+    Variants are resized with Pillow the first time they are needed and
+    written to ``cache_dir``, so later starts read them from disk.
+    """
+
+    def __init__(self, image_dir=IMAGE_DIR, cache_dir=IMAGE_CACHE_DIR, base_url=ASSET_BASE_URL,
+                 widths=VARIANT_WIDTHS):
+        self.image_dir = image_dir
+        self.cache_dir = cache_dir
+        self.base_url = base_url
+        self.widths = widths
+        self._assets = {}
+        self._sources = {}
+        self._lock = threading.Lock()
+        self._stats = {'served': 0, 'not_found': 0, 'variants_built': 0, 'variants_loaded': 0}
+
+    def load(self):
+        """Read every image in ``image_dir`` and its variants into memory"""
+        self.forget_missing()
+        try:
+            names = sorted(os.listdir(self.image_dir))
+        except FileNotFoundError:
+            return
+        for name in names:
+            self._load_source(name)
+
+    def forget_missing(self):
+        """Drop remembered misses so names that now have a file are looked up again"""
+        with self._lock:
+            self._sources = {name: files for name, files in self._sources.items() if files is not None}
+
+    def _load_source(self, name, remember_miss=False):
+        """Load one original and its variants; returns {variant: URL file name} or None.
+
+        With ``remember_miss`` a name without an image file is remembered as
+        missing (until ``forget_missing()``), so it isn't looked up again.
+        """
+        with self._lock:
+            if name in self._sources:
+                return self._sources[name]
+        path = os.path.join(self.image_dir, name)
+        content_type = mimetypes.guess_type(name)[0]
+        if not content_type or not content_type.startswith('image/') or not os.path.isfile(path):
+            if remember_miss:
+                with self._lock:
+                    self._sources[name] = None
+            return None
+        with open(path, 'rb') as handle:
+            data = handle.read()
+        mtime = os.path.getmtime(path)
+        stem, ext = os.path.splitext(name)
+        digest = hashlib.sha256(data).hexdigest()[:12]
+
+        assets = {f'{stem}.{digest}{ext}': Asset(data, content_type, mtime)}
+        files = {'original': f'{stem}.{digest}{ext}'}
+        for width in self.widths:
+            file_name = f'{stem}.{digest}.w{width}{ext}'
+            variant = self._variant(file_name, data, width)
+            if variant is not None:
+                assets[file_name] = Asset(variant, content_type, mtime)
+                files[f'w{width}'] = file_name
+
+        with self._lock:
+            self._assets.update(assets)
+            self._sources[name] = files
+        return files
+
+    def _variant(self, file_name, data, width):
+        """Bytes of one resized variant from the disk cache or Pillow, or None"""
+        cached = os.path.join(self.cache_dir, file_name)
+        try:
+            with open(cached, 'rb') as handle:
+                variant = handle.read()
+            with self._lock:
+                self._stats['variants_loaded'] += 1
+            return variant
+        except FileNotFoundError:
+            pass
+        if Image is None:
+            return None
+
+        with Image.open(io.BytesIO(data)) as image:
+            if image.width <= width:
+                # Never upscale; the original already fits
+                return None
+            height = max(1, round(image.height * width / image.width))
+            resized = image.convert('RGB') if image.format == 'JPEG' else image
+            resized = resized.resize((width, height), Image.LANCZOS)
+            buffer = io.BytesIO()
+            options = {'quality': JPEG_QUALITY, 'progressive': True} if image.format == 'JPEG' else {}
+            resized.save(buffer, format=image.format, optimize=True, **options)
+        variant = buffer.getvalue()
+
+        # Write atomically so a concurrent worker never reads half a file
+        os.makedirs(self.cache_dir, exist_ok=True)
+        handle, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        with os.fdopen(handle, 'wb') as temp:
+            temp.write(variant)
+        os.replace(temp_path, cached)
+        with self._lock:
+            self._stats['variants_built'] += 1
+        return variant
+
+    def get(self, file_name):
+        """The Asset for a hashed URL file name, or None"""
+        asset = self._assets.get(file_name)
+        if asset is None:
+            match = ASSET_NAME_PATTERN.match(file_name)
+            # An image added after load(): pick it up on first request
+            if match and self._load_source(match.group('stem') + match.group('ext')):
+                asset = self._assets.get(file_name)
+        with self._lock:
+            self._stats['served' if asset is not None else 'not_found'] += 1
+        return asset
+
+    def urls_for(self, image_url):
+        """Hashed URLs for a menu item's ``image_url``: {'original': url, 'w160': url, ...}.
+
+        Empty when ``image_url`` doesn't name a file in ``image_dir``.
+        """
+        if not image_url or '://' in image_url:
+            return {}
+        # Names come from menu rows, so remembering misses stays bounded
+        files = self._load_source(os.path.basename(image_url), remember_miss=True)
+        if not files:
+            return {}
+        return {variant: f'{self.base_url}/api/images/{file_name}' for variant, file_name in files.items()}
+
+    def stats(self):
+        """Snapshot of store counters"""
+        with self._lock:
+            return dict(self._stats, assets=len(self._assets),
+                        missing=sum(files is None for files in self._sources.values()),
+                        bytes=sum(len(asset.data) for asset in self._assets.values()))
@@ -0,0 +1,60 @@
+"""
+Smart Cafe Management System - Benchmark Comparison
+Compares two bench/run.py result files endpoint by endpoint.
+
+Usage:
+    python bench/compare.py results/before.json results/after.json
+"""
+
+import json
+import sys
+
+METRICS = ('throughput_rps', 'p50_ms', 'p95_ms', 'p99_ms')
+
+
+def change(before, after):
+    """Percentage change from ``before`` to ``after``"""
+    if not before:
+        return None
+    return (after - before) / before * 100
+
+
+def compare(before, after):
+    """Return [(endpoint, metric, before, after, percent change)]"""
+    rows = []
+    labels = sorted(set(before['endpoints']) | set(after['endpoints']))
+    for label in labels + ['overall']:
+        old = before['overall'] if label == 'overall' else before['endpoints'].get(label)
+        new = after['overall'] if label == 'overall' else after['endpoints'].get(label)
+        if old is None or new is None:
+            continue
+        for metric in METRICS:
+            rows.append((label, metric, old[metric], new[metric], change(old[metric], new[metric])))
+    return rows
+
+
+def main(argv):
+    if len(argv) != 2:
+        print(__doc__.strip())
+        return 2
+    with open(argv[0]) as handle:
+        before = json.load(handle)
+    with open(argv[1]) as handle:
+        after = json.load(handle)
+
+    for name, results in (('before', before), ('after', after)):
+        meta = results['meta']
+        print(f"{name}: {meta['timestamp']} rev={meta['git_revision']} scenario={meta['scenario']} "
+              f"concurrency={meta['concurrency']} transport={meta['transport']}")
+    if before['meta']['scenario'] != after['meta']['scenario']:
+        print('warning: runs used different scenarios')
+
+    print(f"\n{'endpoint':40} {'metric':15} {'before':>10} {'after':>10} {'change':>9}")
+    for label, metric, old, new, percent in compare(before, after):
+        shown = f'{percent:+8.1f}%' if percent is not None else '      n/a'
+        print(f'{label:40} {metric:15} {old:>10.2f} {new:>10.2f} {shown}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,147 @@
+"""
+Smart Cafe Management System - Benchmark Data Generator
+Fills a database with synthetic users, cafes, menu items and orders at
+realistic ratios. Rows are deterministic for a given --seed (timestamps are
+relative to now).
+
+Usage:
+    python bench/datagen.py --users 5000 --db smart_cafe.db
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from migrations import migrate  # noqa: E402
+from passwords import hash_password  # noqa: E402
+
+# Ratios relative to the number of users
+USERS_PER_CAFE = 500
+ITEMS_PER_CAFE = 25
+ORDERS_PER_USER = 8
+MAX_ITEMS_PER_ORDER = 4
+HISTORY_DAYS = 180
+
+# Shared password for every generated user (see bench/run.py)
+BENCH_PASSWORD = 'bench123'
+
+CATEGORIES = {
+    'Fast Food': ['Burger', 'Pizza', 'Fries', 'Sandwich', 'Wrap', 'Nuggets'],
+    'Pakistani': ['Biryani', 'Karahi', 'Pulao', 'Nihari', 'Haleem'],
+    'Beverages': ['Cappuccino', 'Latte', 'Chai', 'Soft Drink', 'Lassi', 'Juice'],
+    'Desserts': ['Muffin', 'Brownie', 'Kheer', 'Ice Cream'],
+    'Italian': ['Pasta', 'Lasagna', 'Garlic Bread'],
+}
+STATUS_WEIGHTS = [('delivered', 80), ('cancelled', 5), ('pending', 8), ('preparing', 4), ('ready', 3)]
+ROLE_WEIGHTS = [('user', 97), ('admin', 1), ('food_authority', 2)]
+
+
+def weighted_choice(rng, weights):
+    values, counts = zip(*weights)
+    return rng.choices(values, counts)[0]
+
+
+def generate(conn, users, seed=42):
+    """Insert synthetic rows into ``conn`` and return the row counts"""
+    rng = random.Random(seed)
+    now = datetime.now()
+    # One salted hash shared by every synthetic user keeps generation fast
+    password_hash = hash_password(BENCH_PASSWORD)
+    cursor = conn.cursor()
+
+    user_rows = []
+    for index in range(users):
+        created = now - timedelta(days=rng.uniform(0, HISTORY_DAYS * 2))
+        user_rows.append((f'Bench User {index}', f'bench{seed}-{index}@student.com', password_hash,
+                          f'SP{index:06d}', f'0300{index:07d}', f'Hostel {index % 12}',
+                          weighted_choice(rng, ROLE_WEIGHTS), created.strftime('%Y-%m-%d %H:%M:%S')))
+    cursor.executemany('''
+        INSERT INTO users (name, email, password, student_id, phone, address, role, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', user_rows)
+    user_ids = [row[0] for row in cursor.execute('SELECT id FROM users WHERE email LIKE ?', (f'bench{seed}-%',))]
+
+    cafe_count = max(1, users // USERS_PER_CAFE)
+    cursor.executemany('''
+        INSERT INTO cafes (name, description, location, status)
+        VALUES (?, ?, ?, ?)
+    ''', [(f'Bench Cafe {seed}-{index}', 'Synthetic benchmark cafe', f'Block {index}', 'active')
+          for index in range(cafe_count)])
+    cafe_ids = [row[0] for row in cursor.execute('SELECT id FROM cafes WHERE name LIKE ?', (f'Bench Cafe {seed}-%',))]
+
+    item_rows = []
+    for cafe_id in cafe_ids:
+        for index in range(ITEMS_PER_CAFE):
+            category = rng.choice(list(CATEGORIES))
+            dish = rng.choice(CATEGORIES[category])
+            item_rows.append((cafe_id, f'{dish} {index}', f'House {dish.lower()} made fresh daily',
+                              rng.randrange(100, 1200, 10), None, category, 1 if rng.random() > 0.05 else 0))
+    cursor.executemany('''
+        INSERT INTO menu_items (cafe_id, name, description, price, image_url, category, available)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', item_rows)
+    menu = {}
+    for item_id, cafe_id, price in cursor.execute(
+            'SELECT id, cafe_id, price FROM menu_items WHERE cafe_id IN (%s)' % ','.join('?' * len(cafe_ids)),
+            cafe_ids):
+        menu.setdefault(cafe_id, []).append((item_id, price))
+
+    # Orders are created oldest first so ids increase with created_at
+    order_count = int(users * ORDERS_PER_USER)
+    timestamps = sorted(now - timedelta(seconds=rng.uniform(0, HISTORY_DAYS * 86400)) for _ in range(order_count))
+    # A minority of regulars place most of the orders
+    user_weights = [rng.paretovariate(1.5) for _ in user_ids]
+    order_item_rows = []
+    cursor.execute('SELECT COALESCE(MAX(id), 0) FROM orders')
+    next_order_id = cursor.fetchone()[0] + 1
+    order_rows = []
+    for created in timestamps:
+        cafe_id = rng.choice(cafe_ids)
+        lines = rng.sample(menu[cafe_id], rng.randint(1, min(MAX_ITEMS_PER_ORDER, len(menu[cafe_id]))))
+        subtotal = 0
+        for item_id, price in lines:
+            quantity = rng.choice((1, 1, 1, 2, 3))
+            subtotal += price * quantity
+            order_item_rows.append((next_order_id, item_id, quantity, price))
+        order_rows.append((next_order_id, rng.choices(user_ids, user_weights)[0], cafe_id,
+                           round(subtotal * 1.05 + 50, 2), weighted_choice(rng, STATUS_WEIGHTS),
+                           f'Hostel {rng.randrange(12)}', '03001234567', rng.choice(('cash', 'jazzcash')),
+                           created.strftime('%Y-%m-%d %H:%M:%S')))
+        next_order_id += 1
+    cursor.executemany('''
+        INSERT INTO orders (id, user_id, cafe_id, total_amount, status, delivery_address, contact_number,
+                            payment_method, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', order_rows)
+    cursor.executemany('''
+        INSERT INTO order_items (order_id, menu_item_id, quantity, price)
+        VALUES (?, ?, ?, ?)
+    ''', order_item_rows)
+    conn.commit()
+    return {'users': len(user_ids), 'cafes': len(cafe_ids), 'menu_items': len(item_rows),
+            'orders': len(order_rows), 'order_items': len(order_item_rows)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fill the database with synthetic benchmark data')
+    parser.add_argument('--db', default='smart_cafe.db', help='database file to fill')
+    parser.add_argument('--users', type=int, default=1000, help='number of users to create')
+    parser.add_argument('--seed', type=int, default=42, help='random seed')
+    args = parser.parse_args()
+
+    migrate(args.db)
+    conn = sqlite3.connect(args.db)
+    try:
+        counts = generate(conn, args.users, args.seed)
+    finally:
+        conn.close()
+    print(', '.join(f'{count} {name}' for name, count in counts.items()))
+
+
+if __name__ == '__main__':
+    main()
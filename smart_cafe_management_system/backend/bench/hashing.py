@@ -0,0 +1,116 @@
+"""
+Smart Cafe Management System - Password Hashing Benchmark
+Measures password checks (the cost of a login) per second and per core
+through the bounded hashing pool, including how many were turned away.
+
+Usage:
+    python bench/hashing.py --concurrency 32 --duration 10
+    python bench/hashing.py --workers 2 --queue 4 --concurrency 64
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from passwords import (HASH_QUEUE, HASH_WORKERS, SCRYPT_N, SCRYPT_P, SCRYPT_R,  # noqa: E402
+                       HasherBusy, PasswordHasher, hash_password)
+from run import percentile  # noqa: E402
+
+PASSWORD = 'bench123'
+
+
+def run(hasher, stored, concurrency, duration, warmup):
+    """Verify ``PASSWORD`` from ``concurrency`` threads; returns (latencies, rejected)"""
+    latencies = []
+    rejected = [0]
+    lock = threading.Lock()
+    start = time.perf_counter()
+    measure_from = start + warmup
+    deadline = measure_from + duration
+
+    def client():
+        local, busy = [], 0
+        while True:
+            began = time.perf_counter()
+            if began >= deadline:
+                break
+            try:
+                valid, _ = hasher.verify(PASSWORD, stored)
+                if not valid:
+                    raise RuntimeError('benchmark hash did not verify')
+                ok = True
+            except HasherBusy:
+                ok = False
+                # A rejected client backs off briefly, as a browser retry would
+                time.sleep(0.01)
+            if began >= measure_from:
+                if ok:
+                    local.append(time.perf_counter() - began)
+                else:
+                    busy += 1
+        with lock:
+            latencies.extend(local)
+            rejected[0] += busy
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sorted(latencies), rejected[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark password checks through the hashing pool')
+    parser.add_argument('--workers', type=int, default=HASH_WORKERS, help='hashing threads')
+    parser.add_argument('--queue', type=int, default=HASH_QUEUE, help='checks allowed to wait for a thread')
+    parser.add_argument('--concurrency', type=int, default=HASH_WORKERS * 4, help='concurrent logins')
+    parser.add_argument('--duration', type=float, default=10.0, help='measured seconds')
+    parser.add_argument('--warmup', type=float, default=1.0, help='unmeasured seconds before measuring')
+    parser.add_argument('--out', help='write JSON results to this file')
+    args = parser.parse_args()
+
+    hasher = PasswordHasher(workers=args.workers, max_queue=args.queue)
+    latencies, rejected = run(hasher, hash_password(PASSWORD), args.concurrency, args.duration, args.warmup)
+
+    cores = min(args.workers, os.cpu_count() or 1)
+    rate = len(latencies) / args.duration
+    results = {
+        'meta': {
+            'python': platform.python_version(),
+            'cpu_count': os.cpu_count(),
+            'scrypt': {'n': SCRYPT_N, 'r': SCRYPT_R, 'p': SCRYPT_P},
+            'workers': args.workers,
+            'queue': args.queue,
+            'concurrency': args.concurrency,
+            'duration': args.duration,
+        },
+        'logins': len(latencies),
+        'rejected': rejected,
+        'logins_per_second': round(rate, 2),
+        'logins_per_second_per_core': round(rate / cores, 2),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+    }
+
+    print(f"{results['logins']} logins in {args.duration:g}s on {cores} core(s): "
+          f"{results['logins_per_second']:.1f}/s, {results['logins_per_second_per_core']:.1f}/s per core")
+    print(f"p50 {results['p50_ms']:.1f} ms, p95 {results['p95_ms']:.1f} ms, p99 {results['p99_ms']:.1f} ms, "
+          f"{rejected} rejected with 503")
+
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, 'w') as handle:
+            json.dump(results, handle, indent=2)
+        print(f'Results written to {args.out}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,267 @@
+"""
+Smart Cafe Management System - Benchmark Scenario Driver
+Runs browse / order / history traffic against the API at a fixed concurrency
+and reports throughput and latency percentiles per endpoint.
+
+Usage:
+    python bench/run.py --db smart_cafe.db --scenario mixed --concurrency 8 --duration 30
+    python bench/run.py --url http://127.0.0.1:5000 --db smart_cafe.db --out results/after.json
+
+Without --url the Flask app is driven in-process through its test client.
+With --url requests go over HTTP to a running server (which should be using
+the same database, passed with --db so the driver can pick real ids).
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from datagen import BENCH_PASSWORD  # noqa: E402
+
+
+# Scenario actions: each returns (label, method, path, json body)
+def browse_cafes(ctx, rng):
+    return 'GET /api/menu/cafes', 'GET', '/api/menu/cafes', None
+
+
+def browse_items(ctx, rng):
+    cafe_id = rng.choice(ctx.cafe_ids)
+    return 'GET /api/menu/cafes/<id>/items', 'GET', f'/api/menu/cafes/{cafe_id}/items', None
+
+
+def recommendations(ctx, rng):
+    return 'GET /api/menu/recommendations/<id>', 'GET', f'/api/menu/recommendations/{rng.choice(ctx.user_ids)}', None
+
+
+def order_history(ctx, rng):
+    return 'GET /api/user/orders', 'GET', f'/api/user/orders?user_id={rng.choice(ctx.user_ids)}&limit=20', None
+
+
+def place_order(ctx, rng):
+    cafe_id = rng.choice(ctx.cafe_ids)
+    items = rng.sample(ctx.menu[cafe_id], rng.randint(1, min(3, len(ctx.menu[cafe_id]))))
+    body = {
+        'user_id': rng.choice(ctx.user_ids),
+        'cafe_id': cafe_id,
+        'items': [{'menu_item_id': item_id, 'quantity': rng.choice((1, 1, 2))} for item_id in items],
+        'delivery_address': 'Bench Hostel',
+        'contact_number': '03001234567',
+        'payment_method': 'cash'
+    }
+    return 'POST /api/user/orders', 'POST', '/api/user/orders', body
+
+
+def login(ctx, rng):
+    body = {'email': rng.choice(ctx.emails), 'password': BENCH_PASSWORD}
+    return 'POST /api/auth/login', 'POST', '/api/auth/login', body
+
+
+def admin_dashboard(ctx, rng):
+    return 'GET /api/admin/dashboard', 'GET', '/api/admin/dashboard', None
+
+
+# Traffic mixes: (weight, action)
+SCENARIOS = {
+    'browse': [(30, browse_cafes), (55, browse_items), (15, recommendations)],
+    'order': [(100, place_order)],
+    'history': [(100, order_history)],
+    'login': [(100, login)],
+    'mixed': [(15, browse_cafes), (35, browse_items), (10, recommendations), (15, order_history),
+              (15, place_order), (8, login), (2, admin_dashboard)],
+}
+
+
+class Context:
+    """Real ids from the benchmark database used to build requests"""
+
+    def __init__(self, database):
+        conn = sqlite3.connect(database)
+        try:
+            users = conn.execute("SELECT id, email FROM users WHERE role = 'user' AND email LIKE 'bench%' "
+                                 "ORDER BY id LIMIT 5000").fetchall()
+            if not users:
+                raise SystemExit(f'No benchmark users in {database}; run bench/datagen.py first')
+            self.user_ids = [row[0] for row in users]
+            self.emails = [row[1] for row in users]
+            self.menu = {}
+            for item_id, cafe_id in conn.execute('''
+                SELECT mi.id, mi.cafe_id FROM menu_items mi
+                JOIN cafes c ON c.id = mi.cafe_id
+                WHERE mi.available = 1 AND c.status = 'active'
+            '''):
+                self.menu.setdefault(cafe_id, []).append(item_id)
+            self.cafe_ids = sorted(self.menu)
+        finally:
+            conn.close()
+
+
+class ClientTransport:
+    """Drives the app in-process through the Flask test client"""
+
+    def __init__(self, database):
+        os.environ['SMART_CAFE_DB'] = os.path.abspath(database)
+        # Every simulated client shares one address here, so measure raw
+        # capacity unless admission control was asked for explicitly
+        os.environ.setdefault('SMART_CAFE_ADMISSION', '0')
+        # Simulated clients act for their user_id without logging in
+        os.environ.setdefault('SMART_CAFE_ALLOW_CLAIMED_USER', '1')
+        import app as backend
+        backend.init_db()
+        backend.warm_caches()
+        self.client = backend.app.test_client()
+
+    def request(self, method, path, body):
+        response = self.client.open(path, method=method, json=body)
+        return response.status_code
+
+
+class HttpTransport:
+    """Sends real HTTP requests to a running server"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def request(self, method, path, body):
+        data = json.dumps(body).encode() if body is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data, method=method,
+                                     headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(req, timeout=30) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as error:
+            return error.code
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def run(transport, ctx, scenario, concurrency, duration, warmup, seed):
+    """Run the scenario and return {label: [(latency_seconds, ok)]} plus elapsed time"""
+    actions = SCENARIOS[scenario]
+    weights = [weight for weight, _ in actions]
+    functions = [action for _, action in actions]
+    samples = {}
+    lock = threading.Lock()
+    start = time.perf_counter()
+    measure_from = start + warmup
+    deadline = measure_from + duration
+
+    def worker(worker_id):
+        rng = random.Random(seed * 1000 + worker_id)
+        local = {}
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            label, method, path, body = rng.choices(functions, weights)[0](ctx, rng)
+            began = time.perf_counter()
+            try:
+                ok = transport.request(method, path, body) < 400
+            except Exception:
+                ok = False
+            elapsed = time.perf_counter() - began
+            if began >= measure_from:
+                local.setdefault(label, []).append((elapsed, ok))
+        with lock:
+            for label, values in local.items():
+                samples.setdefault(label, []).extend(values)
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, duration
+
+
+def summarize(values, elapsed):
+    latencies = sorted(latency for latency, _ in values)
+    errors = sum(1 for _, ok in values if not ok)
+    return {
+        'requests': len(values),
+        'errors': errors,
+        'throughput_rps': round(len(values) / elapsed, 2),
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+        'max_ms': round(latencies[-1] * 1000, 3) if latencies else 0.0,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a benchmark scenario against the backend API')
+    parser.add_argument('--db', default='smart_cafe.db', help='benchmark database (see bench/datagen.py)')
+    parser.add_argument('--url', help='base URL of a running server; omit to use the in-process test client')
+    parser.add_argument('--scenario', choices=sorted(SCENARIOS), default='mixed')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10.0, help='measured seconds')
+    parser.add_argument('--warmup', type=float, default=2.0, help='unmeasured seconds before measuring')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--out', help='write JSON results to this file')
+    args = parser.parse_args()
+
+    ctx = Context(args.db)
+    transport = HttpTransport(args.url) if args.url else ClientTransport(args.db)
+    samples, elapsed = run(transport, ctx, args.scenario, args.concurrency, args.duration, args.warmup, args.seed)
+
+    endpoints = {label: summarize(values, elapsed) for label, values in sorted(samples.items())}
+    overall = summarize([value for values in samples.values() for value in values], elapsed)
+    results = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'transport': 'http' if args.url else 'test_client',
+            'scenario': args.scenario,
+            'concurrency': args.concurrency,
+            'duration': args.duration,
+            'warmup': args.warmup,
+            'seed': args.seed,
+        },
+        'overall': overall,
+        'endpoints': endpoints,
+    }
+
+    print(f"{'endpoint':40} {'reqs':>7} {'err':>5} {'rps':>9} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for label, stats in list(endpoints.items()) + [('overall', overall)]:
+        print(f"{label:40} {stats['requests']:>7} {stats['errors']:>5} {stats['throughput_rps']:>9.1f} "
+              f"{stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} {stats['p99_ms']:>9.2f}")
+
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, 'w') as handle:
+            json.dump(results, handle, indent=2)
+        print(f'Results written to {args.out}')
+
+
+if __name__ == '__main__':
+    main()
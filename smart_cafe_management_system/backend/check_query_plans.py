@@ -0,0 +1,195 @@
+"""
+Smart Cafe Management System - Query Plan Check
+Drives every API route against a scratch database, captures the SQL each one
+runs and fails if EXPLAIN QUERY PLAN reports a full table scan.
+
+Usage:
+    python check_query_plans.py
+"""
+
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+
+from flask import has_request_context, request
+
+import app as backend
+from db import ConnectionPool
+
+# Scans that are expected, keyed by (endpoint, table or alias in the plan)
+ALLOWED_SCANS = {
+    ('get_cafes', 'cafes'): 'lists every cafe',
+    ('get_menu_cafes', 'cafes'): 'lists every active cafe',
+    ('food_authority_dashboard', 'c'): 'lists every cafe',
+    ('reconcile_stats', 'users'): 'reconciliation recounts every row',
+    ('reconcile_stats', 'cafes'): 'reconciliation recounts every row',
+    ('reconcile_stats', 'orders'): 'reconciliation recounts every row',
+    ('reconcile_stats', 'menu_items'): 'reconciliation recounts every row',
+    ('reconcile_stats', 'stats_counters'): 'reconciliation reads every counter',
+    ('reconcile_stats', 'archived_orders'): 'reconciliation recounts every row',
+    ('reconcile_stats', 'CONSTANT'): 'reconciliation adds the live and archived order totals',
+    ('reconcile_stats', 'notifications'): 'reconciliation recounts every unread notification',
+    ('place_order', 'menu_items'): 'price index load after a menu write',
+    ('place_orders_batch', 'menu_items'): 'price index load after a menu write',
+    ('get_recommendations', 'menu_items'): 'model build loads every available item',
+    ('get_recommendations', 'user_preferences'): 'model build loads every preference',
+    ('admin_export_orders', 'o'): 'exports walk live and archived orders in id order without a sort',
+    ('food_authority_export_orders', 'o'): 'exports walk live and archived orders in id order without a sort',
+    ('search_menu_items', 'menu_items_fts'): 'virtual table; MATCH is answered by the FTS index',
+}
+
+# Requests that exercise each route: (method, path, json body)
+ROUTE_CALLS = [
+    ('POST', '/api/auth/signup', {'name': 'Plan Check', 'email': 'plan@check.com', 'password': 'secret1'}),
+    ('POST', '/api/auth/login', {'email': 'plan@check.com', 'password': 'secret1'}),
+    ('POST', '/api/auth/logout', {}),
+    ('GET', '/api/user/profile?user_id=2', None),
+    ('PUT', '/api/user/profile', {'user_id': 2, 'phone': '03001234567'}),
+    ('POST', '/api/user/orders', {'user_id': 2, 'cafe_id': 1, 'items': [{'menu_item_id': 1, 'quantity': 2, 'price': 350}]}),
+    ('POST', '/api/user/orders/batch', {'orders': [{'user_id': 2, 'cafe_id': 1, 'items': [{'menu_item_id': 2, 'quantity': 1, 'price': 800}]}]}),
+    ('GET', '/api/user/orders/writer-stats', None),
+    ('GET', '/api/user/orders?user_id=2', None),
+    ('GET', '/api/user/orders?user_id=2&limit=1&after=2999-01-01 00:00:00,999', None),
+    ('GET', '/api/admin/dashboard', None),
+    ('GET', '/api/admin/analytics', None),
+    ('GET', '/api/admin/analytics?from=2024-01-01&to=2999-12-31&cafe_id=1&top=3', None),
+    ('POST', '/api/admin/stats/reconcile', {}),
+    ('GET', '/api/admin/cafes', None),
+    ('POST', '/api/admin/cafes', {'name': 'Plan Check Cafe'}),
+    ('GET', '/api/admin/db-pool', None),
+    ('GET', '/api/_metrics', None),
+    ('GET', '/api/food-authority/dashboard', None),
+    ('POST', '/api/food-authority/notifications', {'cafe_id': 1, 'subject': 'Check', 'message': 'Plan check'}),
+    ('POST', '/api/food-authority/notifications', {'cafe_ids': [1, 2], 'subject': 'Check', 'message': 'Fan-out'}),
+    ('POST', '/api/food-authority/notifications', {'cafe_ids': 'all', 'subject': 'Check', 'message': 'Everyone'}),
+    ('GET', '/api/food-authority/notifications', None),
+    ('POST', '/api/food-authority/notifications/read', {}),
+    ('GET', '/api/admin/notifications', None),
+    ('GET', '/api/admin/notifications?cafe_id=1&limit=1&before=999', None),
+    ('POST', '/api/admin/notifications/read', {'up_to': 2}),
+    ('POST', '/api/admin/notifications/read', {'cafe_id': 1}),
+    ('GET', '/api/menu/cafes', None),
+    ('GET', '/api/menu/cafes/1/items', None),
+    ('GET', '/api/menu/search?q=bur&max_price=1000', None),
+    ('GET', '/api/menu/search?category=Fast%20Food&sort=price_asc', None),
+    ('GET', '/api/menu/search?cafe_id=1&page=2&limit=1', None),
+    ('GET', '/api/menu/cache-stats', None),
+    ('GET', '/api/menu/recommendations/2', None),
+]
+
+# Replayed with the bearer token issued by logging in as plan@check.com
+SESSION_CALLS = [
+    ('GET', '/api/user/profile', None),
+    ('PUT', '/api/user/profile', {'address': 'Hostel 2'}),
+    ('GET', '/api/user/orders', None),
+    ('POST', '/api/user/orders', {'cafe_id': 1, 'items': [{'menu_item_id': 1, 'quantity': 1}]}),
+    ('POST', '/api/auth/logout', {}),
+]
+
+# Replayed with the bearer token issued by logging in as the sample admin
+ADMIN_CALLS = [
+    ('PUT', '/api/admin/orders/1', {'status': 'preparing'}),
+    ('PUT', '/api/admin/orders/1', {'status': 'delivered'}),
+    ('GET', '/api/admin/cafes/1/queue', None),
+    ('GET', '/api/admin/exports/orders?from=2024-01-01&to=2999-12-31', None),
+    ('GET', '/api/food-authority/exports/orders?format=ndjson&cafe_id=1', None),
+]
+
+SCAN_PATTERN = re.compile(r'^SCAN (\w+)')
+
+# FTS5 reads its own shadow tables through statements like SELECT ... FROM 'main'.'x_config'
+FTS_INTERNAL_PATTERN = re.compile(r"FROM 'main'\.'\w+_(config|data|idx|docsize|content)'")
+
+
+def explain(database, sql):
+    """Return the EXPLAIN QUERY PLAN detail lines for ``sql``"""
+    conn = sqlite3.connect(database)
+    try:
+        return [row[3] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}')]
+    except sqlite3.Error:
+        return []
+    finally:
+        conn.close()
+
+
+def capture_route_queries(database):
+    """Run ROUTE_CALLS against ``database`` and return [(endpoint, sql)]"""
+    captured = []
+
+    def trace(sql):
+        if FTS_INTERNAL_PATTERN.search(sql):
+            return
+        if has_request_context() and sql.lstrip().upper().startswith(('SELECT', 'UPDATE', 'DELETE')):
+            captured.append((request.endpoint, sql))
+
+    backend.DB_NAME = database
+    backend.pool = ConnectionPool(database)
+    backend.pool.on_connect(lambda conn: conn.set_trace_callback(trace))
+    backend.init_db()
+    backend.add_sample_data()
+
+    client = backend.app.test_client()
+
+    def call(method, path, body, headers=None):
+        response = client.open(path, method=method, json=body, headers=headers)
+        response.get_data()  # Drain streamed bodies so their queries run
+        if response.status_code >= 500:
+            raise RuntimeError(f'{method} {path} failed with {response.status_code}')
+        return response
+
+    # Some calls act for a claimed user_id without a token, the legacy path
+    backend.ALLOW_CLAIMED_USER = True
+    for method, path, body in ROUTE_CALLS:
+        call(method, path, body)
+    backend.ALLOW_CLAIMED_USER = False
+
+    token = call('POST', '/api/auth/login', {'email': 'plan@check.com', 'password': 'secret1'}).json['user']['token']
+    # Re-check every session against the database so the loader's queries are traced too
+    backend.sessions.cache_ttl = 0
+    for method, path, body in SESSION_CALLS:
+        call(method, path, body, {'Authorization': f'Bearer {token}'})
+
+    token = call('POST', '/api/auth/login', {'email': 'admin@cafe.com', 'password': 'admin123'}).json['user']['token']
+    for method, path, body in ADMIN_CALLS:
+        response = call(method, path, body, {'Authorization': f'Bearer {token}'})
+        if response.status_code in (401, 403):
+            raise RuntimeError(f'{method} {path} refused the admin session')
+    backend.pool.close_all()
+    return captured
+
+
+def find_full_scans(database, captured):
+    """Return [(endpoint, plan detail, sql)] for every disallowed full scan"""
+    failures = []
+    seen = set()
+    for endpoint, sql in captured:
+        if (endpoint, sql) in seen:
+            continue
+        seen.add((endpoint, sql))
+        for detail in explain(database, sql):
+            match = SCAN_PATTERN.match(detail)
+            if match and (endpoint, match.group(1)) not in ALLOWED_SCANS:
+                failures.append((endpoint, detail, ' '.join(sql.split())))
+    return failures
+
+
+def main():
+    with tempfile.TemporaryDirectory() as workdir:
+        database = os.path.join(workdir, 'plan_check.db')
+        captured = capture_route_queries(database)
+        failures = find_full_scans(database, captured)
+
+    exercised = {endpoint for endpoint, _ in captured}
+    print(f'Checked {len(captured)} statements from {len(exercised)} routes')
+    for endpoint, detail, sql in failures:
+        print(f'FULL SCAN in {endpoint}: {detail}\n    {sql}')
+    if failures:
+        return 1
+    print('No unexpected full table scans')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
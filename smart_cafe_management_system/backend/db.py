@@ -0,0 +1,155 @@
+"""
+Smart Cafe Management System - Database Connection Pool
+Reuses SQLite connections across requests instead of reconnecting per handler
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+# Pool configuration (overridable from the environment)
+POOL_SIZE = int(os.environ.get('SMART_CAFE_POOL_SIZE', 8))
+POOL_TIMEOUT = float(os.environ.get('SMART_CAFE_POOL_TIMEOUT', 5.0))
+
+# Pragmas applied to every new connection
+PRAGMAS = (
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),
+    ('cache_size', -16000),       # ~16 MB page cache per connection
+    ('mmap_size', 134217728),     # 128 MB memory-mapped I/O
+    ('busy_timeout', 5000),       # wait up to 5s for the writer lock
+    ('temp_store', 'MEMORY'),
+)
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes available within the pool timeout"""
+
+
+class ConnectionPool:
+    """Bounded pool of SQLite connections with per-thread affinity.
+
+    A thread that releases a connection gets the same one back on its next
+    acquire while it is still idle, so its page cache stays warm. Other
+    threads take idle connections LIFO, open new ones up to ``max_size``,
+    and otherwise wait for a release.
+    """
+
+    def __init__(self, database, max_size=POOL_SIZE, timeout=POOL_TIMEOUT, factory=sqlite3.Connection):
+        self.database = database
+        self.factory = factory
+        self.max_size = max_size
+        self.timeout = timeout
+        self._idle = []
+        self._open = 0
+        self._in_use = 0
+        self._local = threading.local()
+        self._cond = threading.Condition(threading.Lock())
+        self._stats = {'hits': 0, 'misses': 0, 'waits': 0, 'timeouts': 0, 'wait_time': 0.0}
+        self._connect_hooks = []
+
+    def on_connect(self, hook):
+        """Register ``hook(conn)`` to run on every newly opened connection"""
+        self._connect_hooks.append(hook)
+        return hook
+
+    def connect(self):
+        """Open a configured connection outside the pool, for long-lived background threads"""
+        return self._connect()
+
+    def _connect(self):
+        """Open and configure a new connection"""
+        conn = sqlite3.connect(self.database, check_same_thread=False, factory=self.factory)
+        conn.row_factory = sqlite3.Row
+        for name, value in PRAGMAS:
+            conn.execute(f'PRAGMA {name} = {value}')
+        for hook in self._connect_hooks:
+            hook(conn)
+        return conn
+
+    def acquire(self):
+        """Check a connection out of the pool"""
+        with self._cond:
+            conn = self._take_idle()
+            if conn is None and self._open >= self.max_size:
+                self._stats['waits'] += 1
+                started = time.perf_counter()
+                deadline = started + self.timeout
+                while conn is None and self._open >= self.max_size:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        self._stats['timeouts'] += 1
+                        raise PoolTimeout(f'No database connection available after {self.timeout}s')
+                    self._cond.wait(remaining)
+                    conn = self._take_idle()
+                self._stats['wait_time'] += time.perf_counter() - started
+            if conn is not None:
+                self._stats['hits'] += 1
+                self._in_use += 1
+                return conn
+            # Reserve the slot before connecting outside the lock
+            self._stats['misses'] += 1
+            self._open += 1
+            self._in_use += 1
+        try:
+            return self._connect()
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+    def _take_idle(self):
+        """Pop an idle connection, preferring the one this thread used last"""
+        if not self._idle:
+            return None
+        preferred = getattr(self._local, 'conn', None)
+        if preferred is not None:
+            for index, conn in enumerate(self._idle):
+                if conn is preferred:
+                    return self._idle.pop(index)
+        return self._idle.pop()
+
+    def release(self, conn):
+        """Return a connection to the pool, rolling back any open transaction"""
+        broken = False
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            broken = True
+        with self._cond:
+            self._in_use -= 1
+            if broken:
+                self._open -= 1
+            else:
+                self._idle.append(conn)
+                self._local.conn = conn
+            self._cond.notify()
+        if broken:
+            conn.close()
+
+    def close_all(self):
+        """Close every idle connection"""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+        for conn in idle:
+            conn.close()
+
+    def stats(self):
+        """Snapshot of pool counters for sizing"""
+        with self._cond:
+            return {
+                'max_size': self.max_size,
+                'open': self._open,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'hits': self._stats['hits'],
+                'misses': self._stats['misses'],
+                'waits': self._stats['waits'],
+                'timeouts': self._stats['timeouts'],
+                'wait_time_ms': round(self._stats['wait_time'] * 1000, 3),
+            }
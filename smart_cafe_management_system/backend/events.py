@@ -0,0 +1,209 @@
+"""
+Smart Cafe Management System - Event Hub
+In-process pub/sub feeding the Server-Sent Events stream and cafe queue long-polls
+"""
+
+import asyncio
+import json
+import os
+import queue
+import threading
+from collections import deque
+
+# Stream configuration (overridable from the environment)
+REPLAY_SIZE = int(os.environ.get('SMART_CAFE_STREAM_REPLAY', 1000))
+MAX_STREAMS = int(os.environ.get('SMART_CAFE_MAX_STREAMS', 100))
+HEARTBEAT_SECONDS = float(os.environ.get('SMART_CAFE_STREAM_HEARTBEAT', 15))
+SUBSCRIBER_QUEUE_SIZE = 256
+
+
+class StreamLimitReached(Exception):
+    """Raised when this worker already serves MAX_STREAMS streams"""
+
+
+class Event:
+    """A published change, addressed to one or more topics"""
+
+    __slots__ = ('id', 'type', 'topics', 'data')
+
+    def __init__(self, event_id, event_type, topics, data):
+        self.id = event_id
+        self.type = event_type
+        self.topics = topics
+        self.data = data
+
+    def encode(self):
+        """Serialize as one SSE message"""
+        return f'id: {self.id}\nevent: {self.type}\ndata: {json.dumps(self.data)}\n\n'
+
+
+class Subscription:
+    """One stream's queue of events for its topics"""
+
+    def __init__(self, hub, topics):
+        self.hub = hub
+        self.topics = topics
+        self.queue = queue.Queue(SUBSCRIBER_QUEUE_SIZE)
+        self.overflowed = False
+        # Optional callback run after each delivery; async streams use it to
+        # wake their event loop instead of blocking a thread on the queue
+        self.on_deliver = None
+
+    def deliver(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            # Too slow to keep up; the client reconnects and resumes by id
+            self.overflowed = True
+        if self.on_deliver is not None:
+            self.on_deliver()
+
+    def close(self):
+        self.hub._unsubscribe(self)
+
+
+class EventHub:
+    """Publishes events to subscribed streams and keeps a bounded replay buffer.
+
+    Topics are strings such as ``user:5`` or ``role:admin``. A reconnecting
+    client passes ``Last-Event-ID`` and gets every buffered event after it;
+    if that id has already left the buffer it gets a ``reset`` event and
+    should re-fetch its state.
+    """
+
+    def __init__(self, replay_size=REPLAY_SIZE, max_streams=MAX_STREAMS):
+        self.max_streams = max_streams
+        self._buffer = deque(maxlen=replay_size)
+        self._subscriptions = set()
+        self._next_id = 1
+        self._lock = threading.Lock()
+        self._stats = {'published': 0, 'delivered': 0, 'rejected': 0, 'overflows': 0}
+
+    def publish(self, event_type, topics, data):
+        """Publish ``data`` to every stream subscribed to any of ``topics``"""
+        topics = frozenset(topics)
+        with self._lock:
+            event = Event(self._next_id, event_type, topics, data)
+            self._next_id += 1
+            self._buffer.append(event)
+            targets = [sub for sub in self._subscriptions if sub.topics & topics]
+            self._stats['published'] += 1
+            self._stats['delivered'] += len(targets)
+        for subscription in targets:
+            subscription.deliver(event)
+        return event
+
+    def subscribe(self, topics, last_event_id=None):
+        """Open a subscription; returns ``(subscription, replayed events)``"""
+        topics = frozenset(topics)
+        with self._lock:
+            if len(self._subscriptions) >= self.max_streams:
+                self._stats['rejected'] += 1
+                raise StreamLimitReached()
+            subscription = Subscription(self, topics)
+            self._subscriptions.add(subscription)
+            replay = []
+            if last_event_id is not None:
+                oldest = self._buffer[0].id if self._buffer else self._next_id
+                if last_event_id + 1 < oldest:
+                    replay.append(Event(self._next_id - 1, 'reset', topics, {'reason': 'replay window exceeded'}))
+                else:
+                    replay.extend(event for event in self._buffer
+                                  if event.id > last_event_id and event.topics & topics)
+        return subscription, replay
+
+    def _unsubscribe(self, subscription):
+        with self._lock:
+            if subscription.overflowed:
+                self._stats['overflows'] += 1
+            self._subscriptions.discard(subscription)
+
+    def stream(self, subscription, replay, heartbeat=HEARTBEAT_SECONDS):
+        """Generate SSE text for a subscription until the client disconnects"""
+        try:
+            yield 'retry: 3000\n\n'
+            for event in replay:
+                yield event.encode()
+            while not subscription.overflowed:
+                try:
+                    event = subscription.queue.get(timeout=heartbeat)
+                except queue.Empty:
+                    yield ': heartbeat\n\n'
+                    continue
+                yield event.encode()
+        finally:
+            subscription.close()
+
+    async def astream(self, subscription, replay, heartbeat=HEARTBEAT_SECONDS):
+        """Like ``stream()``, but waits on the event loop instead of a thread"""
+        loop = asyncio.get_running_loop()
+        ready = asyncio.Event()
+        subscription.on_deliver = lambda: loop.call_soon_threadsafe(ready.set)
+        try:
+            yield 'retry: 3000\n\n'
+            for event in replay:
+                yield event.encode()
+            while not subscription.overflowed:
+                try:
+                    event = subscription.queue.get_nowait()
+                except queue.Empty:
+                    ready.clear()
+                    # A delivery between get_nowait() and clear() must not be missed
+                    if subscription.queue.empty():
+                        try:
+                            await asyncio.wait_for(ready.wait(), heartbeat)
+                        except asyncio.TimeoutError:
+                            yield ': heartbeat\n\n'
+                    continue
+                yield event.encode()
+        finally:
+            subscription.on_deliver = None
+            subscription.close()
+
+    def wait(self, topics, last_event_id, timeout):
+        """Block until ``topics`` have an event after ``last_event_id`` or ``timeout`` passes.
+
+        Long-polls hold a subscription while they wait, so they count toward
+        ``max_streams``. Returns True if there was an event.
+        """
+        subscription, replay = self.subscribe(topics, last_event_id)
+        try:
+            if replay:
+                return True
+            try:
+                subscription.queue.get(timeout=timeout)
+            except queue.Empty:
+                return False
+            return True
+        finally:
+            subscription.close()
+
+    async def await_event(self, topics, last_event_id, timeout):
+        """Like ``wait()``, but waits on the event loop instead of a thread"""
+        loop = asyncio.get_running_loop()
+        ready = asyncio.Event()
+        subscription, replay = self.subscribe(topics, last_event_id)
+        subscription.on_deliver = lambda: loop.call_soon_threadsafe(ready.set)
+        try:
+            # A delivery before on_deliver was set is already in the queue
+            if replay or not subscription.queue.empty():
+                return True
+            try:
+                await asyncio.wait_for(ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return False
+            return True
+        finally:
+            subscription.on_deliver = None
+            subscription.close()
+
+    def last_event_id(self):
+        """Id of the newest published event (0 before the first)"""
+        with self._lock:
+            return self._next_id - 1
+
+    def stats(self):
+        """Snapshot of hub counters"""
+        with self._lock:
+            return dict(self._stats, streams=len(self._subscriptions), buffered=len(self._buffer),
+                        last_event_id=self._next_id - 1)
@@ -0,0 +1,136 @@
+"""
+Smart Cafe Management System - Order Exports
+Streams order line items as CSV or NDJSON in bounded batches
+"""
+
+import csv
+import io
+import json
+import os
+from datetime import date
+
+# Rows pulled from SQLite per fetchmany() call and written per response chunk
+EXPORT_BATCH_SIZE = int(os.environ.get('SMART_CAFE_EXPORT_BATCH', 1000))
+
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+# One row per order line, in this column order
+COLUMNS = [
+    'order_id', 'created_at', 'status', 'user_id', 'cafe_id', 'cafe_name',
+    'payment_method', 'delivery_address', 'total_amount',
+    'order_item_id', 'menu_item_id', 'item_name', 'category', 'quantity', 'price', 'line_total',
+]
+
+EXPORT_SELECT = '''
+    SELECT o.id as order_id, o.created_at, o.status, o.user_id, o.cafe_id, c.name as cafe_name,
+           o.payment_method, o.delivery_address, o.total_amount,
+           oi.id as order_item_id, oi.menu_item_id, mi.name as item_name, mi.category,
+           oi.quantity, oi.price, oi.quantity * oi.price as line_total
+    FROM {orders} o
+    JOIN {items} oi ON oi.order_id = o.id
+    LEFT JOIN menu_items mi ON mi.id = oi.menu_item_id
+    LEFT JOIN cafes c ON c.id = o.cafe_id
+    WHERE {conditions}
+'''
+
+# Live and archived orders (see archive.py); each side is read in id order
+# and SQLite merges the two, so the export is never sorted in memory
+EXPORT_QUERY = (EXPORT_SELECT.replace('{orders}', 'orders').replace('{items}', 'order_items')
+                + 'UNION ALL'
+                + EXPORT_SELECT.replace('{orders}', 'archived_orders').replace('{items}', 'archived_order_items')
+                + 'ORDER BY order_id, order_item_id')
+
+
+def parse_filters(args):
+    """Read ``format``, ``from``, ``to`` and ``cafe_id`` query args (raises ValueError)"""
+    export_format = args.get('format', 'csv')
+    if export_format not in FORMATS:
+        raise ValueError(f"Format must be one of {', '.join(FORMATS)}")
+    # Dates are validated here so they can be bound as plain strings
+    try:
+        start = date.fromisoformat(args['from']).isoformat() if args.get('from') else None
+        end = date.fromisoformat(args['to']).isoformat() if args.get('to') else None
+    except ValueError:
+        raise ValueError('Dates must look like YYYY-MM-DD')
+    cafe_id = int(args['cafe_id']) if args.get('cafe_id') else None
+    return export_format, start, end, cafe_id
+
+
+def export_filename(export_format, start, end, cafe_id):
+    """Attachment filename describing the exported range"""
+    parts = ['orders']
+    if cafe_id is not None:
+        parts.append(f'cafe{cafe_id}')
+    parts.append(start or 'start')
+    parts.append(end or 'now')
+    return '-'.join(parts) + '.' + export_format
+
+
+class OrderExport:
+    """A running export holding one pooled connection until closed.
+
+    The connection is taken when the export is created (so a busy pool fails
+    the request before any bytes are sent) and given back by ``close()``,
+    which runs when the generator finishes or the client disconnects.
+    """
+
+    def __init__(self, pool, export_format, start=None, end=None, cafe_id=None, batch_size=EXPORT_BATCH_SIZE):
+        self.pool = pool
+        self.export_format = export_format
+        self.batch_size = batch_size
+        conditions = ['1 = 1']
+        self.params = []
+        if start:
+            conditions.append('o.created_at >= ?')
+            self.params.append(start)
+        if end:
+            # ``to`` is inclusive: everything before the following midnight
+            conditions.append("o.created_at < date(?, '+1 day')")
+            self.params.append(end)
+        if cafe_id is not None:
+            conditions.append('o.cafe_id = ?')
+            self.params.append(cafe_id)
+        self.sql = EXPORT_QUERY.format(conditions=' AND '.join(conditions))
+        self.params = self.params * 2
+        self.rows = 0
+        self.cursor = None
+        self.conn = pool.acquire()
+
+    def close(self):
+        """Return the connection to the pool (safe to call twice)"""
+        cursor, self.cursor = self.cursor, None
+        if cursor is not None:
+            # Resets the statement so its read snapshot does not pin old WAL frames
+            cursor.close()
+        conn, self.conn = self.conn, None
+        if conn is not None:
+            self.pool.release(conn)
+
+    def __iter__(self):
+        """Yield the export one encoded batch at a time"""
+        try:
+            encode = self._encode_csv if self.export_format == 'csv' else self._encode_ndjson
+            if self.export_format == 'csv':
+                yield ','.join(COLUMNS) + '\r\n'
+            # sqlite3 steps the statement lazily, so only one batch is in memory
+            self.cursor = self.conn.execute(self.sql, self.params)
+            while True:
+                batch = self.cursor.fetchmany(self.batch_size)
+                if not batch:
+                    break
+                self.rows += len(batch)
+                yield encode(batch)
+        finally:
+            self.close()
+
+    def _encode_csv(self, batch):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(tuple(row) for row in batch)
+        return buffer.getvalue()
+
+    def _encode_ndjson(self, batch):
+        return ''.join(json.dumps(dict(zip(COLUMNS, row)), separators=(',', ':')) + '\n' for row in batch)
+
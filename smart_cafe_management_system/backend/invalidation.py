@@ -0,0 +1,55 @@
+"""
+Smart Cafe Management System - Cache Invalidation Channel
+Shared-memory generation counter that tells forked workers when another
+worker has invalidated the menu caches
+"""
+
+import mmap
+import multiprocessing
+import struct
+
+_COUNTER = struct.Struct('Q')
+
+
+class InvalidationChannel:
+    """A generation number in an anonymous shared mapping.
+
+    Create it in the launcher before forking; every worker then sees the same
+    8 bytes. ``publish()`` bumps the generation after a local invalidation and
+    ``poll()`` reports whether some other worker has bumped it since this
+    worker last looked. Reading is a single unlocked 8-byte load, so polling
+    on every request costs next to nothing.
+    """
+
+    def __init__(self):
+        self._map = mmap.mmap(-1, _COUNTER.size)
+        self._lock = multiprocessing.get_context('fork').Lock()
+        self._seen = 0
+        self.published = 0
+        self.received = 0
+
+    @property
+    def generation(self):
+        return _COUNTER.unpack_from(self._map, 0)[0]
+
+    def publish(self):
+        """Announce a local invalidation to every other worker"""
+        with self._lock:
+            generation = self.generation + 1
+            _COUNTER.pack_into(self._map, 0, generation)
+        # Our own caches are already dropped; don't react to our own bump
+        self._seen = generation
+        self.published += 1
+
+    def poll(self):
+        """True once for each change published by another worker"""
+        generation = self.generation
+        if generation == self._seen:
+            return False
+        self._seen = generation
+        self.received += 1
+        return True
+
+    def stats(self):
+        """Counters for monitoring"""
+        return {'generation': self.generation, 'published': self.published, 'received': self.received}
@@ -0,0 +1,138 @@
+"""
+Smart Cafe Management System - Production Launcher
+Migrates, seeds and warms the caches once, then forks ASGI workers that share
+the preloaded data copy-on-write and accept on one listening socket.
+
+Usage:
+    SMART_CAFE_WORKERS=4 python launcher.py
+"""
+
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+
+import app as backend
+import asgi
+from invalidation import InvalidationChannel
+from metrics import metrics
+
+WORKERS = int(os.environ.get('SMART_CAFE_WORKERS', 1))
+HOST = os.environ.get('SMART_CAFE_HOST', '127.0.0.1')
+PORT = int(os.environ.get('SMART_CAFE_PORT', 5000))
+LOG_LEVEL = os.environ.get('SMART_CAFE_LOG_LEVEL', 'info')
+
+# Pause before replacing a worker that died, so a crash loop doesn't spin
+RESTART_DELAY = 1.0
+
+
+def prepare():
+    """Run the one-time startup steps in the parent, before any fork"""
+    backend.init_db()
+    backend.add_sample_data()
+    backend.warm_caches(preload_menus=True)
+    # Workers open their own SQLite connections; none may cross the fork
+    backend.pool.close_all()
+    backend.cache_channel = InvalidationChannel()
+    metrics.add_gauge_source('cache_channel', backend.cache_channel.stats)
+    asgi.application.preloaded = True
+
+
+def bind(host, port):
+    """Open the listening socket every worker accepts on"""
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(sock):
+    """Serve requests in a forked worker until uvicorn shuts down"""
+    import uvicorn
+
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    config = uvicorn.Config(asgi.application, log_level=LOG_LEVEL, proxy_headers=True)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def spawn(sock):
+    """Fork one worker and return its pid"""
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            run_worker(sock)
+        except BaseException:
+            traceback.print_exc()
+            code = 1
+        # Never fall back into the parent's supervision loop
+        os._exit(code)
+    return pid
+
+
+def serve(host=HOST, port=PORT, workers=WORKERS):
+    """Prepare once, fork ``workers`` workers and restart any that die"""
+    prepare()
+    sock = bind(host, port)
+    # Move everything loaded so far out of the collector's reach: otherwise the
+    # first collection in each worker touches every object and un-shares its page
+    gc.collect()
+    gc.freeze()
+
+    children = set()
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    for _ in range(workers):
+        children.add(spawn(sock))
+    print(f'Smart Cafe backend on http://{host}:{port} with {workers} workers (parent pid {os.getpid()})')
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        children.discard(pid)
+        if not stopping:
+            print(f'Worker {pid} exited with status {os.waitstatus_to_exitcode(status)}; restarting',
+                  file=sys.stderr)
+            time.sleep(RESTART_DELAY)
+            children.add(spawn(sock))
+    sock.close()
+
+
+def main():
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit('The production server needs uvicorn: pip install -r requirements.txt')
+    if not hasattr(os, 'fork'):
+        # No fork() (Windows): uvicorn spawns workers that each start cold and
+        # cannot share invalidations
+        print('fork() is unavailable; starting independent uvicorn workers', file=sys.stderr)
+        uvicorn.run('asgi:application', host=HOST, port=PORT, workers=WORKERS, log_level=LOG_LEVEL,
+                    proxy_headers=True)
+        return
+    serve()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+Smart Cafe Management System - Menu Cache
+Read-through cache of pre-serialized, precompressed menu responses with
+version invalidation
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+from responses import compact_json, negotiate, precompress
+
+# Entries kept at once; the least recently served are dropped first
+MAX_ENTRIES = 1000
+
+
+class Uncached:
+    """Loader result to serve once but not store (e.g. the menu of a cafe that doesn't exist)"""
+
+    __slots__ = ('payload',)
+
+    def __init__(self, payload):
+        self.payload = payload
+
+
+class CachedResponse:
+    """Serialized response body, its compressed copies and its strong ETag (unquoted)"""
+
+    __slots__ = ('body', 'etag', 'version', 'encoded')
+
+    def __init__(self, body, version):
+        self.body = body
+        self.etag = hashlib.sha1(body).hexdigest()
+        self.version = version
+        self.encoded = precompress(body)
+
+    def etag_for(self, encoding):
+        """ETag of one representation; compressed copies get their own"""
+        return self.etag if encoding is None else f'{self.etag}-{encoding}'
+
+    def select(self, accept_encoding):
+        """Pick the copy to send for an Accept-Encoding header: (encoding or None, body)"""
+        encoding = negotiate(accept_encoding)
+        if encoding in self.encoded:
+            return encoding, self.encoded[encoding]
+        return None, self.body
+
+    def matches(self, etags):
+        """True if an If-None-Match set names any representation of this entry"""
+        return any(etags.contains(self.etag_for(encoding)) for encoding in (None, *self.encoded))
+
+
+class MenuCache:
+    """Caches menu payloads as JSON bytes keyed by cafe.
+
+    Each entry is compressed once when it is built, so cache hits never
+    compress.
+
+    Every cafe or menu write calls ``invalidate()``, which bumps the version
+    counter; entries built under an older version are never served again.
+    At most ``max_entries`` are kept, and a loader returning ``Uncached``
+    keeps its key out of the cache altogether.
+    """
+
+    def __init__(self, serialize=compact_json, max_entries=MAX_ENTRIES):
+        self.serialize = serialize
+        self.max_entries = max_entries
+        self.version = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'not_modified': 0, 'invalidations': 0}
+
+    def get(self, key, loader):
+        """Return the cached response for ``key``, calling ``loader()`` on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.version == self.version:
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                return entry
+            self._stats['misses'] += 1
+            version = self.version
+
+        payload = loader()
+        store = not isinstance(payload, Uncached)
+        body = self.serialize(payload if store else payload.payload)
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        entry = CachedResponse(body, version)
+
+        with self._lock:
+            # Don't store a payload that a concurrent write already invalidated
+            if store and version == self.version:
+                self._entries[key] = entry
+                if len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return entry
+
+    def peek(self, key):
+        """Return the current entry for ``key`` without loading it, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.version == self.version:
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                return entry
+        return None
+
+    def record_not_modified(self):
+        """Count a conditional request answered with 304"""
+        with self._lock:
+            self._stats['not_modified'] += 1
+
+    def invalidate(self):
+        """Drop every entry after a cafe or menu write"""
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+            self._stats['invalidations'] += 1
+
+    def stats(self):
+        """Snapshot of cache counters for monitoring"""
+        with self._lock:
+            return dict(self._stats, version=self.version, entries=len(self._entries))
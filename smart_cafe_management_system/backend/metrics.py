@@ -0,0 +1,274 @@
+"""
+Smart Cafe Management System - Metrics
+Request timing and SQL profiling exported as Prometheus text
+"""
+
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from flask import g, has_app_context, has_request_context, request
+
+# Histogram buckets (seconds / statements per request)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# Opt-in slow query log: set SMART_CAFE_SLOW_QUERY_MS to a threshold in ms
+SLOW_QUERY_MS = os.environ.get('SMART_CAFE_SLOW_QUERY_MS')
+
+slow_query_log = logging.getLogger('smart_cafe.slow_sql')
+
+_IN_LIST = re.compile(r'\(\s*\?(\s*,\s*\?)+\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_sql(sql):
+    """Collapse whitespace and variable-length IN lists so labels stay bounded"""
+    return _IN_LIST.sub('(?...)', _WHITESPACE.sub(' ', sql).strip())
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Counter:
+    """Monotonic counter with labels"""
+
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values = {}
+
+    def inc(self, labels=(), amount=1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        for labels, value in sorted(self._values.items()):
+            lines.append(f'{self.name}{_format_labels(self.label_names, labels)} {value}')
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels"""
+
+    def __init__(self, name, help_text, label_names=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._values = {}
+
+    def observe(self, value, labels=()):
+        series = self._values.get(labels)
+        if series is None:
+            series = self._values[labels] = [[0] * len(self.buckets), 0.0, 0]
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[0][index] += 1
+                break
+        series[1] += value
+        series[2] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for labels, (counts, total, count) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = f'le="{bound}"'
+                lines.append(f'{self.name}_bucket{_format_labels(self.label_names, labels, le)} {cumulative}')
+            inf = 'le="+Inf"'
+            lines.append(f'{self.name}_bucket{_format_labels(self.label_names, labels, inf)} {count}')
+            lines.append(f'{self.name}_sum{_format_labels(self.label_names, labels)} {total:.6f}')
+            lines.append(f'{self.name}_count{_format_labels(self.label_names, labels)} {count}')
+        return lines
+
+
+class Metrics:
+    """Per-route request latency and SQL statement profiling"""
+
+    def __init__(self, slow_query_ms=SLOW_QUERY_MS):
+        self.slow_query_seconds = float(slow_query_ms) / 1000 if slow_query_ms else None
+        self._lock = threading.Lock()
+        self.request_latency = Histogram(
+            'smart_cafe_request_duration_seconds', 'Request latency by route',
+            ('method', 'route', 'status'))
+        self.request_queries = Histogram(
+            'smart_cafe_request_sql_statements', 'SQL statements executed per request',
+            ('route',), QUERY_COUNT_BUCKETS)
+        self.sql_statements = Counter(
+            'smart_cafe_sql_statements_total', 'SQL statements executed', ('route', 'statement'))
+        self.sql_duration = Histogram(
+            'smart_cafe_sql_duration_seconds', 'SQL execute() time by route', ('route',))
+        self.sql_rows = Counter(
+            'smart_cafe_sql_rows_total', 'Rows fetched by SQL statements', ('route',))
+        self.slow_queries = Counter(
+            'smart_cafe_sql_slow_queries_total', 'Statements slower than the slow query threshold', ('route',))
+        self._gauge_sources = {}
+
+    def init_app(self, app):
+        """Time every request of ``app``"""
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+
+    def add_gauge_source(self, prefix, source):
+        """Export every numeric value of ``source()`` as ``smart_cafe_<prefix>_<key>``.
+
+        Registering a prefix again replaces its source, so a module that is
+        imported twice (e.g. as ``__main__`` and by name) exports it once.
+        """
+        self._gauge_sources[prefix] = source
+
+    def _start_request(self):
+        g._metrics_started = time.perf_counter()
+        g._metrics_statements = 0
+
+    def _finish_request(self, response):
+        started = g.pop('_metrics_started', None)
+        if started is not None:
+            route = _current_route()
+            self.observe_request(request.method, route, response.status_code, time.perf_counter() - started,
+                                 g.pop('_metrics_statements', 0))
+        return response
+
+    def observe_request(self, method, route, status, seconds, statements=0):
+        """Record one finished request (also used by handlers outside Flask)"""
+        with self._lock:
+            self.request_latency.observe(seconds, (method, route, str(status)))
+            self.request_queries.observe(statements, (route,))
+
+    def observe_statement(self, sql, seconds):
+        """Record one executed statement"""
+        route = _current_route()
+        statement = normalize_sql(sql)
+        if has_app_context() and '_metrics_statements' in g:
+            g._metrics_statements += 1
+        slow = self.slow_query_seconds is not None and seconds >= self.slow_query_seconds
+        with self._lock:
+            self.sql_statements.inc((route, statement))
+            self.sql_duration.observe(seconds, (route,))
+            if slow:
+                self.slow_queries.inc((route,))
+        if slow:
+            slow_query_log.warning('Slow query (%.1f ms) on %s: %s', seconds * 1000, route, statement)
+
+    def observe_rows(self, count):
+        """Record rows fetched from a statement"""
+        if count:
+            with self._lock:
+                self.sql_rows.inc((_current_route(),), count)
+
+    def render(self):
+        """Prometheus text exposition of every metric"""
+        with self._lock:
+            lines = []
+            for metric in (self.request_latency, self.request_queries, self.sql_statements,
+                           self.sql_duration, self.sql_rows, self.slow_queries):
+                lines.extend(metric.render())
+        for prefix, source in list(self._gauge_sources.items()):
+            for key, value in source().items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    name = f'smart_cafe_{prefix}_{key}'
+                    lines.append(f'# TYPE {name} gauge')
+                    lines.append(f'{name} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+def _current_route():
+    if has_request_context():
+        return request.url_rule.rule if request.url_rule else 'unmatched'
+    return 'background'
+
+
+# Process-wide registry used by the instrumented connections
+metrics = Metrics()
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that reports statement timing and fetched rows to ``metrics``.
+
+    Rows read by iterating are counted on the cursor and reported in one go
+    when they run out, the next statement starts, a ``fetch*()`` call is
+    made or the cursor closes, so a large result doesn't take the metrics
+    lock per row.
+    """
+
+    _pending_rows = 0
+
+    def _report_rows(self):
+        if self._pending_rows:
+            metrics.observe_rows(self._pending_rows)
+            self._pending_rows = 0
+
+    def execute(self, sql, parameters=()):
+        self._report_rows()
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            metrics.observe_statement(sql, time.perf_counter() - started)
+
+    def executemany(self, sql, seq_of_parameters):
+        self._report_rows()
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            metrics.observe_statement(sql, time.perf_counter() - started)
+
+    def __next__(self):
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._report_rows()
+            raise
+        self._pending_rows += 1
+        return row
+
+    def fetchone(self):
+        row = super().fetchone()
+        if row is not None:
+            self._pending_rows += 1
+        self._report_rows()
+        return row
+
+    def fetchmany(self, size=None):
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._pending_rows += len(rows)
+        self._report_rows()
+        return rows
+
+    def fetchall(self):
+        rows = super().fetchall()
+        self._pending_rows += len(rows)
+        self._report_rows()
+        return rows
+
+    def close(self):
+        self._report_rows()
+        super().close()
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection whose cursors (including ``execute()`` shortcuts) are instrumented"""
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
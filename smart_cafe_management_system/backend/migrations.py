@@ -0,0 +1,457 @@
+"""
+Smart Cafe Management System - Schema Migrations
+Ordered, versioned schema steps applied in place to the SQLite database
+"""
+
+import sqlite3
+
+
+def _create_base_tables(cursor):
+    """Create the original application tables"""
+    # Users table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL,
+            student_id TEXT,
+            phone TEXT,
+            address TEXT,
+            role TEXT NOT NULL DEFAULT 'user',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Cafes table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS cafes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            description TEXT,
+            location TEXT,
+            status TEXT DEFAULT 'active',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Menu items table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS menu_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            cafe_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            description TEXT,
+            price REAL NOT NULL,
+            image_url TEXT,
+            category TEXT,
+            available INTEGER DEFAULT 1,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (cafe_id) REFERENCES cafes(id)
+        )
+    ''')
+
+    # Orders table (payment columns are added by a later step)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS orders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            cafe_id INTEGER NOT NULL,
+            total_amount REAL NOT NULL,
+            status TEXT DEFAULT 'pending',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id),
+            FOREIGN KEY (cafe_id) REFERENCES cafes(id)
+        )
+    ''')
+
+    # Order items table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS order_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            order_id INTEGER NOT NULL,
+            menu_item_id INTEGER NOT NULL,
+            quantity INTEGER NOT NULL,
+            price REAL NOT NULL,
+            FOREIGN KEY (order_id) REFERENCES orders(id),
+            FOREIGN KEY (menu_item_id) REFERENCES menu_items(id)
+        )
+    ''')
+
+    # Notifications table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS notifications (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            from_role TEXT NOT NULL,
+            to_role TEXT NOT NULL,
+            cafe_id INTEGER,
+            subject TEXT NOT NULL,
+            message TEXT NOT NULL,
+            read INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (cafe_id) REFERENCES cafes(id)
+        )
+    ''')
+
+    # User preferences for recommendations
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS user_preferences (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            menu_item_id INTEGER NOT NULL,
+            rating INTEGER DEFAULT 0,
+            order_count INTEGER DEFAULT 0,
+            FOREIGN KEY (user_id) REFERENCES users(id),
+            FOREIGN KEY (menu_item_id) REFERENCES menu_items(id)
+        )
+    ''')
+
+
+def _add_order_payment_columns(cursor):
+    """Add delivery/payment columns missing from databases created before checkout"""
+    add_columns(cursor, 'orders', [
+        ('delivery_address', 'TEXT'),
+        ('contact_number', 'TEXT'),
+        ('payment_method', "TEXT DEFAULT 'cash'"),
+        ('jazzcash_tid', 'TEXT'),
+    ])
+
+
+def _add_hot_path_indexes(cursor):
+    """Index the columns every hot query filters or joins on"""
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_orders_user_created ON orders(user_id, created_at)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_order_items_order ON order_items(order_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_order_items_menu_item ON order_items(menu_item_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_menu_items_cafe_available ON menu_items(cafe_id, available)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_user_preferences_user_item ON user_preferences(user_id, menu_item_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_notifications_role_read ON notifications(to_role, read)')
+
+
+def _bump(name_expr, delta):
+    """SQL that adds ``delta`` to the counter named by ``name_expr``"""
+    return f'''
+        INSERT INTO stats_counters (name, value) VALUES ({name_expr}, {delta})
+        ON CONFLICT(name) DO UPDATE SET value = value + {delta};'''
+
+
+def _add_stats_counters(cursor):
+    """Materialize dashboard counters in stats_counters, maintained by triggers"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS stats_counters (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+
+    # (table, trigger suffix, counter name for NEW/OLD row, watched column)
+    counters = [
+        ('users', 'role', "'users:role:' || IFNULL({row}.role, '')", 'role'),
+        ('cafes', 'total', "'cafes'", None),
+        ('orders', 'total', "'orders'", None),
+        ('orders', 'status', "'orders:status:' || IFNULL({row}.status, '')", 'status'),
+        ('menu_items', 'cafe', "'menu_items:cafe:' || {row}.cafe_id", 'cafe_id'),
+    ]
+    for table, suffix, name, column in counters:
+        new_name = name.format(row='NEW')
+        old_name = name.format(row='OLD')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_{suffix}_insert AFTER INSERT ON {table}
+            BEGIN {_bump(new_name, 1)} END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_{suffix}_delete AFTER DELETE ON {table}
+            BEGIN {_bump(old_name, -1)} END
+        ''')
+        if column:
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_{suffix}_update AFTER UPDATE OF {column} ON {table}
+                WHEN OLD.{column} IS NOT NEW.{column}
+                BEGIN {_bump(old_name, -1)} {_bump(new_name, 1)} END
+            ''')
+
+    # Seed from the rows that already exist
+    cursor.execute('DELETE FROM stats_counters')
+    cursor.execute('''
+        INSERT INTO stats_counters (name, value)
+        SELECT 'users:role:' || IFNULL(role, ''), COUNT(*) FROM users GROUP BY role
+        UNION ALL SELECT 'cafes', COUNT(*) FROM cafes
+        UNION ALL SELECT 'orders', COUNT(*) FROM orders
+        UNION ALL SELECT 'orders:status:' || IFNULL(status, ''), COUNT(*) FROM orders GROUP BY status
+        UNION ALL SELECT 'menu_items:cafe:' || cafe_id, COUNT(*) FROM menu_items GROUP BY cafe_id
+    ''')
+
+
+def _add_menu_search_index(cursor):
+    """Create the FTS5 index over menu item text and the triggers that sync it"""
+    # External content table: the index stores tokens only, rows stay in menu_items
+    cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS menu_items_fts USING fts5(
+            name, description, category,
+            content='menu_items', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )
+    ''')
+    old_row = "INSERT INTO menu_items_fts (menu_items_fts, rowid, name, description, category) " \
+              "VALUES ('delete', OLD.id, OLD.name, OLD.description, OLD.category);"
+    new_row = "INSERT INTO menu_items_fts (rowid, name, description, category) " \
+              "VALUES (NEW.id, NEW.name, NEW.description, NEW.category);"
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_menu_items_fts_insert AFTER INSERT ON menu_items
+        BEGIN {new_row} END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_menu_items_fts_delete AFTER DELETE ON menu_items
+        BEGIN {old_row} END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_menu_items_fts_update AFTER UPDATE OF name, description, category ON menu_items
+        BEGIN {old_row} {new_row} END
+    ''')
+    cursor.execute("INSERT INTO menu_items_fts (menu_items_fts) VALUES ('rebuild')")
+
+
+def _add_sales_rollups(cursor):
+    """Create the daily sales rollup tables filled incrementally by rollups.py"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS daily_cafe_sales (
+            day TEXT NOT NULL,
+            cafe_id INTEGER NOT NULL,
+            orders INTEGER NOT NULL DEFAULT 0,
+            revenue REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, cafe_id)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS daily_item_sales (
+            day TEXT NOT NULL,
+            menu_item_id INTEGER NOT NULL,
+            cafe_id INTEGER NOT NULL,
+            quantity INTEGER NOT NULL DEFAULT 0,
+            revenue REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, menu_item_id)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS daily_status_counts (
+            day TEXT NOT NULL,
+            cafe_id INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            orders INTEGER NOT NULL DEFAULT 0,
+            revenue REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, cafe_id, status)
+        ) WITHOUT ROWID
+    ''')
+
+    # High-water marks: the last orders.id folded into the rollups
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS rollup_state (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    cursor.execute("INSERT OR IGNORE INTO rollup_state (name, value) VALUES ('orders', 0)")
+
+    # Orders already rolled up move between statuses in place; closed days are
+    # adjusted by the delta, never re-aggregated
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_orders_status_rollup AFTER UPDATE OF status ON orders
+        WHEN OLD.status IS NOT NEW.status
+         AND NEW.id <= (SELECT value FROM rollup_state WHERE name = 'orders')
+        BEGIN
+            UPDATE daily_status_counts
+            SET orders = orders - 1, revenue = revenue - OLD.total_amount
+            WHERE day = date(OLD.created_at) AND cafe_id = OLD.cafe_id AND status = IFNULL(OLD.status, '');
+            INSERT INTO daily_status_counts (day, cafe_id, status, orders, revenue)
+            VALUES (date(NEW.created_at), NEW.cafe_id, IFNULL(NEW.status, ''), 1, NEW.total_amount)
+            ON CONFLICT(day, cafe_id, status) DO UPDATE
+            SET orders = orders + 1, revenue = revenue + excluded.revenue;
+        END
+    ''')
+
+
+def _add_revoked_sessions(cursor):
+    """Record logged-out session ids until their tokens would have expired"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS revoked_sessions (
+            session_id TEXT PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            expires_at INTEGER NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_revoked_sessions_expires ON revoked_sessions(expires_at)')
+
+
+def _add_order_archive(cursor):
+    """Create archive tables for old finished orders, moved there by archive.py"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS archived_orders (
+            id INTEGER PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            cafe_id INTEGER NOT NULL,
+            total_amount REAL NOT NULL,
+            status TEXT,
+            created_at TIMESTAMP,
+            delivery_address TEXT,
+            contact_number TEXT,
+            payment_method TEXT,
+            jazzcash_tid TEXT,
+            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS archived_order_items (
+            id INTEGER PRIMARY KEY,
+            order_id INTEGER NOT NULL,
+            menu_item_id INTEGER NOT NULL,
+            quantity INTEGER NOT NULL,
+            price REAL NOT NULL
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_archived_orders_user_created ON archived_orders(user_id, created_at)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_archived_order_items_order ON archived_order_items(order_id)')
+    # Lets the archival job find old finished orders without scanning the table
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_orders_status_created ON orders(status, created_at)')
+
+    # Archived orders still count on the dashboards: moving an order adds here
+    # what the orders delete triggers subtract
+    for suffix, name in [('total', "'orders'"), ('status', "'orders:status:' || IFNULL({row}.status, '')")]:
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_archived_orders_{suffix}_insert AFTER INSERT ON archived_orders
+            BEGIN {_bump(name.format(row='NEW'), 1)} END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_archived_orders_{suffix}_delete AFTER DELETE ON archived_orders
+            BEGIN {_bump(name.format(row='OLD'), -1)} END
+        ''')
+
+
+def _add_order_status_timestamps(cursor):
+    """Stamp each order status transition and index the orders cafes still have to act on"""
+    timestamps = [('preparing_at', 'TIMESTAMP'), ('ready_at', 'TIMESTAMP'), ('delivered_at', 'TIMESTAMP'),
+                  ('cancelled_at', 'TIMESTAMP')]
+    add_columns(cursor, 'orders', timestamps)
+    # archive.py copies the columns both tables share
+    add_columns(cursor, 'archived_orders', timestamps)
+    # Only active orders are indexed, so the index stays as small as the
+    # queues; orders.ACTIVE_ORDERS must repeat this WHERE clause
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_orders_active_queue ON orders(cafe_id, id)
+        WHERE status IN ('pending', 'preparing', 'ready')
+    ''')
+
+
+def _add_notification_inbox(cursor):
+    """Index notification inboxes and keep their unread counts in stats_counters"""
+    # Inbox pages walk one of these newest first; id is the keyset cursor
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_notifications_inbox_cafe ON notifications(to_role, cafe_id, id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_notifications_inbox ON notifications(to_role, id)')
+
+    # Each unread notification counts toward its role's inbox and its role's
+    # inbox for its cafe (an empty cafe part for notices to no cafe)
+    names = ["'notifications:unread:' || {row}.to_role",
+             "'notifications:unread:' || {row}.to_role || ':' || IFNULL({row}.cafe_id, '')"]
+    new_names = [name.format(row='NEW') for name in names]
+    old_names = [name.format(row='OLD') for name in names]
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_notifications_unread_insert AFTER INSERT ON notifications
+        WHEN NEW.read = 0
+        BEGIN {''.join(_bump(name, 1) for name in new_names)} END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_notifications_unread_delete AFTER DELETE ON notifications
+        WHEN OLD.read = 0
+        BEGIN {''.join(_bump(name, -1) for name in old_names)} END
+    ''')
+    # An update takes the old row out of its counters and puts the new row in
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_notifications_unread_update_old
+        AFTER UPDATE OF read, to_role, cafe_id ON notifications
+        WHEN OLD.read = 0
+        BEGIN {''.join(_bump(name, -1) for name in old_names)} END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_notifications_unread_update_new
+        AFTER UPDATE OF read, to_role, cafe_id ON notifications
+        WHEN NEW.read = 0
+        BEGIN {''.join(_bump(name, 1) for name in new_names)} END
+    ''')
+
+    # Seed from the notifications that already exist
+    cursor.execute('''
+        INSERT INTO stats_counters (name, value)
+        SELECT 'notifications:unread:' || to_role, COUNT(*) FROM notifications WHERE read = 0 GROUP BY to_role
+        UNION ALL
+        SELECT 'notifications:unread:' || to_role || ':' || IFNULL(cafe_id, ''), COUNT(*)
+        FROM notifications WHERE read = 0 GROUP BY to_role, cafe_id
+        ON CONFLICT(name) DO UPDATE SET value = excluded.value
+    ''')
+
+
+# Ordered list of (version, description, step). Steps must be idempotent and
+# never edited once released; add a new version instead.
+MIGRATIONS = [
+    (1, 'create base tables', _create_base_tables),
+    (2, 'add order payment columns', _add_order_payment_columns),
+    (3, 'add hot path indexes', _add_hot_path_indexes),
+    (4, 'add stats counters', _add_stats_counters),
+    (5, 'add menu search index', _add_menu_search_index),
+    (6, 'add daily sales rollups', _add_sales_rollups),
+    (7, 'add revoked sessions', _add_revoked_sessions),
+    (8, 'add order archive', _add_order_archive),
+    (9, 'add order status timestamps', _add_order_status_timestamps),
+    (10, 'add notification inbox', _add_notification_inbox),
+]
+
+
+def add_columns(cursor, table, columns):
+    """Add each ``(name, definition)`` column that the table does not have yet"""
+    existing = {row[1] for row in cursor.execute(f'PRAGMA table_info({table})')}
+    for name, definition in columns:
+        if name not in existing:
+            cursor.execute(f'ALTER TABLE {table} ADD COLUMN {name} {definition}')
+
+
+def current_version(conn):
+    """Return the highest applied schema version (0 for a new database)"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    row = conn.execute('SELECT MAX(version) FROM schema_version').fetchone()
+    return row[0] or 0
+
+
+def migrate(database):
+    """Apply every pending migration to ``database`` and return the new version.
+
+    Each step runs in its own ``BEGIN IMMEDIATE`` transaction together with
+    its ``schema_version`` row, so a failed step leaves the schema at the
+    previous version and concurrent starters apply each step only once.
+    """
+    conn = sqlite3.connect(database, isolation_level=None)
+    try:
+        version = current_version(conn)
+        for step_version, description, step in MIGRATIONS:
+            if step_version <= version:
+                continue
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                # Another process may have applied it while we waited for the lock
+                if current_version(conn) >= step_version:
+                    conn.execute('ROLLBACK')
+                    continue
+                cursor = conn.cursor()
+                step(cursor)
+                cursor.execute('INSERT INTO schema_version (version, description) VALUES (?, ?)',
+                               (step_version, description))
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+            version = step_version
+        return version
+    finally:
+        conn.close()
@@ -0,0 +1,99 @@
+"""
+Smart Cafe Management System - Notification Inbox
+Fan-out, keyset-paginated inboxes and bulk mark-as-read for notifications
+"""
+
+from responses import encode_rows
+from stats import read_counters
+
+# Inbox page sizes
+DEFAULT_INBOX_SIZE = 20
+MAX_INBOX_SIZE = 100
+
+# Most cafes one notice may name explicitly ('all' has no limit)
+MAX_FANOUT_CAFES = 500
+
+INBOX_COLUMNS = 'id, from_role, to_role, cafe_id, subject, message, read, created_at'
+
+
+def unread_counter(to_role, cafe_id=None):
+    """Name of the trigger-maintained unread counter for an inbox (see migrations.py)"""
+    if cafe_id is None:
+        return f'notifications:unread:{to_role}'
+    return f'notifications:unread:{to_role}:{cafe_id}'
+
+
+def count_unread(conn, to_role, cafe_id=None):
+    """Unread notifications in an inbox, read from its counter instead of COUNT(*)"""
+    name = unread_counter(to_role, cafe_id)
+    return read_counters(conn, [name])[name]
+
+
+def send_notifications(cursor, from_role, to_role, cafe_ids, subject, message):
+    """Insert one notification per cafe in a single statement; returns [(id, cafe_id)].
+
+    ``cafe_ids`` is a list of cafe ids, or ``'all'`` for every active cafe.
+    Ids of cafes that don't exist are skipped. Runs inside the caller's
+    transaction.
+    """
+    if cafe_ids == 'all':
+        condition, params = "status = 'active'", []
+    else:
+        condition, params = f"id IN ({', '.join('?' * len(cafe_ids))})", list(cafe_ids)
+    cursor.execute(f'''
+        INSERT INTO notifications (from_role, to_role, cafe_id, subject, message)
+        SELECT ?, ?, id, ?, ? FROM cafes WHERE {condition}
+        RETURNING id, cafe_id
+    ''', [from_role, to_role, subject, message, *params])
+    return [(row[0], row[1]) for row in cursor.fetchall()]
+
+
+def load_inbox(conn, to_role, cafe_id=None, before=None, limit=DEFAULT_INBOX_SIZE):
+    """Load one page of an inbox, newest first, as ``(encoded rows, next_cursor)``.
+
+    Without ``cafe_id`` the page covers the role's whole inbox. Pages are
+    keyset-paginated on id (``before`` is the previous ``next_cursor``), so
+    every page is one range read of the inbox index however deep it is.
+    ``next_cursor`` is None on the last page.
+    """
+    conditions = ['to_role = ?']
+    params = [to_role]
+    if cafe_id is not None:
+        conditions.append('cafe_id = ?')
+        params.append(cafe_id)
+    if before is not None:
+        conditions.append('id < ?')
+        params.append(before)
+    params.append(limit + 1)
+
+    cursor = conn.cursor()
+    cursor.execute(f'''
+        SELECT {INBOX_COLUMNS} FROM notifications
+        WHERE {' AND '.join(conditions)}
+        ORDER BY id DESC
+        LIMIT ?
+    ''', params)
+    rows = cursor.fetchall()
+    next_cursor = rows[limit - 1][0] if len(rows) > limit else None
+    return encode_rows(cursor, rows[:limit]), next_cursor
+
+
+def mark_read(conn, to_role, cafe_id=None, up_to=None):
+    """Mark every unread notification in an inbox with id <= ``up_to`` as read.
+
+    One UPDATE over the unread part of the (to_role, read) index; the
+    triggers move the unread counters. Returns the number marked.
+    """
+    conditions = ['to_role = ?', 'read = 0']
+    params = [to_role]
+    if cafe_id is not None:
+        conditions.append('cafe_id = ?')
+        params.append(cafe_id)
+    if up_to is not None:
+        conditions.append('id <= ?')
+        params.append(up_to)
+
+    cursor = conn.cursor()
+    cursor.execute(f"UPDATE notifications SET read = 1 WHERE {' AND '.join(conditions)}", params)
+    conn.commit()
+    return cursor.rowcount
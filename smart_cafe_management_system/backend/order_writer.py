@@ -0,0 +1,133 @@
+"""
+Smart Cafe Management System - Group Commit Order Writer
+Coalesces orders that arrive within a few milliseconds into one transaction
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+from orders import insert_orders
+
+
+class OrderWriter:
+    """Background writer that commits queued orders in groups.
+
+    Callers ``submit()`` a prepared order and block on the returned future
+    for its ``order_id``. The writer thread takes the first queued order,
+    keeps collecting for ``window`` seconds (or until ``max_batch``), then
+    inserts the whole group in one transaction. If a group fails, each of
+    its orders is retried alone so one bad order doesn't fail the others.
+
+    A caller that gives up waiting may ``cancel()`` its future. That only
+    succeeds while the order is still queued; the writer skips cancelled
+    orders, so a cancelled order is never committed.
+
+    The writer uses its own connection from ``pool.connect()``, not a pooled
+    one: request threads blocked on its futures may hold every pooled
+    connection between them.
+    """
+
+    def __init__(self, pool, window=0.005, max_batch=64, on_commit=None):
+        self.pool = pool
+        self.window = window
+        self.max_batch = max_batch
+        self.on_commit = on_commit
+        self._stats = {'orders': 0, 'batches': 0, 'failures': 0, 'cancelled': 0}
+        self._start()
+        # Threads don't survive fork(); a forked worker (launcher.py) starts its own
+        os.register_at_fork(after_in_child=self._start)
+
+    def _start(self):
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name='order-writer', daemon=True)
+        self._thread.start()
+
+    def submit(self, order):
+        """Queue a prepared order; the future resolves to its order id"""
+        future = Future()
+        self._queue.put((order, future))
+        return future
+
+    def _collect(self):
+        """Block for one order, then gather whatever arrives within the window.
+
+        Returns only the orders whose callers haven't cancelled them; once
+        collected, an order can no longer be cancelled.
+        """
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        live = [entry for entry in batch if entry[1].set_running_or_notify_cancel()]
+        if len(live) < len(batch):
+            with self._stats_lock:
+                self._stats['cancelled'] += len(batch) - len(live)
+        return live
+
+    def _run(self):
+        conn = None
+        while True:
+            batch = self._collect()
+            if not batch:
+                continue
+            try:
+                if conn is None:
+                    conn = self.pool.connect()
+                self._commit(conn, batch)
+            except Exception as exc:
+                # Never let the writer thread die with callers still waiting
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+
+    def _commit(self, conn, batch):
+        try:
+            order_ids = self._write(conn, [order for order, _ in batch])
+        except sqlite3.Error as exc:
+            if len(batch) == 1:
+                self._fail(batch[0][1], exc)
+                return
+            for entry in batch:
+                self._commit(conn, [entry])
+            return
+
+        with self._stats_lock:
+            self._stats['orders'] += len(batch)
+            self._stats['batches'] += 1
+        for (_, future), order_id in zip(batch, order_ids):
+            future.set_result(order_id)
+        if self.on_commit is not None:
+            self.on_commit(conn)
+
+    def _write(self, conn, orders):
+        cursor = conn.cursor()
+        try:
+            order_ids = insert_orders(cursor, orders)
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        return order_ids
+
+    def _fail(self, future, exc):
+        with self._stats_lock:
+            self._stats['failures'] += 1
+        future.set_exception(exc)
+
+    def stats(self):
+        """Snapshot of group-commit counters"""
+        with self._stats_lock:
+            stats = dict(self._stats, queued=self._queue.qsize())
+        stats['avg_batch'] = round(stats['orders'] / stats['batches'], 2) if stats['batches'] else 0
+        return stats
@@ -0,0 +1,264 @@
+"""
+Smart Cafe Management System - Order Queries
+Set-based loaders for order history, the order status lifecycle and the
+per-cafe queue of active orders
+"""
+
+# Order history page sizes
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# Order lifecycle: status -> statuses it may move to. created_at records
+# 'pending'; every later status has its own timestamp column.
+ORDER_TRANSITIONS = {
+    'pending': ('preparing', 'cancelled'),
+    'preparing': ('ready', 'cancelled'),
+    'ready': ('delivered', 'cancelled'),
+}
+STATUS_TIMESTAMPS = {
+    'preparing': 'preparing_at',
+    'ready': 'ready_at',
+    'delivered': 'delivered_at',
+    'cancelled': 'cancelled_at',
+}
+
+# Orders a cafe still has to act on; must repeat idx_orders_active_queue's WHERE
+# clause exactly, or SQLite won't use the partial index
+ACTIVE_ORDERS = "status IN ('pending', 'preparing', 'ready')"
+MAX_QUEUE_SIZE = 500
+
+# Order columns shown in history; both orders and archived_orders have them
+HISTORY_COLUMNS = ('id, cafe_id, total_amount, status, created_at, preparing_at, ready_at, delivered_at, '
+                   'cancelled_at, delivery_address, contact_number, payment_method, jazzcash_tid')
+
+
+class InvalidTransition(ValueError):
+    """Raised when an order cannot move from its current status to the requested one"""
+
+
+def parse_cursor(after):
+    """Parse an ``<created_at>,<id>`` keyset cursor into a tuple"""
+    if not after:
+        return None
+    created_at, sep, order_id = after.rpartition(',')
+    if not sep or not created_at:
+        raise ValueError('Cursor must look like <created_at>,<id>')
+    return created_at, int(order_id)
+
+
+def make_cursor(order):
+    """Build the keyset cursor that resumes after ``order``"""
+    return f"{order['created_at']},{order['id']}"
+
+
+def load_order_history(conn, user_id, after=None, limit=DEFAULT_PAGE_SIZE):
+    """Load one page of a user's orders, newest first, with their line items.
+
+    Runs two queries regardless of page size: one keyset-paginated scan of
+    the user's orders and one batched fetch of every item on that page.
+    Live and archived orders (see archive.py) are read together: each table
+    yields at most one page from its (user_id, created_at) index and the two
+    are merged. Returns ``(orders, next_cursor)``; ``next_cursor`` is None on
+    the last page.
+    """
+    cursor = conn.cursor()
+    params = [user_id]
+    keyset = ''
+    if after is not None:
+        keyset = 'AND (created_at < ? OR (created_at = ? AND id < ?))'
+        params.extend([after[0], after[0], after[1]])
+    params.append(limit + 1)
+
+    page = f'''
+        SELECT * FROM (
+            SELECT {HISTORY_COLUMNS} FROM {{table}}
+            WHERE user_id = ? {keyset}
+            ORDER BY created_at DESC, id DESC
+            LIMIT ?
+        )'''
+    # Use LEFT JOIN in case cafe doesn't exist (for new installations)
+    cursor.execute(f'''
+        SELECT o.*, COALESCE(c.name, 'Unknown Cafe') as cafe_name
+        FROM ({page.format(table='orders')} UNION ALL {page.format(table='archived_orders')}) o
+        LEFT JOIN cafes c ON o.cafe_id = c.id
+        ORDER BY o.created_at DESC, o.id DESC
+        LIMIT ?
+    ''', params + params + [limit + 1])
+    orders = cursor.fetchall()
+
+    has_more = len(orders) > limit
+    orders = orders[:limit]
+    if not orders:
+        return [], None
+
+    order_ids = [order['id'] for order in orders]
+    placeholders = ', '.join('?' * len(order_ids))
+    items = f'''
+        SELECT oi.order_id, oi.id as order_item_id, oi.quantity, oi.price, mi.name as item_name
+        FROM {{table}} oi
+        JOIN menu_items mi ON oi.menu_item_id = mi.id
+        WHERE oi.order_id IN ({placeholders})
+    '''
+    cursor.execute(f'''
+        {items.format(table='order_items')}
+        UNION ALL
+        {items.format(table='archived_order_items')}
+        ORDER BY order_id, order_item_id
+    ''', order_ids + order_ids)
+
+    items_by_order = {order_id: [] for order_id in order_ids}
+    for item in cursor.fetchall():
+        items_by_order[item['order_id']].append({
+            'name': item['item_name'],
+            'quantity': item['quantity'],
+            'price': item['price']
+        })
+
+    order_list = []
+    for order in orders:
+        order_list.append({
+            'id': order['id'],
+            'cafe_name': order['cafe_name'],
+            'total_amount': order['total_amount'],
+            'status': order['status'],
+            'created_at': order['created_at'],
+            'preparing_at': order['preparing_at'],
+            'ready_at': order['ready_at'],
+            'delivered_at': order['delivered_at'],
+            'cancelled_at': order['cancelled_at'],
+            'delivery_address': order['delivery_address'],
+            'contact_number': order['contact_number'],
+            'payment_method': order['payment_method'],
+            'jazzcash_tid': order['jazzcash_tid'],
+            'items': items_by_order[order['id']]
+        })
+
+    next_cursor = make_cursor(orders[-1]) if has_more else None
+    return order_list, next_cursor
+
+
+def prepare_order(data):
+    """Validate an order payload and normalize it for pricing and ``insert_orders``.
+
+    Raises ValueError with a client-facing message if the payload is invalid.
+    """
+    if not isinstance(data, dict):
+        raise ValueError('Missing required fields')
+    user_id = data.get('user_id')
+    cafe_id = data.get('cafe_id')
+    items = data.get('items')
+
+    if not all([user_id, cafe_id, items]):
+        raise ValueError('Missing required fields')
+
+    # Client prices and totals are ignored; PriceIndex.price_order sets them
+    try:
+        lines = [(item.get('menu_item_id'), int(item.get('quantity', 1))) for item in items]
+    except (AttributeError, TypeError, ValueError):
+        raise ValueError('Invalid order items')
+
+    return {
+        'user_id': user_id,
+        'cafe_id': cafe_id,
+        'total_amount': None,
+        'delivery_address': data.get('delivery_address'),
+        'contact_number': data.get('contact_number'),
+        'payment_method': data.get('payment_method', 'cash'),
+        'jazzcash_tid': data.get('jazzcash_tid'),
+        'items': lines
+    }
+
+
+def insert_orders(cursor, orders):
+    """Insert prepared orders and all of their line items; return the order ids.
+
+    Runs inside the caller's transaction. Each order needs its own INSERT for
+    ``lastrowid``, but every line item across the batch goes in with a single
+    ``executemany``.
+    """
+    order_ids = []
+    line_items = []
+    for order in orders:
+        # Create order with payment info
+        cursor.execute('''
+            INSERT INTO orders (user_id, cafe_id, total_amount, status, delivery_address, contact_number, payment_method, jazzcash_tid)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (order['user_id'], order['cafe_id'], order['total_amount'], 'pending', order['delivery_address'],
+              order['contact_number'], order['payment_method'], order['jazzcash_tid']))
+        order_id = cursor.lastrowid
+        order_ids.append(order_id)
+        line_items.extend((order_id, menu_item_id, quantity, price)
+                          for menu_item_id, quantity, price in order['items'])
+
+    cursor.executemany('''
+        INSERT INTO order_items (order_id, menu_item_id, quantity, price)
+        VALUES (?, ?, ?, ?)
+    ''', line_items)
+    return order_ids
+
+
+def advance_order(conn, order_id, status):
+    """Move an order to ``status`` and stamp the transition; returns the order row.
+
+    The status check and the update are one statement, so two staff screens
+    racing on the same order can't both win. Asking for the status the order
+    already has is a no-op. Returns None if the order doesn't exist (or was
+    archived) and raises InvalidTransition if the move isn't allowed.
+    """
+    column = STATUS_TIMESTAMPS.get(status)
+    if column is None:
+        raise InvalidTransition(f"Unknown status '{status}'")
+    sources = [source for source, targets in ORDER_TRANSITIONS.items() if status in targets]
+    placeholders = ', '.join('?' * len(sources))
+    cursor = conn.cursor()
+    cursor.execute(f'''
+        UPDATE orders SET status = ?, {column} = CURRENT_TIMESTAMP
+        WHERE id = ? AND status IN ({placeholders})
+        RETURNING id, user_id, cafe_id, total_amount, status
+    ''', [status, order_id, *sources])
+    updated = cursor.fetchall()
+    conn.commit()
+    if updated:
+        return updated[0]
+
+    cursor.execute('SELECT id, user_id, cafe_id, total_amount, status FROM orders WHERE id = ?', (order_id,))
+    order = cursor.fetchone()
+    if order is None or order['status'] == status:
+        return order
+    raise InvalidTransition(f"Cannot move a {order['status']} order to {status}")
+
+
+def load_cafe_queue(conn, cafe_id, limit=MAX_QUEUE_SIZE):
+    """Load a cafe's active orders, oldest first, with their line items.
+
+    Reads only the idx_orders_active_queue partial index, which holds just the
+    pending, preparing and ready orders, so the cost follows the queue length
+    and not the order history.
+    """
+    cursor = conn.cursor()
+    cursor.execute(f'''
+        SELECT id, user_id, total_amount, status, created_at, preparing_at, ready_at,
+               delivery_address, contact_number, payment_method
+        FROM orders
+        WHERE cafe_id = ? AND {ACTIVE_ORDERS}
+        ORDER BY id
+        LIMIT ?
+    ''', (cafe_id, limit))
+    orders = cursor.fetchall()
+    if not orders:
+        return []
+
+    order_ids = [order['id'] for order in orders]
+    placeholders = ', '.join('?' * len(order_ids))
+    cursor.execute(f'''
+        SELECT oi.order_id, oi.quantity, mi.name as item_name
+        FROM order_items oi
+        JOIN menu_items mi ON oi.menu_item_id = mi.id
+        WHERE oi.order_id IN ({placeholders})
+        ORDER BY oi.order_id, oi.id
+    ''', order_ids)
+    items_by_order = {order_id: [] for order_id in order_ids}
+    for item in cursor.fetchall():
+        items_by_order[item['order_id']].append({'name': item['item_name'], 'quantity': item['quantity']})
+
+    return [dict(order, items=items_by_order[order['id']]) for order in orders]
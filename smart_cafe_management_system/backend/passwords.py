@@ -0,0 +1,158 @@
+"""
+Smart Cafe Management System - Password Hashing
+Salted scrypt password hashes, computed on a bounded worker pool that rejects
+work up front when it is saturated
+"""
+
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+# scrypt cost: about 16 MiB and tens of milliseconds per hash
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+SALT_BYTES = 16
+KEY_BYTES = 32
+
+# Pool configuration (overridable from the environment). hashlib.scrypt
+# releases the GIL, so threads hash on every core in parallel.
+HASH_WORKERS = int(os.environ.get('SMART_CAFE_HASH_WORKERS', os.cpu_count() or 1))
+HASH_QUEUE = int(os.environ.get('SMART_CAFE_HASH_QUEUE', HASH_WORKERS * 8))
+HASH_TIMEOUT = float(os.environ.get('SMART_CAFE_HASH_TIMEOUT', 5.0))
+
+# Seconds a rejected client is told to wait
+RETRY_AFTER = 1
+
+
+class HasherBusy(Exception):
+    """Raised when the hashing pool cannot take more work"""
+
+    def __init__(self, message='Too many logins in progress, please retry', retry_after=RETRY_AFTER):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _b64(raw):
+    return base64.b64encode(raw).decode().rstrip('=')
+
+
+def _unb64(text):
+    return base64.b64decode(text + '=' * (-len(text) % 4))
+
+
+def _scrypt(password, salt, n, r, p):
+    return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p, dklen=KEY_BYTES,
+                          maxmem=n * r * 256)
+
+
+def hash_password(password):
+    """Hash a password as ``scrypt$n$r$p$salt$key`` (runs on the calling thread)"""
+    salt = secrets.token_bytes(SALT_BYTES)
+    key = _scrypt(password, salt, SCRYPT_N, SCRYPT_R, SCRYPT_P)
+    return f'scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${_b64(salt)}${_b64(key)}'
+
+
+def is_legacy_hash(stored):
+    """True for the unsalted SHA-256 hex digests stored before scrypt"""
+    return len(stored) == 64 and '$' not in stored
+
+
+def verify_password(password, stored):
+    """Check a password against a stored hash; returns (valid, needs_rehash).
+
+    ``stored`` may be an scrypt hash or a legacy SHA-256 digest. A valid
+    password whose hash is legacy or uses older scrypt parameters needs a
+    rehash. ``stored=None`` (unknown user) still pays for one scrypt so that
+    response times don't reveal which emails exist.
+    """
+    if stored is None:
+        _scrypt(password, bytes(SALT_BYTES), SCRYPT_N, SCRYPT_R, SCRYPT_P)
+        return False, False
+    if is_legacy_hash(stored):
+        valid = hmac.compare_digest(hashlib.sha256(password.encode()).hexdigest(), stored)
+        return valid, valid
+    try:
+        scheme, n, r, p, salt, key = stored.split('$')
+        n, r, p = int(n), int(r), int(p)
+        salt, key = _unb64(salt), _unb64(key)
+    except ValueError:
+        return False, False
+    if scheme != 'scrypt':
+        return False, False
+    valid = hmac.compare_digest(_scrypt(password, salt, n, r, p), key)
+    return valid, valid and (n, r, p) != (SCRYPT_N, SCRYPT_R, SCRYPT_P)
+
+
+class PasswordHasher:
+    """Runs hash_password / verify_password on a bounded thread pool.
+
+    At most ``workers`` hashes run at once and ``max_queue`` more may wait;
+    a call beyond that raises HasherBusy immediately instead of queueing, so
+    a login surge is turned away with a 503 rather than piling up request
+    threads. A call whose result takes longer than ``timeout`` seconds also
+    raises HasherBusy. Legacy SHA-256 checks are cheap and skip the pool.
+    """
+
+    def __init__(self, workers=HASH_WORKERS, max_queue=HASH_QUEUE, timeout=HASH_TIMEOUT):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pending = 0
+        self._stats = {'hashed': 0, 'verified': 0, 'rejected': 0, 'timeouts': 0}
+        # Threads don't survive fork(); a forked worker (launcher.py) builds its own pool
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pending = 0
+
+    def _done(self, future):
+        with self._lock:
+            self._pending -= 1
+
+    def _run(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.workers + self.max_queue:
+                self._stats['rejected'] += 1
+                raise HasherBusy()
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='password-hasher')
+            self._pending += 1
+        future = self._executor.submit(fn, *args)
+        future.add_done_callback(self._done)
+        try:
+            return future.result(self.timeout)
+        except FutureTimeout:
+            future.cancel()
+            with self._lock:
+                self._stats['timeouts'] += 1
+            raise HasherBusy('Password check timed out, please retry')
+
+    def hash(self, password):
+        """Hash a new password on the pool"""
+        hashed = self._run(hash_password, password)
+        with self._lock:
+            self._stats['hashed'] += 1
+        return hashed
+
+    def verify(self, password, stored):
+        """verify_password on the pool; returns (valid, needs_rehash)"""
+        if stored is not None and is_legacy_hash(stored):
+            return verify_password(password, stored)
+        result = self._run(verify_password, password, stored)
+        with self._lock:
+            self._stats['verified'] += 1
+        return result
+
+    def stats(self):
+        """Snapshot of pool counters"""
+        with self._lock:
+            return dict(self._stats, pending=self._pending, workers=self.workers, max_queue=self.max_queue)
@@ -0,0 +1,92 @@
+"""
+Smart Cafe Management System - Price Index
+In-memory price/availability lookup used to price orders on the server
+"""
+
+import threading
+
+# Checkout charges, matching the OrderPage summary
+DELIVERY_FEE = 50
+TAX_RATE = 0.05
+
+
+class PricingError(ValueError):
+    """Raised when a cart cannot be priced (unknown, unavailable or foreign item)"""
+
+
+class PriceIndex:
+    """Maps ``menu_item_id`` to ``(cafe_id, price, available)``.
+
+    Loaded from ``menu_items`` on first use and reloaded after
+    ``invalidate()``, which every menu write triggers. Pricing an order is
+    one dict lookup per line with no SQL.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        # Bumped by invalidate(); the index is fresh while it matches the
+        # version the loaded entries were read under
+        self.version = 0
+        self._loaded_version = None
+        self._lock = threading.Lock()
+
+    def load(self, conn):
+        """(Re)load every menu item's price and availability.
+
+        An ``invalidate()`` that lands while the query runs leaves the index
+        stale, so the next order reloads it.
+        """
+        with self._lock:
+            version = self.version
+        cursor = conn.cursor()
+        cursor.execute('SELECT id, cafe_id, price, available FROM menu_items')
+        entries = {row['id']: (row['cafe_id'], row['price'], bool(row['available']))
+                   for row in cursor.fetchall()}
+        with self._lock:
+            self._entries = entries
+            self._loaded_version = version
+
+    @property
+    def stale(self):
+        """True until loaded and again after every menu write"""
+        return self._loaded_version != self.version
+
+    def invalidate(self):
+        """Mark the index stale after a menu write"""
+        with self._lock:
+            self.version += 1
+
+    def price_order(self, order):
+        """Price each line from the menu and set the order total.
+
+        Raises PricingError before any write if a line is unknown,
+        unavailable, from another cafe or has a non-positive quantity.
+        """
+        entries = self._entries
+        try:
+            cafe_id = int(order['cafe_id'])
+        except (TypeError, ValueError):
+            raise PricingError('Invalid cafe')
+
+        lines = []
+        subtotal = 0.0
+        for menu_item_id, quantity in order['items']:
+            try:
+                entry = entries.get(int(menu_item_id))
+            except (TypeError, ValueError):
+                entry = None
+            if entry is None:
+                raise PricingError(f'Unknown menu item {menu_item_id}')
+            item_cafe_id, price, available = entry
+            if item_cafe_id != cafe_id:
+                raise PricingError(f'Menu item {menu_item_id} is not sold by this cafe')
+            if not available:
+                raise PricingError(f'Menu item {menu_item_id} is not available')
+            if quantity < 1:
+                raise PricingError(f'Invalid quantity for menu item {menu_item_id}')
+            lines.append((int(menu_item_id), quantity, price))
+            subtotal += price * quantity
+
+        order['items'] = lines
+        order['total_amount'] = round(subtotal + DELIVERY_FEE + subtotal * TAX_RATE, 2)
+        return order
@@ -0,0 +1,170 @@
+"""
+Smart Cafe Management System - Recommendation Engine
+Item-to-item co-occurrence model kept in memory and refreshed incrementally
+"""
+
+import heapq
+import threading
+from array import array
+from collections import OrderedDict
+
+# Scoring weights
+HISTORY_WEIGHT = 0.5       # affinity for items the user already orders
+POPULARITY_WEIGHT = 0.01   # tie-breaker and cold-start fallback
+RATING_WEIGHT = 1.0        # extra history weight per star in user_preferences
+
+# Users whose recommendations are kept at once; least recently asked go first
+MAX_CACHED_USERS = 5000
+
+
+class RecommendationEngine:
+    """Ranks menu items per user from co-occurrence in past orders.
+
+    Items are mapped to dense positions so popularity and per-request
+    scores live in flat ``array('d')`` vectors. The co-occurrence matrix is
+    sparse (one dict row per item) and user history vectors are sparse
+    ``{position: weight}`` maps. ``refresh()`` folds in only the
+    ``order_items`` rows written since the last call.
+
+    Results are cached per user in an LRU of ``max_cached`` entries. Users
+    with no history or ratings (including ids that don't exist) all get
+    the popularity ranking, so they share a single entry.
+    """
+
+    def __init__(self, limit=5, max_cached=MAX_CACHED_USERS):
+        self.limit = limit
+        self.max_cached = max_cached
+        self.ready = False
+        self.version = 0
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self._items = []            # position -> menu item dict
+        self._positions = {}        # menu_item_id -> position
+        self._popularity = array('d')
+        self._cooc = []             # position -> {position: count}
+        self._history = {}          # user_id -> {position: weight}
+        self._ratings = {}          # user_id -> {position: rating}
+        self._last_order_item_id = 0
+        self._cache = OrderedDict()  # user_id (None for cold start) -> result
+
+    def build(self, conn):
+        """Load the full model from the database"""
+        with self._lock:
+            self._reset()
+            self._load_items(conn)
+
+            cursor = conn.cursor()
+            cursor.execute('SELECT user_id, menu_item_id, rating, order_count FROM user_preferences')
+            for pref in cursor.fetchall():
+                position = self._positions.get(pref['menu_item_id'])
+                if position is None:
+                    continue
+                rating = pref['rating'] or 0
+                weight = (pref['order_count'] or 0) + RATING_WEIGHT * rating
+                if weight:
+                    history = self._history.setdefault(pref['user_id'], {})
+                    history[position] = history.get(position, 0.0) + weight
+                if rating:
+                    self._ratings.setdefault(pref['user_id'], {})[position] = rating
+
+            self._fold_order_items(conn)
+            self.ready = True
+            self.version += 1
+            self._cache.clear()
+
+    def _load_items(self, conn):
+        cursor = conn.cursor()
+        cursor.execute('SELECT * FROM menu_items WHERE available = 1 ORDER BY id')
+        for row in cursor.fetchall():
+            self._positions[row['id']] = len(self._items)
+            self._items.append(dict(row))
+            self._popularity.append(0.0)
+            self._cooc.append({})
+
+    def refresh(self, conn):
+        """Fold in order items written since the last build or refresh"""
+        with self._lock:
+            if not self.ready:
+                self.build(conn)
+            elif self._fold_order_items(conn):
+                self.version += 1
+                self._cache.clear()
+
+    def _fold_order_items(self, conn):
+        """Apply new order_items rows to popularity, co-occurrence and history"""
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT oi.id, oi.order_id, oi.menu_item_id, oi.quantity, o.user_id
+            FROM order_items oi
+            JOIN orders o ON o.id = oi.order_id
+            WHERE oi.id > ?
+            ORDER BY oi.id
+        ''', (self._last_order_item_id,))
+        rows = cursor.fetchall()
+        if not rows:
+            return False
+
+        # An order's items commit in one transaction, so each order arrives whole
+        order_id, user_id, positions = None, None, {}
+        for row in rows:
+            if row['order_id'] != order_id:
+                if order_id is not None:
+                    self._apply_order(user_id, positions)
+                order_id, user_id, positions = row['order_id'], row['user_id'], {}
+            position = self._positions.get(row['menu_item_id'])
+            if position is not None:
+                positions[position] = positions.get(position, 0) + row['quantity']
+        self._apply_order(user_id, positions)
+        self._last_order_item_id = rows[-1]['id']
+        return True
+
+    def _apply_order(self, user_id, positions):
+        """Add one order's items to popularity, co-occurrence and history"""
+        history = self._history.setdefault(user_id, {})
+        for position, quantity in positions.items():
+            self._popularity[position] += quantity
+            history[position] = history.get(position, 0.0) + quantity
+        for a in positions:
+            row = self._cooc[a]
+            for b in positions:
+                if a != b:
+                    row[b] = row.get(b, 0) + 1
+
+    def invalidate(self):
+        """Drop the model so the next refresh rebuilds it (e.g. after menu edits)"""
+        with self._lock:
+            self.ready = False
+            self._cache.clear()
+
+    def recommend(self, user_id):
+        """Return the top menu items for ``user_id``, answered from memory"""
+        with self._lock:
+            history = self._history.get(user_id, {})
+            ratings = self._ratings.get(user_id, {})
+            key = user_id if history or ratings else None
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+
+            scores = array('d', [count * POPULARITY_WEIGHT for count in self._popularity])
+            for position, weight in history.items():
+                scores[position] += HISTORY_WEIGHT * weight
+                for other, count in self._cooc[position].items():
+                    scores[other] += weight * count
+
+            top = heapq.nlargest(self.limit, range(len(scores)),
+                                 key=lambda position: (scores[position], self._popularity[position]))
+            result = []
+            for position in top:
+                item = dict(self._items[position])
+                item['order_count'] = int(self._popularity[position])
+                item['avg_rating'] = ratings.get(position)
+                item['score'] = round(scores[position], 4)
+                result.append(item)
+            self._cache[key] = result
+            if len(self._cache) > self.max_cached:
+                self._cache.popitem(last=False)
+            return result
@@ -0,0 +1,162 @@
+"""
+Smart Cafe Management System - Response Encoding
+Encodes query results straight to JSON text and negotiates gzip/brotli
+compression for response bodies
+"""
+
+import gzip
+import json
+import math
+import os
+from json.encoder import encode_basestring
+
+from flask import Response
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed (overridable from the environment)
+COMPRESS_MIN_SIZE = int(os.environ.get('SMART_CAFE_COMPRESS_MIN', 1024))
+
+# Per-response compression favours speed; payloads compressed once for the
+# menu cache can afford the highest settings
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+PRECOMPRESS_GZIP_LEVEL = 9
+PRECOMPRESS_BROTLI_QUALITY = 11
+
+COMPRESSIBLE_TYPES = ('application/json', 'text/plain', 'text/csv', 'text/html')
+
+# Preferred first
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+class RawJSON:
+    """JSON text that ``compact_json`` embeds without re-encoding"""
+
+    __slots__ = ('text',)
+
+    def __init__(self, text):
+        self.text = text
+
+
+def _encode_float(value):
+    # JSON has no NaN or Infinity
+    return float.__repr__(value) if math.isfinite(value) else 'null'
+
+
+def _encode_other(value):
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False, default=str)
+
+
+_ENCODERS = {
+    str: encode_basestring,
+    int: int.__repr__,
+    float: _encode_float,
+    type(None): lambda value: 'null',
+    bool: lambda value: 'true' if value else 'false',
+}
+
+
+def encode_rows(cursor, rows=None, extra=None):
+    """Encode a query's rows as a JSON array of objects.
+
+    Column names come from ``cursor.description`` and are encoded once per
+    query, not once per row, and rows are never copied into dicts. ``rows``
+    defaults to the rest of the cursor. ``extra(row)`` may return a dict of
+    computed fields to append to each object.
+    """
+    keys = [encode_basestring(column[0]) + ':' for column in cursor.description]
+    prefixes = ['{' + keys[0]] + [',' + key for key in keys[1:]]
+    encoders = _ENCODERS
+    objects = []
+    for row in (cursor if rows is None else rows):
+        text = ''.join([prefix + encoders.get(type(value), _encode_other)(value)
+                        for prefix, value in zip(prefixes, row)])
+        if extra is not None:
+            text += ''.join(',' + encode_basestring(key) + ':' + _encode(value) for key, value in extra(row).items())
+        objects.append(text + '}')
+    return RawJSON('[' + ','.join(objects) + ']')
+
+
+def _encode(value):
+    if isinstance(value, RawJSON):
+        return value.text
+    if isinstance(value, dict):
+        return '{' + ','.join(encode_basestring(str(key)) + ':' + _encode(item) for key, item in value.items()) + '}'
+    return _encode_other(value)
+
+
+def compact_json(payload):
+    """Serialize ``payload`` to compact UTF-8 JSON bytes, embedding RawJSON values as-is"""
+    return _encode(payload).encode('utf-8')
+
+
+def json_response(payload, status=200):
+    """A JSON Response for a payload that may hold ``encode_rows`` results"""
+    return Response(compact_json(payload), status=status, mimetype='application/json')
+
+
+def negotiate(accept_encoding):
+    """Pick the preferred encoding the client accepts ('br', 'gzip' or None)"""
+    qualities = {}
+    for part in (accept_encoding or '').split(','):
+        name, _, params = part.partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[name.strip().lower()] = quality
+    fallback = qualities.get('*', 0.0)
+    for encoding in ENCODINGS:
+        if qualities.get(encoding, fallback) > 0:
+            return encoding
+    return None
+
+
+def compress(body, encoding, best=False):
+    """Compress ``body`` with 'br' or 'gzip'; ``best`` trades time for size"""
+    if encoding == 'br':
+        return brotli.compress(body, quality=PRECOMPRESS_BROTLI_QUALITY if best else BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=PRECOMPRESS_GZIP_LEVEL if best else GZIP_LEVEL, mtime=0)
+
+
+def precompress(body):
+    """Every worthwhile compressed copy of ``body`` as {encoding: bytes}"""
+    if len(body) < COMPRESS_MIN_SIZE:
+        return {}
+    copies = {}
+    for encoding in ENCODINGS:
+        compressed = compress(body, encoding, best=True)
+        if len(compressed) < len(body):
+            copies[encoding] = compressed
+    return copies
+
+
+def compress_response(response, accept_encoding):
+    """Compress a finished response in place if the client accepts it.
+
+    Streamed, already-encoded, non-200 and small responses are left alone.
+    """
+    if (response.status_code != 200 or response.is_streamed or response.direct_passthrough
+            or 'Content-Encoding' in response.headers or response.mimetype not in COMPRESSIBLE_TYPES):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate(accept_encoding)
+    if encoding is None:
+        return response
+    body = response.get_data()
+    if len(body) < COMPRESS_MIN_SIZE:
+        return response
+    response.set_data(compress(body, encoding))
+    response.headers['Content-Encoding'] = encoding
+    if 'ETag' in response.headers:
+        # A compressed body is a different representation
+        etag, weak = response.get_etag()
+        response.set_etag(f'{etag}-{encoding}', weak)
+    return response
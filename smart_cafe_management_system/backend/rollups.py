@@ -0,0 +1,175 @@
+"""
+Smart Cafe Management System - Sales Rollups
+Folds new orders into the daily sales tables and answers analytics queries
+from those tables alone.
+
+Usage:
+    python rollups.py
+"""
+
+import os
+import sqlite3
+import sys
+from datetime import date, timedelta
+
+# Orders folded per transaction, so the write lock is held only briefly
+ROLLUP_BATCH_SIZE = int(os.environ.get('SMART_CAFE_ROLLUP_BATCH', 5000))
+
+DEFAULT_ANALYTICS_DAYS = 30
+DEFAULT_TOP_ITEMS = 10
+MAX_TOP_ITEMS = 100
+
+
+def rollup_mark(conn):
+    """Return the last ``orders.id`` already folded into the rollups"""
+    row = conn.execute("SELECT value FROM rollup_state WHERE name = 'orders'").fetchone()
+    return row[0] if row else 0
+
+
+def _fold(cursor, low, high):
+    """Add orders with ``low < id <= high`` to every rollup table"""
+    cursor.execute('''
+        INSERT INTO daily_cafe_sales (day, cafe_id, orders, revenue)
+        SELECT date(created_at), cafe_id, COUNT(*), SUM(total_amount)
+        FROM orders WHERE id > ? AND id <= ?
+        GROUP BY date(created_at), cafe_id
+        ON CONFLICT(day, cafe_id) DO UPDATE
+        SET orders = orders + excluded.orders, revenue = revenue + excluded.revenue
+    ''', (low, high))
+    cursor.execute('''
+        INSERT INTO daily_item_sales (day, menu_item_id, cafe_id, quantity, revenue)
+        SELECT date(o.created_at), oi.menu_item_id, o.cafe_id, SUM(oi.quantity), SUM(oi.quantity * oi.price)
+        FROM orders o
+        JOIN order_items oi ON oi.order_id = o.id
+        WHERE o.id > ? AND o.id <= ?
+        GROUP BY date(o.created_at), oi.menu_item_id
+        ON CONFLICT(day, menu_item_id) DO UPDATE
+        SET quantity = quantity + excluded.quantity, revenue = revenue + excluded.revenue
+    ''', (low, high))
+    cursor.execute('''
+        INSERT INTO daily_status_counts (day, cafe_id, status, orders, revenue)
+        SELECT date(created_at), cafe_id, IFNULL(status, ''), COUNT(*), SUM(total_amount)
+        FROM orders WHERE id > ? AND id <= ?
+        GROUP BY date(created_at), cafe_id, IFNULL(status, '')
+        ON CONFLICT(day, cafe_id, status) DO UPDATE
+        SET orders = orders + excluded.orders, revenue = revenue + excluded.revenue
+    ''', (low, high))
+    cursor.execute("UPDATE rollup_state SET value = ? WHERE name = 'orders'", (high,))
+
+
+def refresh_rollups(conn, batch_size=ROLLUP_BATCH_SIZE):
+    """Fold every order past the high-water mark into the rollups.
+
+    Each batch reads only ``orders`` rows above the mark (a primary key
+    range) and advances the mark in the same transaction, so every order is
+    counted exactly once and closed days are never re-aggregated. Status
+    changes on orders already folded are applied by a trigger. Returns the
+    number of orders folded.
+
+    The write lock is only taken when ``orders`` has rows past the mark, so
+    an up-to-date refresh is two index reads.
+    """
+    folded = 0
+    while True:
+        newest = conn.execute('SELECT MAX(id) FROM orders').fetchone()[0]
+        if newest is None or newest <= rollup_mark(conn):
+            return folded
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            low = rollup_mark(conn)
+            row = conn.execute('''
+                SELECT MAX(id), COUNT(*) FROM (SELECT id FROM orders WHERE id > ? ORDER BY id LIMIT ?)
+            ''', (low, batch_size)).fetchone()
+            if not row[1]:
+                conn.rollback()
+                return folded
+            _fold(conn.cursor(), low, row[0])
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        folded += row[1]
+
+
+def parse_range(args):
+    """Read ``from``/``to`` (inclusive, YYYY-MM-DD) defaulting to the last 30 days"""
+    try:
+        end = date.fromisoformat(args['to']) if args.get('to') else date.today()
+        start = date.fromisoformat(args['from']) if args.get('from') else end - timedelta(days=DEFAULT_ANALYTICS_DAYS - 1)
+    except ValueError:
+        raise ValueError('Dates must look like YYYY-MM-DD')
+    if start > end:
+        raise ValueError('from must not be after to')
+    return start.isoformat(), end.isoformat()
+
+
+def load_analytics(conn, start, end, cafe_id=None, top=DEFAULT_TOP_ITEMS):
+    """Revenue per cafe per day, top items and the status funnel for a date range"""
+    cafe_filter = 'AND s.cafe_id = ?' if cafe_id is not None else ''
+    params = [start, end] + ([cafe_id] if cafe_id is not None else [])
+    cursor = conn.cursor()
+
+    cursor.execute(f'''
+        SELECT s.day, s.cafe_id, c.name as cafe_name, s.orders, ROUND(s.revenue, 2) as revenue
+        FROM daily_cafe_sales s
+        LEFT JOIN cafes c ON c.id = s.cafe_id
+        WHERE s.day >= ? AND s.day <= ? {cafe_filter}
+        ORDER BY s.day, s.cafe_id
+    ''', params)
+    daily = [dict(row) for row in cursor.fetchall()]
+
+    cursor.execute(f'''
+        SELECT s.menu_item_id, mi.name, s.cafe_id, SUM(s.quantity) as quantity,
+               ROUND(SUM(s.revenue), 2) as revenue
+        FROM daily_item_sales s
+        LEFT JOIN menu_items mi ON mi.id = s.menu_item_id
+        WHERE s.day >= ? AND s.day <= ? {cafe_filter}
+        GROUP BY s.menu_item_id
+        ORDER BY revenue DESC, s.menu_item_id
+        LIMIT ?
+    ''', params + [top])
+    top_items = [dict(row) for row in cursor.fetchall()]
+
+    cursor.execute(f'''
+        SELECT s.status, SUM(s.orders) as orders, ROUND(SUM(s.revenue), 2) as revenue
+        FROM daily_status_counts s
+        WHERE s.day >= ? AND s.day <= ? {cafe_filter}
+        GROUP BY s.status
+        HAVING SUM(s.orders) > 0
+        ORDER BY orders DESC
+    ''', params)
+    funnel = [dict(row) for row in cursor.fetchall()]
+
+    cancelled = sum(step['revenue'] for step in funnel if step['status'] == 'cancelled')
+    gross = round(sum(row['revenue'] for row in daily), 2)
+    return {
+        'from': start,
+        'to': end,
+        'totals': {
+            'orders': sum(row['orders'] for row in daily),
+            'gross_revenue': gross,
+            'net_revenue': round(gross - cancelled, 2)
+        },
+        'daily': daily,
+        'top_items': top_items,
+        'funnel': funnel,
+        'rolled_up_to_order': rollup_mark(conn)
+    }
+
+
+def main(argv):
+    from app import DB_NAME
+    from migrations import migrate
+
+    migrate(DB_NAME)
+    conn = sqlite3.connect(DB_NAME)
+    try:
+        folded = refresh_rollups(conn)
+        print(f'Folded {folded} orders; rollups now cover orders up to id {rollup_mark(conn)}')
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
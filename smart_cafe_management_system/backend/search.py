@@ -0,0 +1,99 @@
+"""
+Smart Cafe Management System - Menu Search
+Ranked FTS5 prefix search over menu items with server-side filters and paging
+"""
+
+import re
+
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 50
+
+# bm25 column weights: name, description, category
+BM25_WEIGHTS = (10.0, 2.0, 5.0)
+
+SORTS = {
+    'relevance': 'rank, mi.id',
+    'price_asc': 'mi.price ASC, mi.id',
+    'price_desc': 'mi.price DESC, mi.id',
+    'name': 'mi.name COLLATE NOCASE, mi.id',
+}
+
+_TERM = re.compile(r'\w+', re.UNICODE)
+
+
+def build_match(query):
+    """Turn free text into an FTS5 query: every word must match as a prefix"""
+    terms = _TERM.findall(query or '')
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def search_menu(conn, query=None, category=None, cafe_id=None, min_price=None, max_price=None,
+                sort=None, page=1, limit=DEFAULT_SEARCH_LIMIT):
+    """Search available items of active cafes; returns ``(items, has_more)``.
+
+    Free text and category go through the FTS index (category is then
+    matched exactly); a cafe filter alone uses the ``(cafe_id, available)``
+    index. Raises ValueError if no query, category or cafe is given; a
+    category with no letters or digits can't use the index, so it needs a
+    query or cafe alongside it.
+    """
+    match = build_match(query)
+    category_terms = _TERM.findall(category or '')
+    if not match and category_terms:
+        # Narrow through the index on the category column, then compare exactly
+        match = 'category : ' + ' '.join(f'"{term}"' for term in category_terms)
+    if not match and cafe_id is None:
+        raise ValueError('Provide a search query, category or cafe_id')
+
+    sort = sort or ('relevance' if build_match(query) else 'name')
+    if sort not in SORTS:
+        raise ValueError(f"Sort must be one of {', '.join(SORTS)}")
+    if sort == 'relevance' and not match:
+        sort = 'name'
+
+    conditions = ['mi.available = 1', "c.status = 'active'"]
+    params = []
+    if match:
+        weights = ', '.join(str(weight) for weight in BM25_WEIGHTS)
+        source = '''
+            menu_items_fts
+            JOIN menu_items mi ON mi.id = menu_items_fts.rowid
+        '''
+        rank = f'bm25(menu_items_fts, {weights})'
+        conditions.insert(0, 'menu_items_fts MATCH ?')
+        params.append(match)
+    else:
+        source = 'menu_items mi'
+        rank = '0'
+    if category:
+        conditions.append('mi.category = ?')
+        params.append(category)
+    if cafe_id is not None:
+        conditions.append('mi.cafe_id = ?')
+        params.append(cafe_id)
+    if min_price is not None:
+        conditions.append('mi.price >= ?')
+        params.append(min_price)
+    if max_price is not None:
+        conditions.append('mi.price <= ?')
+        params.append(max_price)
+    params.extend([limit + 1, (page - 1) * limit])
+
+    cursor = conn.cursor()
+    cursor.execute(f'''
+        SELECT mi.*, c.name as cafe_name, {rank} as rank
+        FROM {source}
+        JOIN cafes c ON c.id = mi.cafe_id
+        WHERE {' AND '.join(conditions)}
+        ORDER BY {SORTS[sort]}
+        LIMIT ? OFFSET ?
+    ''', params)
+    rows = cursor.fetchall()
+
+    items = []
+    for row in rows[:limit]:
+        item = dict(row)
+        # bm25 is lower-is-better; expose it so that higher means more relevant
+        item['relevance'] = round(-item.pop('rank'), 4) or 0.0
+        items.append(item)
+    return items, len(rows) > limit
@@ -0,0 +1,223 @@
+"""
+Smart Cafe Management System - Sessions
+Signed session tokens and an in-memory TTL/LRU cache of the session's user
+"""
+
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+# Session configuration (overridable from the environment)
+SESSION_TTL = int(os.environ.get('SMART_CAFE_SESSION_TTL', 7 * 24 * 3600))
+SESSION_CACHE_TTL = int(os.environ.get('SMART_CAFE_SESSION_CACHE_TTL', 300))
+SESSION_CACHE_SIZE = int(os.environ.get('SMART_CAFE_SESSION_CACHE_SIZE', 10000))
+SWEEP_INTERVAL = 60
+
+# Profile fields cached with each session
+PROFILE_FIELDS = ('id', 'name', 'email', 'student_id', 'phone', 'address', 'role')
+
+
+class InvalidToken(Exception):
+    """Raised for a token that is malformed, forged, expired or revoked"""
+
+    status = 401
+
+
+class SessionMismatch(InvalidToken):
+    """Raised when a request names a different user than its session token"""
+
+    status = 403
+
+
+class NotPermitted(InvalidToken):
+    """Raised when a session's role may not use a route"""
+
+    status = 403
+
+
+class Session:
+    """A verified session and its cached user profile"""
+
+    __slots__ = ('session_id', 'user_id', 'expires_at', 'profile', 'checked_at')
+
+    def __init__(self, session_id, user_id, expires_at, profile, checked_at):
+        self.session_id = session_id
+        self.user_id = user_id
+        self.expires_at = expires_at
+        self.profile = profile
+        self.checked_at = checked_at
+
+    @property
+    def role(self):
+        return self.profile['role']
+
+
+class SessionStore:
+    """Issues signed tokens and caches their sessions in LRU order.
+
+    A token is ``<user_id>.<expires_at>.<session_id>.<signature>`` signed with
+    HMAC-SHA256, so any worker can verify it without shared state. The store
+    only caches: on a miss (another worker issued the token, or the entry was
+    evicted) ``resolve()`` checks the signature and asks ``loader`` for the
+    user once. Cached entries are re-checked through ``loader`` after
+    ``cache_ttl`` seconds, which bounds how long a logout or profile change
+    made in another worker goes unseen here.
+    """
+
+    def __init__(self, secret=None, ttl=SESSION_TTL, cache_ttl=SESSION_CACHE_TTL,
+                 max_entries=SESSION_CACHE_SIZE, sweep_interval=SWEEP_INTERVAL):
+        self.secret = (secret or secrets.token_hex(32)).encode()
+        self.ttl = ttl
+        self.cache_ttl = cache_ttl
+        self.max_entries = max_entries
+        self.sweep_interval = sweep_interval
+        self._sessions = OrderedDict()
+        self._by_user = {}
+        self._lock = threading.Lock()
+        self._stats = {'issued': 0, 'hits': 0, 'misses': 0, 'rechecks': 0, 'rejected': 0,
+                       'revoked': 0, 'expired': 0, 'evicted': 0}
+        self._start_sweeper()
+        # Threads don't survive fork(); a forked worker (launcher.py) starts its own
+        os.register_at_fork(after_in_child=self._start_sweeper)
+
+    def _start_sweeper(self):
+        thread = threading.Thread(target=self._sweep_forever, name='session-sweeper', daemon=True)
+        thread.start()
+
+    def _sign(self, payload):
+        digest = hmac.new(self.secret, payload.encode(), hashlib.sha256).digest()
+        return base64.urlsafe_b64encode(digest).rstrip(b'=').decode()
+
+    def parse(self, token):
+        """Verify a token's signature and expiry; returns (user_id, expires_at, session_id)"""
+        try:
+            payload, signature = token.rsplit('.', 1)
+            user_id, expires_at, session_id = payload.split('.', 2)
+            user_id, expires_at = int(user_id), int(expires_at)
+        except (AttributeError, ValueError):
+            raise InvalidToken('Malformed session token')
+        if not hmac.compare_digest(signature, self._sign(payload)):
+            raise InvalidToken('Invalid session token')
+        if expires_at <= time.time():
+            raise InvalidToken('Session expired')
+        return user_id, expires_at, session_id
+
+    def issue(self, user):
+        """Start a session for a user row and return its token"""
+        expires_at = int(time.time()) + self.ttl
+        session_id = secrets.token_urlsafe(18)
+        payload = f"{user['id']}.{expires_at}.{session_id}"
+        self._put(Session(session_id, user['id'], expires_at, profile_of(user), time.monotonic()))
+        with self._lock:
+            self._stats['issued'] += 1
+        return f'{payload}.{self._sign(payload)}'
+
+    def resolve(self, token, loader):
+        """Return the Session for ``token``, raising InvalidToken.
+
+        ``loader(session_id, user_id)`` returns the user row, or None if the
+        session was revoked or the user no longer exists; it is only called
+        on a cache miss or when a cached entry is due for a re-check.
+        """
+        try:
+            user_id, expires_at, session_id = self.parse(token)
+        except InvalidToken:
+            with self._lock:
+                self._stats['rejected'] += 1
+            raise
+
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None and now - session.checked_at < self.cache_ttl:
+                self._sessions.move_to_end(session_id)
+                self._stats['hits'] += 1
+                return session
+            self._stats['rechecks' if session is not None else 'misses'] += 1
+
+        user = loader(session_id, user_id)
+        if user is None:
+            self.forget(session_id)
+            with self._lock:
+                self._stats['rejected'] += 1
+            raise InvalidToken('Session ended')
+        session = Session(session_id, user_id, expires_at, profile_of(user), now)
+        self._put(session)
+        return session
+
+    def _put(self, session):
+        with self._lock:
+            self._drop(session.session_id)
+            self._sessions[session.session_id] = session
+            self._by_user.setdefault(session.user_id, set()).add(session.session_id)
+            while len(self._sessions) > self.max_entries:
+                oldest = next(iter(self._sessions))
+                self._drop(oldest)
+                self._stats['evicted'] += 1
+
+    def _drop(self, session_id):
+        """Remove one entry; the caller holds the lock"""
+        session = self._sessions.pop(session_id, None)
+        if session is not None:
+            user_sessions = self._by_user.get(session.user_id)
+            if user_sessions is not None:
+                user_sessions.discard(session_id)
+                if not user_sessions:
+                    del self._by_user[session.user_id]
+        return session
+
+    def forget(self, session_id):
+        """Drop a session from this process's cache"""
+        with self._lock:
+            return self._drop(session_id) is not None
+
+    def revoke(self, session_id):
+        """Forget a session at logout (the caller records it as revoked)"""
+        self.forget(session_id)
+        with self._lock:
+            self._stats['revoked'] += 1
+
+    def invalidate_user(self, user_id):
+        """Drop every cached session of a user, e.g. after a profile update"""
+        with self._lock:
+            for session_id in list(self._by_user.get(user_id, ())):
+                self._drop(session_id)
+
+    def sweep(self):
+        """Evict expired sessions; returns how many were removed"""
+        now = time.time()
+        with self._lock:
+            expired = [session_id for session_id, session in self._sessions.items() if session.expires_at <= now]
+            for session_id in expired:
+                self._drop(session_id)
+            self._stats['expired'] += len(expired)
+        return len(expired)
+
+    def _sweep_forever(self):
+        while True:
+            time.sleep(self.sweep_interval)
+            self.sweep()
+
+    def stats(self):
+        """Snapshot of store counters"""
+        with self._lock:
+            return dict(self._stats, sessions=len(self._sessions), users=len(self._by_user))
+
+
+def profile_of(user):
+    """The cached profile fields of a user row or dict"""
+    keys = user.keys()
+    return {field: user[field] if field in keys else None for field in PROFILE_FIELDS}
+
+
+def bearer_token(headers):
+    """The token from an ``Authorization: Bearer`` header, or None"""
+    scheme, _, token = headers.get('Authorization', '').partition(' ')
+    if scheme.lower() != 'bearer' or not token.strip():
+        return None
+    return token.strip()
@@ -0,0 +1,81 @@
+"""
+Smart Cafe Management System - Stats Counters
+Reads the trigger-maintained dashboard counters and reconciles them with the
+real row counts.
+
+Usage:
+    python stats.py [--fix]
+"""
+
+import sqlite3
+import sys
+
+# Queries giving the true value of every counter, as (name, value) rows
+TRUE_COUNTS = '''
+    SELECT 'users:role:' || IFNULL(role, ''), COUNT(*) FROM users GROUP BY role
+    UNION ALL SELECT 'cafes', COUNT(*) FROM cafes
+    UNION ALL SELECT 'orders', (SELECT COUNT(*) FROM orders) + (SELECT COUNT(*) FROM archived_orders)
+    UNION ALL SELECT 'orders:status:' || IFNULL(status, ''), COUNT(*) FROM (
+        SELECT status FROM orders UNION ALL SELECT status FROM archived_orders
+    ) GROUP BY status
+    UNION ALL SELECT 'menu_items:cafe:' || cafe_id, COUNT(*) FROM menu_items GROUP BY cafe_id
+    UNION ALL SELECT 'notifications:unread:' || to_role, COUNT(*) FROM notifications WHERE read = 0 GROUP BY to_role
+    UNION ALL SELECT 'notifications:unread:' || to_role || ':' || IFNULL(cafe_id, ''), COUNT(*)
+        FROM notifications WHERE read = 0 GROUP BY to_role, cafe_id
+'''
+
+
+def read_counters(conn, names):
+    """Return ``{name: value}`` for ``names``; missing counters read as 0"""
+    placeholders = ', '.join('?' * len(names))
+    cursor = conn.cursor()
+    cursor.execute(f'SELECT name, value FROM stats_counters WHERE name IN ({placeholders})', list(names))
+    values = dict.fromkeys(names, 0)
+    values.update((row[0], row[1]) for row in cursor.fetchall())
+    return values
+
+
+def reconcile(conn, fix=False):
+    """Compare every counter with the real count and return the drifted ones.
+
+    Returns ``[(name, counter_value, true_value)]``. With ``fix=True`` the
+    drifted counters are overwritten with the true values in one transaction.
+    """
+    cursor = conn.cursor()
+    true_counts = {row[0]: row[1] for row in cursor.execute(TRUE_COUNTS)}
+    counters = {row[0]: row[1] for row in cursor.execute('SELECT name, value FROM stats_counters')}
+
+    drift = []
+    for name in sorted(set(true_counts) | set(counters)):
+        expected = true_counts.get(name, 0)
+        actual = counters.get(name, 0)
+        if expected != actual:
+            drift.append((name, actual, expected))
+
+    if fix and drift:
+        cursor.executemany('''
+            INSERT INTO stats_counters (name, value) VALUES (?, ?)
+            ON CONFLICT(name) DO UPDATE SET value = excluded.value
+        ''', [(name, expected) for name, _, expected in drift])
+        conn.commit()
+    return drift
+
+
+def main(argv):
+    from app import DB_NAME
+    from migrations import migrate
+
+    migrate(DB_NAME)
+    conn = sqlite3.connect(DB_NAME)
+    try:
+        drift = reconcile(conn, fix='--fix' in argv)
+    finally:
+        conn.close()
+    for name, actual, expected in drift:
+        print(f'{name}: counter={actual} actual={expected}')
+    print(f'{len(drift)} counters drifted' if drift else 'All counters match')
+    return 1 if drift else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
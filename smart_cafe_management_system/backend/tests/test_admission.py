@@ -0,0 +1,137 @@
+"""
+Smart Cafe Management System - Admission Control Tests
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from admission import AdmissionController, Lane, Overloaded, RateLimited, default_lanes
+
+
+def controller(capacity=1, max_waiting=4, **lanes):
+    return AdmissionController(capacity, max_waiting, lanes=lanes)
+
+
+def wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.001)
+
+
+class Waiter(threading.Thread):
+    """Calls admit() in the background and records the ticket or the exception"""
+
+    def __init__(self, admission, lane):
+        super().__init__()
+        self.admission = admission
+        self.lane = lane
+        self.result = None
+
+    def run(self):
+        try:
+            self.result = self.admission.admit(self.lane)
+        except Overloaded as error:
+            self.result = error
+
+
+def start_waiting(admission, lane):
+    before = admission.stats()['queued']
+    waiter = Waiter(admission, lane)
+    waiter.start()
+    wait_for(lambda: admission.stats()['queued'] > before)
+    return waiter
+
+
+def test_lane_limit_queues_then_expires():
+    admission = AdmissionController(2, 4, lanes={'reports': Lane('reports', 2, max_concurrent=1, max_wait=0.01)})
+    ticket = admission.admit('reports')
+    with pytest.raises(Overloaded):
+        admission.admit('reports')
+    stats = admission.stats()
+    assert stats['expired'] == 1 and stats['waiting'] == 0
+    admission.release(ticket)
+    admission.release(admission.admit('reports'))
+    assert admission.stats()['in_flight'] == 0
+
+
+def test_rate_limit_is_per_client():
+    admission = controller(capacity=10, api=Lane('api', 1, rate=0.5, burst=2))
+    for _ in range(2):
+        admission.release(admission.admit('api', 'ip:1'))
+    with pytest.raises(RateLimited) as shed:
+        admission.admit('api', 'ip:1')
+    assert shed.value.status == 429 and shed.value.retry_after == 2
+    admission.release(admission.admit('api', 'ip:2'))
+    for _ in range(3):
+        admission.release(admission.admit('api'))
+    assert admission.stats()['rate_limited'] == 1
+
+
+def test_release_serves_higher_priority_first():
+    admission = controller(high=Lane('high', 0), low=Lane('low', 2))
+    ticket = admission.admit('high')
+    low = start_waiting(admission, 'low')
+    high = start_waiting(admission, 'high')
+    admission.release(ticket)
+    high.join()
+    assert high.result.outcome == 'granted'
+    assert low.result is None
+    admission.release(high.result)
+    low.join()
+    assert low.result.outcome == 'granted'
+    admission.release(low.result)
+
+
+def test_full_queue_evicts_lower_priority_or_sheds():
+    admission = controller(max_waiting=1, high=Lane('high', 0), low=Lane('low', 2))
+    ticket = admission.admit('high')
+    low = start_waiting(admission, 'low')
+    high = start_waiting(admission, 'high')
+    low.join()
+    assert isinstance(low.result, Overloaded)
+    with pytest.raises(Overloaded):
+        admission.admit('low')
+    stats = admission.stats()
+    assert (stats['evicted'], stats['queue_full'], stats['low_shed']) == (1, 1, 2)
+    admission.release(ticket)
+    high.join()
+    admission.release(high.result)
+
+
+def test_admit_async_waits_on_the_loop():
+    admission = controller(api=Lane('api', 1))
+    ticket = admission.admit('api')
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.01, admission.release, ticket)
+        return await admission.admit_async('api')
+
+    granted = asyncio.run(scenario())
+    assert granted.outcome == 'granted'
+    admission.release(granted)
+
+
+def test_default_lanes_rate_limits_are_opt_in():
+    assert default_lanes(8, rate_limits=False)['auth'].rate is None
+    lanes = default_lanes(8, rate_limits=True)
+    assert lanes['auth'].max_concurrent == 4 and lanes['auth'].rate == 10
+    assert lanes['orders'].priority < lanes['reports'].priority
+
+
+def test_shed_requests_get_retry_after(client, app_module, monkeypatch):
+    admission = AdmissionController(1, 0, lanes=default_lanes(1))
+    monkeypatch.setattr(app_module, 'admission', admission)
+    ticket = admission.admit('default')
+    try:
+        response = client.get('/api/menu/cafes')
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == '1'
+    finally:
+        admission.release(ticket)
+    assert client.get('/api/menu/cafes').status_code == 200
+    assert admission.stats()['in_flight'] == 0
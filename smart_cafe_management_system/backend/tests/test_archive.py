@@ -0,0 +1,73 @@
+"""
+Smart Cafe Management System - Order Archive Tests
+"""
+
+import pytest
+
+from archive import archive_orders
+from orders import load_order_history
+from rollups import load_analytics, refresh_rollups
+from stats import reconcile
+
+
+@pytest.fixture
+def orders(db, make_user):
+    """Orders of one user by (status, age); returns (user_id, {name: order_id})"""
+    user_id = make_user('regular@test.com')
+    ids = {}
+    for name, status, age in [('old_delivered', 'delivered', 200), ('old_cancelled', 'cancelled', 120),
+                              ('old_pending', 'pending', 200), ('recent_delivered', 'delivered', 5)]:
+        ids[name] = db.execute('INSERT INTO orders (user_id, cafe_id, total_amount, status, created_at) '
+                               "VALUES (?, 1, 400, ?, datetime('now', ?))",
+                               (user_id, status, f'-{age} days')).lastrowid
+        db.execute('INSERT INTO order_items (order_id, menu_item_id, quantity, price) VALUES (?, 1, 1, 350)',
+                   (ids[name],))
+    db.commit()
+    return user_id, ids
+
+
+def live_ids(db):
+    return {row[0] for row in db.execute('SELECT id FROM orders')}
+
+
+def test_moves_only_old_finished_orders(db, orders):
+    _, ids = orders
+    assert archive_orders(db, days=90, batch_size=1, pause=0) == 2
+    archived = {row[0] for row in db.execute('SELECT id FROM archived_orders')}
+    assert archived == {ids['old_delivered'], ids['old_cancelled']}
+    assert not archived & live_ids(db)
+    items = db.execute('SELECT order_id FROM archived_order_items ORDER BY order_id').fetchall()
+    assert [row[0] for row in items] == sorted(archived)
+    assert db.execute('SELECT COUNT(*) FROM order_items WHERE order_id IN (?, ?)',
+                      tuple(archived)).fetchone()[0] == 0
+    assert archive_orders(db, days=90, pause=0) == 0
+
+
+def test_counters_and_analytics_are_unchanged(db, orders):
+    refresh_rollups(db)
+    before = load_analytics(db, '2000-01-01', '2999-12-31')
+    archive_orders(db, days=90, pause=0)
+    assert reconcile(db) == []
+    after = load_analytics(db, '2000-01-01', '2999-12-31')
+    assert after['totals'] == before['totals']
+    assert after['funnel'] == before['funnel']
+
+
+def test_history_still_lists_archived_orders(db, orders):
+    user_id, ids = orders
+    archive_orders(db, days=90, pause=0)
+    history, _ = load_order_history(db, user_id, limit=10)
+    assert {order['id'] for order in history} == set(ids.values())
+    archived = next(order for order in history if order['id'] == ids['old_delivered'])
+    assert archived['status'] == 'delivered'
+    assert len(archived['items']) == 1
+
+
+def test_exports_include_archived_orders(client, db, orders, admin_headers):
+    _, ids = orders
+    archive_orders(db, days=90, pause=0)
+    response = client.get('/api/admin/exports/orders?format=ndjson&from=2000-01-01&to=2999-12-31',
+                          headers=admin_headers)
+    assert response.status_code == 200
+    exported = response.get_data(as_text=True)
+    assert f'"order_id":{ids["old_delivered"]}' in exported.replace(' ', '')
@@ -0,0 +1,87 @@
+"""
+Smart Cafe Management System - ASGI Server Tests
+"""
+
+import asyncio
+import time
+
+import pytest
+
+import asgi
+
+
+def call(application, path, headers=(), method='GET', query=''):
+    """Run one request through ``application``; returns (status, {header: [values]}, body)"""
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {'type': 'http', 'method': method, 'path': path, 'query_string': query.encode(), 'root_path': '',
+             'headers': [(name.lower().encode(), value.encode()) for name, value in headers],
+             'http_version': '1.1', 'scheme': 'http', 'server': ('localhost', 80), 'client': ('127.0.0.1', 1)}
+    asyncio.run(application(scope, receive, send))
+    response_headers = {}
+    for name, value in messages[0]['headers']:
+        response_headers.setdefault(name.decode().lower(), []).append(value.decode())
+    return messages[0]['status'], response_headers, b''.join(m.get('body', b'') for m in messages[1:])
+
+
+def cors_only(headers):
+    return {name: values for name, values in headers.items() if name.startswith('access-control-') or name == 'vary'}
+
+
+@pytest.mark.parametrize('request_headers', [(), (('Origin', 'http://localhost:3000'),)])
+def test_fast_path_cors_matches_flask(app_module, request_headers):
+    application = asgi.ASGIApp(app_module.app)
+    fast_before = application.stats()['fast_path']
+    # The first request goes through Flask and fills the menu cache
+    status, flask_headers, _ = call(application, '/api/menu/cafes', request_headers)
+    assert status == 200
+    status, fast_headers, _ = call(application, '/api/menu/cafes', request_headers)
+    assert status == 200
+    assert application.stats()['fast_path'] == fast_before + 1
+    expected = cors_only(flask_headers)
+    expected['vary'] = [value for value in expected.get('vary', []) if value != 'Accept-Encoding']
+    fast = cors_only(fast_headers)
+    fast['vary'] = [value for value in fast.get('vary', []) if value != 'Accept-Encoding']
+    assert fast == expected
+    assert 'access-control-allow-origin' in fast
+
+
+def test_event_loop_errors_carry_cors_headers(app_module):
+    status, headers, _ = call(asgi.ASGIApp(app_module.app), '/api/stream', (('Origin', 'http://localhost:3000'),),
+                              query='cafe_id=1')
+    assert status == 401
+    assert headers['access-control-allow-origin'] == ['http://localhost:3000']
+
+
+def test_shutdown_drains_without_blocking_the_loop(app_module):
+    application = asgi.ASGIApp(app_module.app)
+    application.preloaded = True
+    ticks = []
+
+    async def main():
+        messages = asyncio.Queue()
+        for message in ('lifespan.startup', 'lifespan.shutdown'):
+            messages.put_nowait({'type': message})
+        sent = []
+
+        async def send(message):
+            sent.append(message['type'])
+
+        async def tick():
+            while 'lifespan.shutdown.complete' not in sent:
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.01)
+
+        # An in-flight handler that takes a while to finish
+        application.executor.submit(time.sleep, 0.3)
+        await asyncio.gather(application({'type': 'lifespan'}, messages.get, send), tick())
+        return sent
+
+    assert asyncio.run(main()) == ['lifespan.startup.complete', 'lifespan.shutdown.complete']
+    assert len(ticks) > 5
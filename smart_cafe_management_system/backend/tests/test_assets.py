@@ -0,0 +1,66 @@
+"""
+Smart Cafe Management System - Image Store Tests
+"""
+
+import io
+import os
+
+import pytest
+
+from assets import AssetStore
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+def write_image(path, width=8):
+    if Image is None:
+        data = b'\x89PNG\r\n\x1a\n' + b'\0' * 32
+    else:
+        buffer = io.BytesIO()
+        Image.new('RGB', (width, width), 'red').save(buffer, format='PNG')
+        data = buffer.getvalue()
+    with open(path, 'wb') as handle:
+        handle.write(data)
+
+
+@pytest.fixture
+def store(tmp_path):
+    os.mkdir(tmp_path / 'images')
+    write_image(tmp_path / 'images' / 'tea.png')
+    store = AssetStore(image_dir=str(tmp_path / 'images'), cache_dir=str(tmp_path / 'cache'), widths=())
+    store.load()
+    return store
+
+
+def test_urls_for_known_image(store):
+    urls = store.urls_for('/images/tea.png')
+    assert list(urls) == ['original']
+    file_name = urls['original'].rsplit('/', 1)[1]
+    assert store.get(file_name).content_type == 'image/png'
+
+
+def test_missing_image_is_looked_up_once(store, monkeypatch):
+    checks = []
+    isfile = os.path.isfile
+    monkeypatch.setattr(os.path, 'isfile', lambda path: checks.append(path) or isfile(path))
+    for _ in range(3):
+        assert store.urls_for('/images/coffee.png') == {}
+    assert len(checks) == 1
+    assert store.stats()['missing'] == 1
+
+
+def test_forgetting_misses_picks_up_new_images(store, tmp_path):
+    assert store.urls_for('coffee.png') == {}
+    write_image(tmp_path / 'images' / 'coffee.png')
+    assert store.urls_for('coffee.png') == {}
+    store.forget_missing()
+    assert 'original' in store.urls_for('coffee.png')
+    assert store.stats()['missing'] == 0
+
+
+def test_unknown_request_names_are_not_remembered(store):
+    assert store.get('nothing.0123456789ab.png') is None
+    assert store.stats()['missing'] == 0
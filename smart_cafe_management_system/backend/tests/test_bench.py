@@ -0,0 +1,84 @@
+"""
+Smart Cafe Management System - Benchmark Harness Tests
+"""
+
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'bench'))
+
+import compare  # noqa: E402
+import datagen  # noqa: E402
+import run  # noqa: E402
+from migrations import migrate  # noqa: E402
+from stats import reconcile  # noqa: E402
+
+
+@pytest.fixture
+def bench_db(tmp_path):
+    database = str(tmp_path / 'bench.db')
+    migrate(database)
+    conn = sqlite3.connect(database)
+    try:
+        counts = datagen.generate(conn, 50, seed=7)
+    finally:
+        conn.close()
+    return database, counts
+
+
+def test_generated_data_keeps_counters_consistent(bench_db):
+    database, counts = bench_db
+    assert counts['users'] == 50 and counts['orders'] > 0
+    conn = sqlite3.connect(database)
+    try:
+        assert reconcile(conn) == []
+    finally:
+        conn.close()
+
+
+def test_context_picks_real_ids(bench_db):
+    database, _ = bench_db
+    ctx = run.Context(database)
+    assert ctx.user_ids and len(ctx.emails) == len(ctx.user_ids)
+    assert all(ctx.menu[cafe_id] for cafe_id in ctx.cafe_ids)
+
+
+def test_percentile_and_summary():
+    values = [0.001 * n for n in range(1, 101)]
+    assert run.percentile(values, 0.50) == pytest.approx(0.050)
+    assert run.percentile(values, 0.99) == pytest.approx(0.099)
+    assert run.percentile([], 0.5) == 0.0
+    summary = run.summarize([(value, value < 0.1) for value in values], elapsed=2.0)
+    assert summary['requests'] == 100
+    assert summary['errors'] == 1
+    assert summary['throughput_rps'] == 50.0
+    assert summary['max_ms'] == pytest.approx(100.0)
+
+
+def test_run_counts_failed_requests_as_errors(bench_db):
+    database, _ = bench_db
+
+    class FlakyTransport:
+        def request(self, method, path, body):
+            if method == 'POST':
+                raise ConnectionError('refused')
+            return 200
+
+    samples, _ = run.run(FlakyTransport(), run.Context(database), 'mixed', concurrency=2,
+                         duration=0.2, warmup=0, seed=1)
+    assert all(ok for _, ok in samples['GET /api/menu/cafes'])
+    assert not any(ok for _, ok in samples['POST /api/user/orders'])
+
+
+def test_compare_reports_percent_change():
+    def result(rps, p50):
+        stats = {'throughput_rps': rps, 'p50_ms': p50, 'p95_ms': 0, 'p99_ms': 0}
+        return {'overall': stats, 'endpoints': {'GET /x': stats}}
+
+    rows = compare.compare(result(100, 10), result(150, 5))
+    assert ('GET /x', 'throughput_rps', 100, 150, 50.0) in rows
+    assert ('overall', 'p50_ms', 10, 5, -50.0) in rows
+    assert ('overall', 'p95_ms', 0, 0, None) in rows
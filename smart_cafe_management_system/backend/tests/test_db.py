@@ -0,0 +1,64 @@
+"""
+Smart Cafe Management System - Connection Pool Tests
+"""
+
+import threading
+
+import pytest
+
+from db import ConnectionPool, PoolTimeout
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(str(tmp_path / 'pool.db'), max_size=2, timeout=0.05)
+    yield pool
+    pool.close_all()
+
+
+def test_connections_are_configured(pool):
+    conn = pool.acquire()
+    assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    assert conn.execute('PRAGMA busy_timeout').fetchone()[0] == 5000
+    pool.release(conn)
+
+
+def test_thread_gets_its_own_connection_back(pool):
+    first, second = pool.acquire(), pool.acquire()
+    pool.release(first)
+    pool.release(second)
+    assert pool.acquire() is second
+    stats = pool.stats()
+    assert (stats['open'], stats['hits'], stats['misses']) == (2, 1, 2)
+
+
+def test_full_pool_times_out(pool):
+    held = [pool.acquire(), pool.acquire()]
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+    assert pool.stats()['timeouts'] == 1
+    for conn in held:
+        pool.release(conn)
+
+
+def test_waiter_gets_a_released_connection(pool):
+    pool.timeout = 5
+    held = [pool.acquire(), pool.acquire()]
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(pool.acquire()))
+    waiter.start()
+    pool.release(held[0])
+    waiter.join(5)
+    assert got == [held[0]]
+
+
+def test_release_rolls_back_open_transactions(pool):
+    conn = pool.acquire()
+    conn.execute('CREATE TABLE t (id INTEGER)')
+    conn.execute('INSERT INTO t VALUES (1)')
+    assert conn.in_transaction
+    pool.release(conn)
+    conn = pool.acquire()
+    assert not conn.in_transaction
+    assert conn.execute('SELECT COUNT(*) FROM t').fetchone()[0] == 0
+    pool.release(conn)
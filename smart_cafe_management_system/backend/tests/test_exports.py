@@ -0,0 +1,49 @@
+"""
+Smart Cafe Management System - Order Export Tests
+"""
+
+import pytest
+
+EXPORT_ROUTES = ['/api/admin/exports/orders', '/api/food-authority/exports/orders']
+
+
+@pytest.fixture
+def order(client, make_user, login):
+    make_user('buyer@test.com')
+    headers = login('buyer@test.com')
+    response = client.post('/api/user/orders', headers=headers, json={
+        'cafe_id': 1, 'items': [{'menu_item_id': 1, 'quantity': 2}], 'delivery_address': 'Hostel 4'})
+    assert response.status_code == 200
+    return response.json['order_id']
+
+
+@pytest.mark.parametrize('path', EXPORT_ROUTES)
+def test_export_needs_a_session(client, order, path):
+    response = client.get(path)
+    assert response.status_code == 401
+    assert b'Hostel 4' not in response.data
+
+
+@pytest.mark.parametrize('path', EXPORT_ROUTES)
+def test_export_refuses_other_roles(client, order, login, path):
+    assert client.get(path, headers=login('buyer@test.com')).status_code == 403
+
+
+def test_admin_export_streams_csv(client, order, admin_headers):
+    response = client.get('/api/admin/exports/orders', headers=admin_headers)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/csv'
+    assert b'Hostel 4' in response.data
+
+
+def test_food_authority_export(client, order, make_user, login):
+    make_user('inspector@test.com', role='food_authority')
+    headers = login('inspector@test.com')
+    assert client.get('/api/food-authority/exports/orders?format=ndjson', headers=headers).status_code == 200
+    assert client.get('/api/admin/exports/orders', headers=headers).status_code == 403
+
+
+def test_refused_export_leaves_the_pool_alone(app_module, client):
+    before = app_module.pool.stats()['in_use']
+    client.get('/api/admin/exports/orders')
+    assert app_module.pool.stats()['in_use'] == before
@@ -0,0 +1,57 @@
+"""
+Smart Cafe Management System - Cache Invalidation Channel Tests
+"""
+
+import multiprocessing
+
+import pytest
+
+from invalidation import InvalidationChannel
+
+
+def publish_in_child(channel):
+    """Bump the channel from a forked process, as another worker would"""
+    process = multiprocessing.get_context('fork').Process(target=channel.publish)
+    process.start()
+    process.join()
+    assert process.exitcode == 0
+
+
+def test_poll_reports_each_foreign_publish_once():
+    channel = InvalidationChannel()
+    assert not channel.poll()
+    publish_in_child(channel)
+    assert channel.generation == 1
+    assert channel.poll()
+    assert not channel.poll()
+    assert channel.stats() == {'generation': 1, 'published': 0, 'received': 1}
+
+
+def test_own_publish_is_not_received():
+    channel = InvalidationChannel()
+    channel.publish()
+    assert not channel.poll()
+    assert channel.stats() == {'generation': 1, 'published': 1, 'received': 0}
+
+
+@pytest.fixture
+def channel(app_module, monkeypatch):
+    channel = InvalidationChannel()
+    monkeypatch.setattr(app_module, 'cache_channel', channel)
+    return channel
+
+
+def test_menu_write_publishes(client, channel, admin_headers):
+    client.post('/api/admin/cafes', json={'name': 'Channel Cafe'}, headers=admin_headers)
+    assert channel.published == 1
+
+
+def test_foreign_publish_drops_local_caches(client, app_module, channel):
+    client.get('/api/menu/cafes')
+    version = app_module.menu_cache.version
+    publish_in_child(channel)
+    client.get('/api/menu/cafes')
+    assert app_module.menu_cache.version == version + 1
+    assert app_module.price_index.stale
+    client.get('/api/menu/cafes')
+    assert app_module.menu_cache.version == version + 1
@@ -0,0 +1,65 @@
+"""
+Smart Cafe Management System - Menu Cache Tests
+"""
+
+from menu_cache import MenuCache, Uncached
+
+
+def test_hits_until_invalidated():
+    cache = MenuCache()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return {'items': len(calls)}
+
+    first = cache.get('cafes', loader)
+    assert cache.get('cafes', loader) is first
+    cache.invalidate()
+    assert cache.get('cafes', loader).body == b'{"items":2}'
+    assert len(calls) == 2
+    assert cache.stats()['invalidations'] == 1
+
+
+def test_uncached_payload_is_served_but_not_stored():
+    cache = MenuCache()
+    entry = cache.get(('items', 999), lambda: Uncached({'items': []}))
+    assert entry.body == b'{"items":[]}'
+    assert cache.peek(('items', 999)) is None
+
+
+def test_least_recently_served_entry_is_dropped():
+    cache = MenuCache(max_entries=2)
+    for key in ('a', 'b'):
+        cache.get(key, lambda: {})
+    cache.get('a', lambda: {})
+    cache.get('c', lambda: {})
+    assert cache.peek('b') is None
+    assert cache.peek('a') is not None
+    assert cache.stats()['entries'] == 2
+
+
+def test_route_answers_304_and_refreshes_after_a_menu_write(client, admin_headers):
+    response = client.get('/api/menu/cafes')
+    etag = response.headers['ETag']
+    assert client.get('/api/menu/cafes', headers={'If-None-Match': etag}).status_code == 304
+
+    created = client.post('/api/admin/cafes', json={'name': 'Cache Check Cafe'}, headers=admin_headers)
+    assert created.status_code in (200, 201)
+    response = client.get('/api/menu/cafes', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_compressed_copy_has_its_own_etag():
+    cache = MenuCache()
+    entry = cache.get('big', lambda: {'items': ['latte'] * 500})
+    encoding, body = entry.select('gzip')
+    assert encoding == 'gzip' and len(body) < len(entry.body)
+    assert entry.etag_for('gzip') != entry.etag_for(None)
+    assert entry.select('identity') == (None, entry.body)
+
+
+def test_unknown_cafe_is_not_cached(client, app_module):
+    assert client.get('/api/menu/cafes/424242/items').json['items'] == []
+    assert app_module.menu_cache.peek(('items', 424242)) is None
@@ -0,0 +1,54 @@
+"""
+Smart Cafe Management System - SQL Profiling Tests
+"""
+
+import sqlite3
+
+import pytest
+
+from metrics import InstrumentedConnection, metrics, normalize_sql
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(':memory:', factory=InstrumentedConnection)
+    conn.execute('CREATE TABLE t (id INTEGER PRIMARY KEY)')
+    conn.executemany('INSERT INTO t (id) VALUES (?)', [(n,) for n in range(100)])
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def reported(monkeypatch):
+    """Row counts passed to metrics.observe_rows, one entry per call"""
+    calls = []
+    monkeypatch.setattr(metrics, 'observe_rows', calls.append)
+    return calls
+
+
+def test_iteration_reports_rows_once(conn, reported):
+    assert len(list(conn.execute('SELECT id FROM t'))) == 100
+    assert reported == [100]
+
+
+def test_partial_iteration_reports_on_next_statement_or_close(conn, reported):
+    cursor = conn.execute('SELECT id FROM t')
+    for _ in range(10):
+        next(cursor)
+    cursor.execute('SELECT id FROM t WHERE id < 3')
+    assert reported == [10]
+    next(cursor)
+    cursor.close()
+    assert reported == [10, 1]
+
+
+def test_fetch_methods_report_each_call(conn, reported):
+    cursor = conn.execute('SELECT id FROM t')
+    cursor.fetchone()
+    cursor.fetchmany(30)
+    cursor.fetchall()
+    assert reported == [1, 30, 69]
+
+
+def test_normalize_sql_collapses_in_lists():
+    assert normalize_sql('SELECT *\n  FROM t WHERE id IN (?, ?,?)') == 'SELECT * FROM t WHERE id IN (?...)'
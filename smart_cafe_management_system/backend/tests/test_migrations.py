@@ -0,0 +1,63 @@
+"""
+Smart Cafe Management System - Schema Migration Tests
+"""
+
+import sqlite3
+
+import pytest
+
+import migrations
+from migrations import MIGRATIONS, migrate
+
+
+def schema(database):
+    conn = sqlite3.connect(database)
+    try:
+        return sorted(conn.execute("SELECT type, name, sql FROM sqlite_master WHERE name NOT LIKE 'sqlite_%'"))
+    finally:
+        conn.close()
+
+
+def test_migrate_is_idempotent(tmp_path):
+    database = str(tmp_path / 'fresh.db')
+    latest = MIGRATIONS[-1][0]
+    assert migrate(database) == latest
+    before = schema(database)
+    assert migrate(database) == latest
+    assert schema(database) == before
+    conn = sqlite3.connect(database)
+    versions = [row[0] for row in conn.execute('SELECT version FROM schema_version ORDER BY version')]
+    conn.close()
+    assert versions == [version for version, _, _ in MIGRATIONS]
+
+
+def test_pre_migration_database_is_upgraded_in_place(tmp_path):
+    database = str(tmp_path / 'legacy.db')
+    conn = sqlite3.connect(database)
+    migrations._create_base_tables(conn.cursor())
+    conn.execute("INSERT INTO users (name, email, password) VALUES ('Old', 'old@test.com', 'x')")
+    conn.commit()
+    conn.close()
+
+    migrate(database)
+    conn = sqlite3.connect(database)
+    assert conn.execute('SELECT email FROM users').fetchall() == [('old@test.com',)]
+    order_columns = {row[1] for row in conn.execute('PRAGMA table_info(orders)')}
+    conn.close()
+    assert {'payment_method', 'preparing_at', 'cancelled_at'} <= order_columns
+
+
+def test_failed_step_leaves_the_previous_version(tmp_path, monkeypatch):
+    database = str(tmp_path / 'broken.db')
+
+    def broken(cursor):
+        cursor.execute('CREATE TABLE half_done (id INTEGER)')
+        raise sqlite3.OperationalError('boom')
+
+    monkeypatch.setattr(migrations, 'MIGRATIONS', MIGRATIONS[:2] + [(3, 'broken step', broken)])
+    with pytest.raises(sqlite3.OperationalError):
+        migrate(database)
+    conn = sqlite3.connect(database)
+    assert conn.execute('SELECT MAX(version) FROM schema_version').fetchone()[0] == 2
+    assert not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'half_done'").fetchone()
+    conn.close()
@@ -0,0 +1,99 @@
+"""
+Smart Cafe Management System - Notification Inbox Tests
+"""
+
+import json
+
+import pytest
+
+from notifications import count_unread, load_inbox, mark_read, send_notifications
+from stats import reconcile
+
+
+@pytest.fixture
+def cafes(db):
+    """Ids of three active cafes and one closed one"""
+    active = [1] + [db.execute('INSERT INTO cafes (name) VALUES (?)', (f'Cafe {n}',)).lastrowid for n in (2, 3)]
+    closed = db.execute("INSERT INTO cafes (name, status) VALUES ('Closed Cafe', 'inactive')").lastrowid
+    db.commit()
+    return active, closed
+
+
+def send(db, cafe_ids, subject='Inspection'):
+    sent = send_notifications(db.cursor(), 'food_authority', 'admin', cafe_ids, subject, 'Body')
+    db.commit()
+    return sent
+
+
+def test_fan_out_to_listed_and_active_cafes(db, cafes):
+    active, closed = cafes
+    sent = send(db, [active[0], closed, 999999])
+    assert sorted(cafe_id for _, cafe_id in sent) == [active[0], closed]
+    everyone = send(db, 'all')
+    assert sorted(cafe_id for _, cafe_id in everyone) == active
+    assert count_unread(db, 'admin') == 5
+    assert count_unread(db, 'admin', active[0]) == 2
+    assert reconcile(db) == []
+
+
+def test_inbox_pages_newest_first_without_gaps(db, cafes):
+    active, _ = cafes
+    for n in range(3):
+        send(db, 'all', f'Round {n}')
+    expected = [row[0] for row in db.execute("SELECT id FROM notifications WHERE to_role = 'admin' ORDER BY id DESC")]
+
+    seen, before = [], None
+    while True:
+        page, before = load_inbox(db, 'admin', before=before, limit=4)
+        seen.extend(item['id'] for item in json.loads(page.text))
+        if before is None:
+            break
+    assert seen == expected
+
+    page, next_cursor = load_inbox(db, 'admin', cafe_id=active[1], limit=3)
+    assert {item['cafe_id'] for item in json.loads(page.text)} == {active[1]}
+    assert next_cursor is None
+    assert json.loads(load_inbox(db, 'food_authority')[0].text) == []
+
+
+def test_mark_read_up_to_an_id(db, cafes):
+    active, _ = cafes
+    first = send(db, 'all')
+    send(db, 'all')
+    newest_seen = max(notification_id for notification_id, _ in first)
+    assert mark_read(db, 'admin', up_to=newest_seen) == 3
+    assert count_unread(db, 'admin') == 3
+    assert mark_read(db, 'admin', cafe_id=active[0]) == 1
+    assert count_unread(db, 'admin', active[0]) == 0
+    assert count_unread(db, 'admin') == 2
+    assert mark_read(db, 'admin', cafe_id=active[0]) == 0
+    assert reconcile(db) == []
+
+
+def test_routes_send_page_and_mark_read(client, cafes):
+    active, _ = cafes
+    response = client.post('/api/food-authority/notifications',
+                           json={'cafe_ids': 'all', 'subject': 'Audit', 'message': 'Next week'})
+    assert response.status_code == 200
+    assert len(response.json['notification_ids']) == len(active)
+
+    page = client.get('/api/admin/notifications?limit=2').json
+    assert page['unread'] == len(active) and len(page['notifications']) == 2
+    rest = client.get(f"/api/admin/notifications?limit=2&before={page['next_cursor']}").json
+    assert rest['next_cursor'] is None
+    assert len(page['notifications']) + len(rest['notifications']) == len(active)
+
+    marked = client.post('/api/admin/notifications/read', json={'up_to': page['notifications'][0]['id']}).json
+    assert marked == {'success': True, 'marked': len(active), 'unread': 0}
+
+
+@pytest.mark.parametrize('call', [
+    ('GET', '/api/admin/notifications?before=x', None),
+    ('POST', '/api/admin/notifications/read', {'up_to': 'x'}),
+    ('POST', '/api/food-authority/notifications', {'cafe_ids': [], 'subject': 'S', 'message': 'M'}),
+    ('POST', '/api/food-authority/notifications', {'cafe_ids': ['1'], 'subject': 'S', 'message': 'M'}),
+    ('POST', '/api/food-authority/notifications', {'cafe_ids': 'all', 'subject': 'S'}),
+])
+def test_routes_reject_bad_input(client, call):
+    method, path, body = call
+    assert client.open(path, method=method, json=body).status_code == 400
@@ -0,0 +1,61 @@
+"""
+Smart Cafe Management System - Order History Pagination Tests
+"""
+
+import pytest
+
+from orders import load_order_history, make_cursor, parse_cursor
+
+
+@pytest.fixture
+def history(db, make_user):
+    """Seven orders for one user, five of them sharing a timestamp; returns their ids newest first"""
+    user_id = make_user('buyer@test.com')
+    times = ['2024-01-01 10:00:00'] * 5 + ['2024-01-02 09:00:00', '2023-12-31 08:00:00']
+    for created_at in times:
+        cursor = db.execute('INSERT INTO orders (user_id, cafe_id, total_amount, status, created_at) '
+                            "VALUES (?, 1, 350, 'pending', ?)", (user_id, created_at))
+        db.execute('INSERT INTO order_items (order_id, menu_item_id, quantity, price) VALUES (?, 1, 1, 350)',
+                   (cursor.lastrowid,))
+    # Another user's order must never show up
+    db.execute("INSERT INTO orders (user_id, cafe_id, total_amount, status) VALUES (1, 1, 10, 'pending')")
+    db.commit()
+    rows = db.execute('SELECT id FROM orders WHERE user_id = ? ORDER BY created_at DESC, id DESC', (user_id,))
+    return user_id, [row['id'] for row in rows]
+
+
+def test_cursor_round_trip():
+    assert parse_cursor(make_cursor({'created_at': '2024-01-01 10:00:00', 'id': 7})) == ('2024-01-01 10:00:00', 7)
+    assert parse_cursor(None) is None
+    for bad in ('7', ',7', '2024-01-01,x'):
+        with pytest.raises(ValueError):
+            parse_cursor(bad)
+
+
+def test_pages_cover_every_order_once_across_ties(db, history):
+    user_id, expected = history
+    seen, after = [], None
+    while True:
+        orders, next_cursor = load_order_history(db, user_id, after, limit=2)
+        assert len(orders) <= 2
+        seen.extend(order['id'] for order in orders)
+        if next_cursor is None:
+            break
+        after = parse_cursor(next_cursor)
+    assert seen == expected
+
+
+def test_orders_carry_their_items(db, history):
+    user_id, _ = history
+    orders, next_cursor = load_order_history(db, user_id, limit=10)
+    assert next_cursor is None
+    assert all(order['items'] == [{'name': order['items'][0]['name'], 'quantity': 1, 'price': 350}]
+               for order in orders)
+
+
+def test_history_route_pages(client, history, login):
+    headers = login('buyer@test.com')
+    first = client.get('/api/user/orders?limit=3', headers=headers).json
+    second = client.get(f"/api/user/orders?limit=3&after={first['next_cursor']}", headers=headers).json
+    assert [order['id'] for order in first['orders'] + second['orders']] == history[1][:6]
+    assert client.get('/api/user/orders?after=bogus', headers=headers).status_code == 400
@@ -0,0 +1,77 @@
+"""
+Smart Cafe Management System - Order Lifecycle Tests
+"""
+
+import pytest
+
+from orders import InvalidTransition, advance_order
+
+
+@pytest.fixture
+def buyer(make_user, login):
+    make_user('buyer@test.com')
+    return login('buyer@test.com')
+
+
+@pytest.fixture
+def order_id(client, buyer):
+    response = client.post('/api/user/orders', headers=buyer, json={
+        'cafe_id': 1, 'items': [{'menu_item_id': 1, 'quantity': 1}]})
+    assert response.status_code == 200
+    return response.json['order_id']
+
+
+def test_status_update_needs_a_session(client, order_id):
+    assert client.put(f'/api/admin/orders/{order_id}', json={'status': 'cancelled'}).status_code == 401
+
+
+def test_status_update_refuses_customers(client, order_id, buyer):
+    response = client.put(f'/api/admin/orders/{order_id}', headers=buyer, json={'status': 'cancelled'})
+    assert response.status_code == 403
+
+
+def test_order_moves_through_the_lifecycle(client, order_id, admin_headers):
+    for status in ('preparing', 'ready', 'delivered'):
+        response = client.put(f'/api/admin/orders/{order_id}', headers=admin_headers, json={'status': status})
+        assert response.status_code == 200
+        assert response.json['order']['status'] == status
+
+
+def test_skipped_or_backward_moves_are_conflicts(client, order_id, admin_headers):
+    response = client.put(f'/api/admin/orders/{order_id}', headers=admin_headers, json={'status': 'delivered'})
+    assert response.status_code == 409
+    client.put(f'/api/admin/orders/{order_id}', headers=admin_headers, json={'status': 'preparing'})
+    client.put(f'/api/admin/orders/{order_id}', headers=admin_headers, json={'status': 'ready'})
+    response = client.put(f'/api/admin/orders/{order_id}', headers=admin_headers, json={'status': 'preparing'})
+    assert response.status_code == 409
+
+
+def test_unknown_status_and_order(client, order_id, admin_headers):
+    assert client.put(f'/api/admin/orders/{order_id}', headers=admin_headers,
+                      json={'status': 'eaten'}).status_code == 400
+    assert client.put('/api/admin/orders/999999', headers=admin_headers,
+                      json={'status': 'ready'}).status_code == 404
+
+
+def test_advance_order_transitions(db, order_id):
+    assert advance_order(db, order_id, 'preparing')['status'] == 'preparing'
+    # Repeating the current status is a no-op
+    assert advance_order(db, order_id, 'preparing')['status'] == 'preparing'
+    assert advance_order(db, order_id, 'cancelled')['status'] == 'cancelled'
+    with pytest.raises(InvalidTransition):
+        advance_order(db, order_id, 'ready')
+    row = db.execute('SELECT preparing_at, cancelled_at, ready_at FROM orders WHERE id = ?', (order_id,)).fetchone()
+    assert row['preparing_at'] and row['cancelled_at'] and row['ready_at'] is None
+
+
+def test_cafe_queue_needs_staff(client, order_id, buyer, admin_headers):
+    assert client.get('/api/admin/cafes/1/queue').status_code == 401
+    assert client.get('/api/admin/cafes/1/queue?wait=5&after=0', headers=buyer).status_code == 403
+    response = client.get('/api/admin/cafes/1/queue', headers=admin_headers)
+    assert response.status_code == 200
+    assert [order['id'] for order in response.json['orders']] == [order_id]
+
+
+def test_finished_orders_leave_the_queue(client, order_id, admin_headers):
+    client.put(f'/api/admin/orders/{order_id}', headers=admin_headers, json={'status': 'cancelled'})
+    assert client.get('/api/admin/cafes/1/queue', headers=admin_headers).json['orders'] == []
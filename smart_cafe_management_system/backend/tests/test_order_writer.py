@@ -0,0 +1,57 @@
+"""
+Smart Cafe Management System - Group Commit Tests
+"""
+
+import time
+
+import pytest
+
+from order_writer import OrderWriter
+
+ORDER = {'cafe_id': 1, 'items': [{'menu_item_id': 1, 'quantity': 1}]}
+
+
+def count_orders(db):
+    return db.execute('SELECT COUNT(*) FROM orders').fetchone()[0]
+
+
+@pytest.fixture
+def buyer(make_user, login):
+    make_user('buyer@test.com')
+    return login('buyer@test.com')
+
+
+def test_cancelled_orders_are_never_written(app_module, db, buyer):
+    writer = OrderWriter(app_module.pool, window=0.3)
+    first = writer.submit(app_module.price_order(dict(ORDER, user_id=2)))
+    second = writer.submit(app_module.price_order(dict(ORDER, user_id=2)))
+    # Both are still inside the collection window, so either may be withdrawn
+    assert second.cancel()
+    assert first.result(timeout=5)
+    assert count_orders(db) == 1
+    assert writer.stats()['cancelled'] == 1
+
+
+def test_timed_out_order_is_withdrawn(app_module, client, db, buyer, monkeypatch):
+    monkeypatch.setattr(app_module, 'order_writer', OrderWriter(app_module.pool, window=0.5))
+    monkeypatch.setattr(app_module, 'GROUP_COMMIT_TIMEOUT', 0.05)
+    response = client.post('/api/user/orders', headers=buyer, json=ORDER)
+    assert response.status_code == 503
+    time.sleep(0.6)
+    assert count_orders(db) == 0
+
+
+def test_order_being_written_is_waited_for(app_module, client, db, buyer, monkeypatch):
+    writer = OrderWriter(app_module.pool, window=0)
+    write = writer._write
+
+    def slow_write(conn, orders):
+        time.sleep(0.3)
+        return write(conn, orders)
+
+    monkeypatch.setattr(writer, '_write', slow_write)
+    monkeypatch.setattr(app_module, 'order_writer', writer)
+    monkeypatch.setattr(app_module, 'GROUP_COMMIT_TIMEOUT', 0.05)
+    response = client.post('/api/user/orders', headers=buyer, json=ORDER)
+    assert response.status_code == 200
+    assert count_orders(db) == 1
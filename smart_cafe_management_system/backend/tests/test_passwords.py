@@ -0,0 +1,106 @@
+"""
+Smart Cafe Management System - Password Hashing Tests
+"""
+
+import hashlib
+import threading
+
+import pytest
+
+import passwords
+from passwords import HasherBusy, PasswordHasher, hash_password, is_legacy_hash, verify_password
+
+
+def test_scrypt_round_trip():
+    stored = hash_password('secret1')
+    assert stored.startswith('scrypt$') and not is_legacy_hash(stored)
+    assert stored != hash_password('secret1')
+    assert verify_password('secret1', stored) == (True, False)
+    assert verify_password('secret2', stored) == (False, False)
+
+
+def test_legacy_and_outdated_hashes_need_a_rehash(monkeypatch):
+    legacy = hashlib.sha256(b'secret1').hexdigest()
+    assert is_legacy_hash(legacy)
+    assert verify_password('secret1', legacy) == (True, True)
+    assert verify_password('wrong', legacy) == (False, False)
+
+    monkeypatch.setattr(passwords, 'SCRYPT_N', 2 ** 10)
+    cheap = hash_password('secret1')
+    monkeypatch.undo()
+    assert verify_password('secret1', cheap) == (True, True)
+
+
+@pytest.mark.parametrize('stored', [None, 'garbage', 'bcrypt$1$2$3$c2FsdA$a2V5', 'scrypt$x$8$1$c2FsdA$a2V5'])
+def test_unknown_user_and_malformed_hashes_fail(stored):
+    assert verify_password('secret1', stored) == (False, False)
+
+
+def blocked_hasher(**options):
+    """A hasher whose single worker is held until the returned event is set"""
+    hasher = PasswordHasher(workers=1, **options)
+    release = threading.Event()
+    started = threading.Event()
+
+    def hold():
+        started.set()
+        release.wait(5)
+
+    caller = threading.Thread(target=hasher._run, args=(hold,))
+    caller.start()
+    started.wait(5)
+    return hasher, release, caller
+
+
+def test_saturated_pool_rejects_immediately():
+    hasher, release, caller = blocked_hasher(max_queue=0)
+    try:
+        with pytest.raises(HasherBusy):
+            hasher.hash('secret1')
+        assert hasher.stats()['rejected'] == 1
+    finally:
+        release.set()
+        caller.join()
+    assert hasher.hash('secret1').startswith('scrypt$')
+    assert hasher.stats()['pending'] == 0
+
+
+def test_slow_result_times_out(monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(passwords, 'verify_password', lambda password, stored: release.wait(5))
+    hasher = PasswordHasher(workers=1, timeout=0.05)
+    try:
+        with pytest.raises(HasherBusy, match='timed out'):
+            hasher.verify('secret1', hash_password('secret1'))
+        assert hasher.stats()['timeouts'] == 1
+    finally:
+        release.set()
+
+
+def test_legacy_checks_skip_the_pool():
+    hasher, release, caller = blocked_hasher(max_queue=0)
+    try:
+        assert hasher.verify('secret1', hashlib.sha256(b'secret1').hexdigest()) == (True, True)
+    finally:
+        release.set()
+        caller.join()
+
+
+def test_login_upgrades_a_legacy_hash(client, db):
+    db.execute("INSERT INTO users (name, email, password) VALUES ('Old', 'old@cafe.com', ?)",
+               (hashlib.sha256(b'secret1').hexdigest(),))
+    db.commit()
+    response = client.post('/api/auth/login', json={'email': 'old@cafe.com', 'password': 'secret1'})
+    assert response.status_code == 200
+    stored = db.execute("SELECT password FROM users WHERE email = 'old@cafe.com'").fetchone()[0]
+    assert stored.startswith('scrypt$')
+    assert verify_password('secret1', stored) == (True, False)
+
+
+def test_busy_hasher_answers_503(client, app_module, monkeypatch):
+    def busy(password, stored):
+        raise HasherBusy()
+    monkeypatch.setattr(app_module.password_hasher, 'verify', busy)
+    response = client.post('/api/auth/login', json={'email': 'admin@cafe.com', 'password': 'admin123'})
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
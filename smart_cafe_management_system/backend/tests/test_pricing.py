@@ -0,0 +1,111 @@
+"""
+Smart Cafe Management System - Order Pricing Tests
+"""
+
+import pytest
+
+from price_index import DELIVERY_FEE, TAX_RATE, PriceIndex, PricingError
+
+
+@pytest.fixture
+def index(db):
+    index = PriceIndex()
+    index.load(db)
+    return index
+
+
+@pytest.fixture
+def menu(db):
+    """{cafe_id: [(menu_item_id, price)]} of available items"""
+    menu = {}
+    for row in db.execute('SELECT id, cafe_id, price FROM menu_items WHERE available = 1 ORDER BY id'):
+        menu.setdefault(row['cafe_id'], []).append((row['id'], row['price']))
+    return menu
+
+
+def order(cafe_id, *lines):
+    return {'cafe_id': cafe_id, 'items': list(lines)}
+
+
+def test_prices_from_the_menu(index, menu):
+    cafe_id, items = next(iter(menu.items()))
+    (first, first_price), (second, second_price) = items[:2]
+    priced = index.price_order(order(cafe_id, (first, 2), (second, 1)))
+    subtotal = first_price * 2 + second_price
+    assert priced['items'] == [(first, 2, first_price), (second, 1, second_price)]
+    assert priced['total_amount'] == round(subtotal + DELIVERY_FEE + subtotal * TAX_RATE, 2)
+
+
+@pytest.mark.parametrize('quantity', [0, -1])
+def test_rejects_bad_quantities(index, menu, quantity):
+    cafe_id, items = next(iter(menu.items()))
+    with pytest.raises(PricingError, match='Invalid quantity'):
+        index.price_order(order(cafe_id, (items[0][0], quantity)))
+
+
+def test_rejects_unknown_and_foreign_items(db, index, menu):
+    cafe_id = sorted(menu)[0]
+    with pytest.raises(PricingError, match='Unknown menu item'):
+        index.price_order(order(cafe_id, (999999, 1)))
+    with pytest.raises(PricingError, match='Unknown menu item'):
+        index.price_order(order(cafe_id, ('latte', 1)))
+    other_cafe = db.execute("INSERT INTO cafes (name) VALUES ('Other Cafe')").lastrowid
+    foreign = db.execute("INSERT INTO menu_items (cafe_id, name, price) VALUES (?, 'Tea', 90)",
+                         (other_cafe,)).lastrowid
+    db.commit()
+    index.load(db)
+    with pytest.raises(PricingError, match='not sold by this cafe'):
+        index.price_order(order(cafe_id, (foreign, 1)))
+    with pytest.raises(PricingError, match='Invalid cafe'):
+        index.price_order(order('nowhere', (foreign, 1)))
+
+
+def test_rejects_unavailable_items_after_reload(db, index, menu):
+    cafe_id, items = next(iter(menu.items()))
+    item_id = items[0][0]
+    db.execute('UPDATE menu_items SET available = 0 WHERE id = ?', (item_id,))
+    db.commit()
+    assert not index.stale
+    index.invalidate()
+    assert index.stale
+    index.load(db)
+    with pytest.raises(PricingError, match='not available'):
+        index.price_order(order(cafe_id, (item_id, 1)))
+
+
+@pytest.mark.parametrize('payload, message', [
+    (None, 'Missing required fields'),
+    ({'user_id': 2, 'cafe_id': 1, 'items': []}, 'Missing required fields'),
+    ({'user_id': 2, 'cafe_id': 1, 'items': ['latte']}, 'Invalid order items'),
+    ({'user_id': 2, 'cafe_id': 1, 'items': [{'menu_item_id': 1, 'quantity': 'two'}]}, 'Invalid order items'),
+])
+def test_app_rejects_malformed_payloads(app_module, payload, message):
+    with pytest.raises(ValueError, match=message):
+        app_module.price_order(payload)
+
+
+def test_route_ignores_client_prices(client, db, make_user, login, menu):
+    make_user('buyer@cafe.com')
+    headers = login('buyer@cafe.com')
+    cafe_id, items = next(iter(menu.items()))
+    item_id, price = items[0]
+    response = client.post('/api/user/orders', headers=headers, json={
+        'cafe_id': cafe_id, 'total_amount': 1,
+        'items': [{'menu_item_id': item_id, 'quantity': 2, 'price': 1}]})
+    assert response.status_code == 200, response.json
+    expected = round(price * 2 * (1 + TAX_RATE) + DELIVERY_FEE, 2)
+    assert response.json['total_amount'] == pytest.approx(expected)
+    row = db.execute('SELECT price FROM order_items WHERE order_id = ?', (response.json['order_id'],)).fetchone()
+    assert row['price'] == price
+
+
+def test_route_rejects_with_400_before_writing(client, db, make_user, login, menu):
+    make_user('buyer@cafe.com')
+    headers = login('buyer@cafe.com')
+    before = db.execute('SELECT COUNT(*) FROM orders').fetchone()[0]
+    cafe_id = sorted(menu)[0]
+    response = client.post('/api/user/orders', headers=headers,
+                           json={'cafe_id': cafe_id, 'items': [{'menu_item_id': 999999, 'quantity': 1}]})
+    assert response.status_code == 400
+    assert 'Unknown menu item' in response.json['message']
+    assert db.execute('SELECT COUNT(*) FROM orders').fetchone()[0] == before
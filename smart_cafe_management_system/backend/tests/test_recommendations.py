@@ -0,0 +1,62 @@
+"""
+Smart Cafe Management System - Recommendation Engine Tests
+"""
+
+import pytest
+
+from recommendations import RecommendationEngine
+
+
+def place(db, user_id, item_ids):
+    order_id = db.execute("INSERT INTO orders (user_id, cafe_id, total_amount, status) VALUES (?, 1, 0, 'pending')",
+                          (user_id,)).lastrowid
+    db.executemany('INSERT INTO order_items (order_id, menu_item_id, quantity, price) VALUES (?, ?, 1, 0)',
+                   [(order_id, item_id) for item_id in item_ids])
+    db.commit()
+
+
+@pytest.fixture
+def items(db):
+    return [row['id'] for row in db.execute('SELECT id FROM menu_items WHERE available = 1 ORDER BY id')]
+
+
+def test_co_ordered_items_rank_first(db, items):
+    first, partner = items[0], items[-1]
+    for _ in range(3):
+        place(db, 90, [first, partner])
+    place(db, 91, [first])
+    engine = RecommendationEngine(limit=3)
+    engine.build(db)
+    top = [item['id'] for item in engine.recommend(91)]
+    assert top[:2] == [first, partner] or top[:2] == [partner, first]
+    assert partner in top
+
+
+def test_refresh_folds_new_orders(db, items):
+    engine = RecommendationEngine(limit=1)
+    engine.build(db)
+    version = engine.version
+    place(db, 92, [items[2]] * 1)
+    engine.refresh(db)
+    assert engine.version == version + 1
+    assert engine.recommend(92)[0]['id'] == items[2]
+    engine.refresh(db)
+    assert engine.version == version + 1
+
+
+def test_cache_is_bounded_and_shares_cold_start(db, items):
+    for user_id in (1, 2, 3):
+        place(db, user_id, [items[user_id]])
+    engine = RecommendationEngine(max_cached=2)
+    engine.build(db)
+    for user_id in (1, 2, 3, 1000, 2000):
+        engine.recommend(user_id)
+    assert len(engine._cache) == 2
+    assert None in engine._cache
+    assert engine.recommend(1000) is engine.recommend(2000)
+
+
+def test_route_builds_the_model_on_demand(client):
+    response = client.get('/api/menu/recommendations/123456')
+    assert response.status_code == 200
+    assert len(response.json['recommendations']) == 5
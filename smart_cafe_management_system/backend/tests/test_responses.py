@@ -0,0 +1,84 @@
+"""
+Smart Cafe Management System - Response Encoding Tests
+"""
+
+import gzip
+import json
+import sqlite3
+
+import pytest
+from flask import Response
+
+import responses
+from responses import RawJSON, compact_json, compress_response, encode_rows, negotiate
+
+
+@pytest.fixture
+def cursor():
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE t (id INTEGER, name TEXT, price REAL, note TEXT, data BLOB)')
+    conn.executemany('INSERT INTO t VALUES (?, ?, ?, ?, ?)', [
+        (1, 'Chai "special"', 120.5, None, None),
+        (2, 'Crème brûlée\n', float('inf'), 'ünïcode ✓', b'\x00raw'),
+    ])
+    yield conn.execute('SELECT * FROM t ORDER BY id')
+    conn.close()
+
+
+def test_encode_rows_matches_json(cursor):
+    encoded = json.loads(encode_rows(cursor).text)
+    assert encoded == [
+        {'id': 1, 'name': 'Chai "special"', 'price': 120.5, 'note': None, 'data': None},
+        {'id': 2, 'name': 'Crème brûlée\n', 'price': None, 'note': 'ünïcode ✓', 'data': str(b'\x00raw')},
+    ]
+
+
+def test_encode_rows_appends_extra_fields(cursor):
+    rows = cursor.fetchall()[:1]
+    encoded = encode_rows(cursor, rows, extra=lambda row: {'variants': {'thumb': f'/img/{row[0]}'}})
+    assert json.loads(encoded.text) == [{'id': 1, 'name': 'Chai "special"', 'price': 120.5, 'note': None,
+                                         'data': None, 'variants': {'thumb': '/img/1'}}]
+
+
+def test_empty_result_is_an_empty_array(cursor):
+    assert encode_rows(cursor, []).text == '[]'
+
+
+def test_compact_json_embeds_raw_json():
+    payload = {'success': True, 'items': RawJSON('[{"id":1}]'), 'count': 1, 'tags': ['a', 'ü']}
+    body = compact_json(payload)
+    assert body == '{"success":true,"items":[{"id":1}],"count":1,"tags":["a","ü"]}'.encode()
+    assert json.loads(body) == {'success': True, 'items': [{'id': 1}], 'count': 1, 'tags': ['a', 'ü']}
+
+
+@pytest.mark.parametrize('header, expected', [
+    (None, None),
+    ('', None),
+    ('gzip', 'gzip'),
+    ('gzip;q=0', None),
+    ('identity, *;q=0.5', responses.ENCODINGS[0]),
+    ('GZIP;q=0.8, deflate', 'gzip'),
+    ('gzip;q=nope', None),
+])
+def test_negotiate(header, expected):
+    assert negotiate(header) == expected
+
+
+def test_compress_response_only_touches_large_compressible_bodies():
+    body = json.dumps([{'name': 'Latte', 'price': 250}] * 200)
+    response = compress_response(Response(body, mimetype='application/json'), 'gzip')
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.get_data()).decode() == body
+    assert 'Accept-Encoding' in response.vary
+
+    small = compress_response(Response('{}', mimetype='application/json'), 'gzip')
+    assert 'Content-Encoding' not in small.headers
+    image = compress_response(Response(body, mimetype='image/png'), 'gzip')
+    assert 'Content-Encoding' not in image.headers
+
+
+def test_compressed_body_gets_its_own_etag():
+    response = Response('x' * 4096, mimetype='text/plain')
+    response.set_etag('abc')
+    compress_response(response, 'gzip')
+    assert response.get_etag() == ('abc-gzip', False)
@@ -0,0 +1,71 @@
+"""
+Smart Cafe Management System - Sales Rollup Tests
+"""
+
+import pytest
+
+from rollups import load_analytics, parse_range, refresh_rollups, rollup_mark
+
+
+def add_order(db, total, status='pending', created_at='2025-03-01 12:00:00', lines=((1, 2, 350.0),)):
+    order_id = db.execute('INSERT INTO orders (user_id, cafe_id, total_amount, status, created_at) '
+                          'VALUES (2, 1, ?, ?, ?)', (total, status, created_at)).lastrowid
+    db.executemany('INSERT INTO order_items (order_id, menu_item_id, quantity, price) VALUES (?, ?, ?, ?)',
+                   [(order_id, item_id, quantity, price) for item_id, quantity, price in lines])
+    db.commit()
+    return order_id
+
+
+def test_orders_are_folded_exactly_once(db):
+    refresh_rollups(db)
+    first = add_order(db, 700)
+    last = add_order(db, 250, created_at='2025-03-02 09:00:00', lines=((4, 1, 250.0),))
+    assert refresh_rollups(db, batch_size=1) == 2
+    assert rollup_mark(db) == last > first
+    assert refresh_rollups(db) == 0
+
+    analytics = load_analytics(db, '2025-03-01', '2025-03-02')
+    assert analytics['totals']['orders'] == 2
+    assert analytics['totals']['gross_revenue'] == 950
+    assert [row['day'] for row in analytics['daily']] == ['2025-03-01', '2025-03-02']
+    assert analytics['top_items'][0] == {'menu_item_id': 1, 'name': 'Cheese Burger', 'cafe_id': 1,
+                                         'quantity': 2, 'revenue': 700.0}
+
+
+def test_status_changes_move_folded_orders_through_the_funnel(db):
+    order_id = add_order(db, 700)
+    add_order(db, 300)
+    refresh_rollups(db)
+    db.execute("UPDATE orders SET status = 'cancelled' WHERE id = ?", (order_id,))
+    db.commit()
+
+    analytics = load_analytics(db, '2025-03-01', '2025-03-01')
+    funnel = {step['status']: step['orders'] for step in analytics['funnel']}
+    assert funnel == {'pending': 1, 'cancelled': 1}
+    assert analytics['totals']['net_revenue'] == 300
+
+
+def test_cafe_filter_and_top_limit(db):
+    add_order(db, 1000, lines=((1, 1, 350.0), (2, 1, 800.0)))
+    refresh_rollups(db)
+    analytics = load_analytics(db, '2025-03-01', '2025-03-01', cafe_id=1, top=1)
+    assert [item['menu_item_id'] for item in analytics['top_items']] == [2]
+    assert load_analytics(db, '2025-03-01', '2025-03-01', cafe_id=99)['totals']['orders'] == 0
+
+
+def test_parse_range():
+    assert parse_range({'from': '2025-01-01', 'to': '2025-01-31'}) == ('2025-01-01', '2025-01-31')
+    start, end = parse_range({'to': '2025-01-31'})
+    assert (start, end) == ('2025-01-02', '2025-01-31')
+    with pytest.raises(ValueError, match='YYYY-MM-DD'):
+        parse_range({'from': '01/02/2025'})
+    with pytest.raises(ValueError, match='after'):
+        parse_range({'from': '2025-02-01', 'to': '2025-01-01'})
+
+
+def test_route_refreshes_before_answering(client, db, admin_headers):
+    add_order(db, 700)
+    response = client.get('/api/admin/analytics?from=2025-03-01&to=2025-03-01', headers=admin_headers)
+    assert response.status_code == 200
+    assert response.json['analytics']['totals']['orders'] == 1
+    assert client.get('/api/admin/analytics?from=nope', headers=admin_headers).status_code == 400
@@ -0,0 +1,66 @@
+"""
+Smart Cafe Management System - Menu Search Tests
+"""
+
+import pytest
+
+from search import build_match, search_menu
+
+
+def names(items):
+    return [item['name'] for item in items]
+
+
+def test_build_match_prefixes_every_word():
+    assert build_match('chick bur') == '"chick"* "bur"*'
+    assert build_match('"zinger" OR -x') == '"zinger"* "OR"* "x"*'
+    assert build_match('  ?! ') == ''
+    assert build_match(None) == ''
+
+
+def test_prefix_query_ranks_name_matches_first(db):
+    items, has_more = search_menu(db, 'bur')
+    assert sorted(names(items)) == ['Cheese Burger', 'Zinger Burger']
+    assert not has_more
+    items, _ = search_menu(db, 'chicken')
+    # Name matches outrank description-only matches
+    assert items[0]['name'] == 'Chicken Biryani'
+    assert items[0]['relevance'] >= items[-1]['relevance']
+
+
+def test_filters_sorting_and_paging(db):
+    items, _ = search_menu(db, category='Fast Food', sort='price_asc')
+    assert [item['price'] for item in items] == sorted(item['price'] for item in items)
+    assert {item['category'] for item in items} == {'Fast Food'}
+
+    items, _ = search_menu(db, 'burger', max_price=300)
+    assert items == []
+
+    first, has_more = search_menu(db, cafe_id=1, page=1, limit=2)
+    second, _ = search_menu(db, cafe_id=1, page=2, limit=2)
+    assert has_more and len(first) == 2
+    assert not set(names(first)) & set(names(second))
+    assert names(first) == sorted(names(first), key=str.lower)
+
+
+def test_unavailable_items_are_hidden(db):
+    db.execute("UPDATE menu_items SET available = 0 WHERE name = 'Zinger Burger'")
+    db.commit()
+    assert names(search_menu(db, 'burger')[0]) == ['Cheese Burger']
+
+
+@pytest.mark.parametrize('kwargs', [{}, {'query': '!!'}, {'category': '&&'}])
+def test_needs_something_to_search_by(db, kwargs):
+    with pytest.raises(ValueError, match='Provide a search query'):
+        search_menu(db, **kwargs)
+
+
+def test_route_validates_parameters(client):
+    assert client.get('/api/menu/search?category=%26%26').status_code == 400
+    assert client.get('/api/menu/search?q=pizza&sort=random').status_code == 400
+    assert client.get('/api/menu/search?q=pizza&max_price=cheap').status_code == 400
+    response = client.get('/api/menu/search?q=pizza&limit=500')
+    assert response.status_code == 200
+    assert response.json['limit'] == 50
+    assert names(response.json['items']) == ['Margherita Pizza']
+    assert 'image_variants' in response.json['items'][0]
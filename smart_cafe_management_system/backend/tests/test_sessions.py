@@ -0,0 +1,61 @@
+"""
+Smart Cafe Management System - Session Authorization Tests
+"""
+
+import pytest
+
+ORDER = {'cafe_id': 1, 'items': [{'menu_item_id': 1, 'quantity': 1}]}
+
+
+@pytest.fixture
+def buyer_id(make_user):
+    return make_user('buyer@test.com')
+
+
+@pytest.fixture
+def buyer(buyer_id, login):
+    return login('buyer@test.com')
+
+
+def test_user_routes_need_a_token(client, buyer_id):
+    assert client.post('/api/user/orders', json=dict(ORDER, user_id=buyer_id)).status_code == 401
+    assert client.post('/api/user/orders/batch', json={'orders': [dict(ORDER, user_id=buyer_id)]}).status_code == 401
+    assert client.put('/api/user/profile', json={'user_id': buyer_id, 'phone': '1'}).status_code == 401
+    assert client.get(f'/api/user/orders?user_id={buyer_id}').status_code == 401
+    assert client.get(f'/api/user/profile?user_id={buyer_id}').status_code == 401
+
+
+def test_token_acts_for_its_user(client, db, buyer_id, buyer):
+    response = client.post('/api/user/orders', headers=buyer, json=ORDER)
+    assert response.status_code == 200
+    row = db.execute('SELECT user_id FROM orders WHERE id = ?', (response.json['order_id'],)).fetchone()
+    assert row['user_id'] == buyer_id
+    assert client.get('/api/user/profile', headers=buyer).json['user']['email'] == 'buyer@test.com'
+
+
+def test_token_refuses_another_user(client, buyer, admin_headers):
+    assert client.post('/api/user/orders', headers=buyer, json=dict(ORDER, user_id=1)).status_code == 403
+    assert client.get('/api/user/orders?user_id=1', headers=buyer).status_code == 403
+    assert client.post('/api/user/orders/batch', headers=buyer,
+                       json={'orders': [dict(ORDER, user_id=1)]}).status_code == 403
+
+
+def test_admin_kiosk_batches_for_other_users(client, db, buyer_id, admin_headers):
+    response = client.post('/api/user/orders/batch', headers=admin_headers,
+                           json={'orders': [dict(ORDER, user_id=buyer_id)]})
+    assert response.status_code == 200
+    assert db.execute('SELECT user_id FROM orders').fetchone()['user_id'] == buyer_id
+    # Single orders always act for the session's own user
+    assert client.post('/api/user/orders', headers=admin_headers,
+                       json=dict(ORDER, user_id=buyer_id)).status_code == 403
+
+
+def test_claimed_user_fallback_is_opt_in(app_module, client, buyer_id, monkeypatch):
+    monkeypatch.setattr(app_module, 'ALLOW_CLAIMED_USER', True)
+    assert client.post('/api/user/orders', json=dict(ORDER, user_id=buyer_id)).status_code == 200
+    assert client.get(f'/api/user/profile?user_id={buyer_id}').json['user']['id'] == buyer_id
+
+
+def test_logout_revokes_the_token(client, buyer):
+    assert client.post('/api/auth/logout', headers=buyer).status_code == 200
+    assert client.get('/api/user/profile', headers=buyer).status_code == 401
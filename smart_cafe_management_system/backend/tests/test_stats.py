@@ -0,0 +1,83 @@
+"""
+Smart Cafe Management System - Stats Counter Tests
+"""
+
+import sqlite3
+
+import migrations
+from migrations import MIGRATIONS, migrate
+from stats import read_counters, reconcile
+
+
+def test_triggers_track_inserts_updates_and_deletes(db):
+    assert reconcile(db) == []
+    before = read_counters(db, ['orders', 'orders:status:pending', 'orders:status:delivered', 'cafes'])
+
+    order_id = db.execute("INSERT INTO orders (user_id, cafe_id, total_amount, status) "
+                          "VALUES (2, 1, 100, 'pending')").lastrowid
+    db.execute("INSERT INTO cafes (name) VALUES ('Counter Cafe')")
+    db.execute("UPDATE orders SET status = 'delivered' WHERE id = ?", (order_id,))
+    db.execute("UPDATE users SET role = 'food_authority' WHERE email = 'admin@cafe.com'")
+    db.commit()
+    after = read_counters(db, list(before))
+    assert after['orders'] == before['orders'] + 1
+    assert after['orders:status:pending'] == before['orders:status:pending']
+    assert after['orders:status:delivered'] == before['orders:status:delivered'] + 1
+    assert after['cafes'] == before['cafes'] + 1
+
+    db.execute('DELETE FROM orders WHERE id = ?', (order_id,))
+    db.commit()
+    assert read_counters(db, ['orders'])['orders'] == before['orders']
+    assert reconcile(db) == []
+
+
+def test_missing_counters_read_as_zero(db):
+    assert read_counters(db, ['orders:status:nonexistent']) == {'orders:status:nonexistent': 0}
+
+
+def test_reconcile_reports_and_fixes_drift(db):
+    true_orders = read_counters(db, ['orders'])['orders']
+    db.execute("UPDATE stats_counters SET value = value + 5 WHERE name = 'orders'")
+    db.execute("INSERT INTO stats_counters (name, value) VALUES ('orders:status:lost', 3)")
+    db.commit()
+    drift = reconcile(db)
+    assert ('orders', true_orders + 5, true_orders) in drift
+    assert ('orders:status:lost', 3, 0) in drift
+    assert reconcile(db) == drift
+
+    reconcile(db, fix=True)
+    assert reconcile(db) == []
+
+
+def test_reconcile_route_fixes_drift(client, db, admin_headers):
+    db.execute("UPDATE stats_counters SET value = value + 1 WHERE name = 'cafes'")
+    db.commit()
+    response = client.post('/api/admin/stats/reconcile', json={'fix': True}, headers=admin_headers)
+    assert response.status_code == 200
+    assert [entry['name'] for entry in response.json['drift']] == ['cafes']
+    assert reconcile(db) == []
+
+
+def test_migration_backfills_counters_for_existing_rows(tmp_path, monkeypatch):
+    database = str(tmp_path / 'backfill.db')
+    monkeypatch.setattr(migrations, 'MIGRATIONS', MIGRATIONS[:3])
+    migrate(database)
+    conn = sqlite3.connect(database)
+    conn.execute("INSERT INTO users (name, email, password, role) VALUES ('A', 'a@test.com', 'x', 'user')")
+    conn.execute("INSERT INTO cafes (name) VALUES ('Old Cafe')")
+    conn.execute("INSERT INTO menu_items (cafe_id, name, price) VALUES (1, 'Tea', 90)")
+    conn.executemany("INSERT INTO orders (user_id, cafe_id, total_amount, status) VALUES (1, 1, 90, ?)",
+                     [('pending',), ('delivered',), ('delivered',)])
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setattr(migrations, 'MIGRATIONS', MIGRATIONS)
+    migrate(database)
+    migrate(database)
+    conn = sqlite3.connect(database)
+    try:
+        assert reconcile(conn) == []
+        assert read_counters(conn, ['orders:status:delivered', 'users:role:user']) == {
+            'orders:status:delivered': 2, 'users:role:user': 1}
+    finally:
+        conn.close()
@@ -0,0 +1,72 @@
+"""
+Smart Cafe Management System - Event Stream Authorization Tests
+"""
+
+import pytest
+from werkzeug.datastructures import MultiDict
+
+from sessions import InvalidToken, NotPermitted, SessionMismatch
+
+
+@pytest.fixture
+def sessions(app_module, make_user, login):
+    """Sessions for a customer, a food authority account and the admin, by role"""
+    make_user('buyer@test.com')
+    make_user('inspector@test.com', role='food_authority')
+    by_role = {}
+    for email, password in (('buyer@test.com', 'secret1'), ('inspector@test.com', 'secret1'),
+                            ('admin@cafe.com', 'admin123')):
+        token = login(email, password)['Authorization'].split()[1]
+        session = app_module.resolve_session(token)
+        by_role[session.role] = session
+    return by_role
+
+
+def parse(app_module, session, headers=None, **args):
+    return app_module.parse_stream_request(MultiDict(args), headers or {}, session)
+
+
+def test_every_stream_needs_a_session(app_module):
+    for args in ({'user_id': '2'}, {'role': 'admin'}, {'cafe_id': '1'}):
+        with pytest.raises(InvalidToken):
+            parse(app_module, None, **args)
+
+
+def test_users_stream_only_their_own_events(app_module, sessions):
+    user = sessions['user']
+    topics, _ = parse(app_module, user, user_id=str(user.user_id), role='user')
+    assert topics == [f'user:{user.user_id}', 'role:user']
+    with pytest.raises(SessionMismatch):
+        parse(app_module, user, user_id='1')
+    with pytest.raises(SessionMismatch):
+        parse(app_module, user, role='admin')
+
+
+def test_cafe_streams_need_staff_or_food_authority(app_module, sessions):
+    with pytest.raises(NotPermitted):
+        parse(app_module, sessions['user'], cafe_id='1')
+    assert parse(app_module, sessions['food_authority'], cafe_id='1')[0] == ['cafe:1']
+    assert parse(app_module, sessions['admin'], cafe_id='1', user_id='5', role='user')[0] == \
+        ['user:5', 'role:user', 'cafe:1']
+
+
+def test_last_event_id(app_module, sessions):
+    admin = sessions['admin']
+    assert parse(app_module, admin, {'Last-Event-ID': '7'}, cafe_id='1')[1] == 7
+    with pytest.raises(ValueError):
+        parse(app_module, admin, cafe_id='1', last_event_id='x')
+    with pytest.raises(ValueError):
+        parse(app_module, admin)
+
+
+def test_stream_route_status_codes(client, login, make_user):
+    make_user('buyer@test.com')
+    headers = login('buyer@test.com')
+    token = headers['Authorization'].split()[1]
+    assert client.get('/api/stream?cafe_id=1').status_code == 401
+    assert client.get('/api/stream?cafe_id=1', headers=headers).status_code == 403
+    assert client.get('/api/stream?user_id=1', headers=headers).status_code == 403
+    response = client.get(f'/api/stream?role=user&token={token}', buffered=False)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    response.close()
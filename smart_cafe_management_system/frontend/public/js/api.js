@@ -183,6 +183,14 @@ const AdminAPI = {
   
   async updateOrderStatus(orderId, status) {
     return api.put(`/admin/orders/${orderId}`, { status });
+  },
+  
+  async getNotifications(before) {
+    return api.get(before ? `/admin/notifications?before=${before}` : '/admin/notifications');
+  },
+  
+  async markNotificationsRead(upTo) {
+    return api.post('/admin/notifications/read', upTo ? { up_to: upTo } : {});
   }
 };
 